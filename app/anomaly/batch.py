@@ -0,0 +1,237 @@
+# app/anomaly/batch.py
+"""
+Kova kapanışında tüm client'lar için tek seferde (NumPy) z-skoru.
+
+Satır içi ZScoreWindow her istekte client başına skor hesaplar; oysa anomali
+kararı yalnızca kova sınırında değişir. BatchZScorer'da istek yolu yalnızca
+bir dict sayacını artırır (hit) ve yayımlanmış anomali haritasına bakar (O(1)).
+Her kova kapanışında arka plan görevi:
+  - kapanan kovanın sayımlarını client x kova halka tamponuna (2B dizi) yazar,
+  - tüm client'ların z'sini geçmiş pencereye göre tek vektörel geçişte hesaplar
+    (toplam/kareler toplamı vektörleri kova girip çıkarken güncellenir),
+  - z > threshold olanları {client: z} olarak yayımlar (bir sonraki kova boyunca).
+Hesap worker thread'de çalışır; event loop yalnızca sayaç sözlüğünü devreder.
+Pencere boyunca hiç hit'i olmayan client'ların satırları geri kazanılır; böyle bir
+client döndüğünde yeni client sayılır (min_samples kova dolana kadar skorlanmaz).
+
+Anlam ZScoreWindow ile aynıdır (hizalı kovalar, boş kovalar 0 sayılır, ilk hit'ten
+önceki kovalar sayılmaz); fark, anomalinin kova içinde değil kapanışta görülmesidir.
+NumPy opsiyoneldir: kurulu değilse get_batch_scorer() None döner ve monitor satır
+içi dedektörle devam eder.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:  # opsiyonel bağımlılık
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover
+    np = None
+
+from app.metrics import ZSCORE_BATCH_CLIENTS, ZSCORE_BATCH_TICK_SECONDS
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+class BatchZScorer:
+    def __init__(
+        self,
+        bucket_sec: float,
+        window_min: int,
+        min_samples: int,
+        threshold: float,
+        *,
+        capacity: int = 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        if np is None:
+            raise RuntimeError("numpy is required for BatchZScorer")
+        self.bucket_sec = float(bucket_sec) or 1.0
+        self.window_buckets = max(1, int(max(window_min, 1) * 60 // self.bucket_sec))
+        self.min_samples = max(int(min_samples), 1)
+        self.threshold = float(threshold)
+        self.clock = clock
+        # istek yolu: bu kovadaki hit sayıları (event loop'ta yazılır, tick'te devralınır)
+        self._pending: Dict[str, int] = {}
+        # yayımlanan sonuç: client -> z (son kapanan kova)
+        self.anomalous: Dict[str, float] = {}
+        self.published_bucket: Optional[int] = None
+        # tick tarafı (tek yazar)
+        self._rows: Dict[str, int] = {}
+        self._clients: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._alloc(max(int(capacity), 1))
+        self._next_idx: Optional[int] = None  # kapanacak sıradaki kova
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _alloc(self, cap: int) -> None:
+        """Satır kapasitesini cap'e büyüt (yeni satırlar sıfır)."""
+        old = len(self._clients)
+        k = self.window_buckets
+        if old == 0:
+            self._hist = np.zeros((cap, k), dtype=np.int32)
+            self._sum = np.zeros(cap, dtype=np.int64)
+            self._sumsq = np.zeros(cap, dtype=np.int64)
+            self._first = np.zeros(cap, dtype=np.int64)
+        else:
+            self._hist = np.concatenate([self._hist, np.zeros((cap - old, k), dtype=np.int32)])
+            self._sum = np.concatenate([self._sum, np.zeros(cap - old, dtype=np.int64)])
+            self._sumsq = np.concatenate([self._sumsq, np.zeros(cap - old, dtype=np.int64)])
+            self._first = np.concatenate([self._first, np.zeros(cap - old, dtype=np.int64)])
+        self._clients.extend([None] * (cap - old))
+        self._free.extend(range(cap - 1, old - 1, -1))
+
+    # --- istek yolu -------------------------------------------------------
+
+    def hit(self, client: str) -> None:
+        self._pending[client] = self._pending.get(client, 0) + 1
+        if self._task is None:
+            self.start()
+
+    def lookup(self, client: str) -> Optional[float]:
+        """Son kapanan kovada anomaliyse z, değilse None."""
+        return self.anomalous.get(client)
+
+    # --- kova kapanışı ----------------------------------------------------
+
+    def close_bucket(self, idx: int, counts: Dict[str, int]) -> Dict[str, float]:
+        """
+        idx kovasını counts ile kapatır, anomalileri yayımlar ve döndürür.
+        Aradaki atlanmış kovalar boş sayılır.
+        """
+        with self._lock:
+            t0 = time.perf_counter()
+            if self._next_idx is not None:
+                idx = max(idx, self._next_idx)  # saat geri giderse aynı kovayı iki kez kapatma
+                if idx - self._next_idx >= self.window_buckets:
+                    # pencereden uzun boşluk: tüm geçmiş sıfır
+                    self._hist[:] = 0
+                    self._sum[:] = 0
+                    self._sumsq[:] = 0
+                else:
+                    for skipped in range(self._next_idx, idx):
+                        self._push_column(skipped, None)
+            rows = self._assign_rows(counts, idx)
+            cur = np.zeros(len(self._clients), dtype=np.int64)
+            if rows:
+                cur[np.fromiter(rows, dtype=np.int64, count=len(rows))] = np.fromiter(
+                    counts.values(), dtype=np.int64, count=len(counts))
+            result = self._score(idx, cur)
+            self._push_column(idx, cur)
+            self._reclaim_idle()
+            self._next_idx = idx + 1
+            self.anomalous = result
+            self.published_bucket = idx
+            ZSCORE_BATCH_CLIENTS.set(len(self._rows))
+            ZSCORE_BATCH_TICK_SECONDS.observe(time.perf_counter() - t0)
+            return result
+
+    def _assign_rows(self, counts: Dict[str, int], idx: int) -> List[int]:
+        rows = []
+        for client in counts:
+            r = self._rows.get(client)
+            if r is None:
+                if not self._free:
+                    self._alloc(len(self._clients) * 2)
+                r = self._free.pop()
+                self._rows[client] = r
+                self._clients[r] = client
+                self._first[r] = idx
+            rows.append(r)
+        return rows
+
+    def _score(self, idx: int, cur) -> Dict[str, float]:
+        # n: penceredeki geçmiş kova sayısı (boşlar dahil, ilk hit'ten öncekiler hariç)
+        n = np.minimum(self.window_buckets, idx - self._first)
+        ok = (n >= self.min_samples) & (n > 1) & (cur > 0)
+        if not ok.any():
+            return {}
+        rows = np.flatnonzero(ok)
+        n, s, q, c = n[rows], self._sum[rows], self._sumsq[rows], cur[rows]
+        var = (n * q - s * s) / (n * (n - 1))
+        std = np.sqrt(np.maximum(var, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(std > 0, (c - s / n) / std, 0.0)
+        hit = np.flatnonzero(z > self.threshold)
+        return {self._clients[r]: float(v) for r, v in zip(rows[hit].tolist(), z[hit].tolist())}
+
+    def _push_column(self, idx: int, cur) -> None:
+        """idx kovasını halkaya yaz; aynı sütundaki (idx - K) kovası pencereden çıkar."""
+        col = idx % self.window_buckets
+        old = self._hist[:, col].astype(np.int64)
+        self._sum -= old
+        self._sumsq -= old * old
+        if cur is None:
+            self._hist[:, col] = 0
+        else:
+            self._hist[:, col] = cur
+            self._sum += cur
+            self._sumsq += cur * cur
+
+    def _reclaim_idle(self) -> None:
+        if not self._rows:
+            return
+        idle = np.flatnonzero(self._sum == 0)
+        for r in idle.tolist():
+            client = self._clients[r]
+            if client is not None:
+                del self._rows[client]
+                self._clients[r] = None
+                self._free.append(r)
+
+    # --- arka plan görevi -------------------------------------------------
+
+    async def _run(self) -> None:
+        while True:
+            now = self.clock()
+            idx = int(now // self.bucket_sec)
+            await asyncio.sleep(max((idx + 1) * self.bucket_sec - now, 0.0) + 0.001)
+            counts, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self.close_bucket, idx, counts)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+_SCORER: Optional[BatchZScorer] = None
+
+
+def get_batch_scorer() -> Optional[BatchZScorer]:
+    """ZSCORE_BATCH_ENABLED ve numpy varsa paylaşılan scorer, yoksa None."""
+    global _SCORER
+    if _SCORER is None:
+        if np is None or os.getenv("ZSCORE_BATCH_ENABLED", "false").lower() not in ("1", "true", "yes", "on"):
+            return None
+        _SCORER = BatchZScorer(
+            bucket_sec=_env_int("ZSCORE_BUCKET_SEC", 2),
+            window_min=_env_int("ZSCORE_WINDOW_MIN", 15),
+            min_samples=_env_int("ZSCORE_MIN_SAMPLES", 5),
+            threshold=float(os.getenv("ZSCORE_THRESHOLD", "3.0")),
+            capacity=_env_int("ZSCORE_BATCH_CAPACITY", 1024),
+        )
+    return _SCORER
@@ -10,32 +10,48 @@ class ZScoreWindow:
     - window_min: geri dönük pencere (dakika)
     - min_samples: z-skoru hesaplamak için alt sınır (n)
     - threshold: z > threshold ise anomaly
+
+    Kovalar floor(now / bucket_sec) ile hizalıdır; pencere güncel kovadan önceki
+    K = window / bucket kovadır. Yalnızca boş olmayan kovalar (index, sayı) olarak
+    tutulur; boşta geçen kovalar n'e 0 olarak girer ama saklanmaz. Toplam ve kareler
+    toplamı kova girip çıkarken güncellenir: her hit O(1) (pencere uzunluğundan
+    bağımsız). Sayımlar tam sayı olduğu için toplamlar kesindir, kayma (drift) yok.
     """
     def __init__(self, bucket_sec: int, window_min: int, min_samples: int, threshold: float):
-        self.bucket_sec = float(bucket_sec)
+        self.bucket_sec = float(bucket_sec) or 1.0
         self.window_sec = float(max(window_min, 1) * 60)
         self.min_samples = int(min_samples)
         self.threshold = float(threshold)
-        self._cur_bucket_ts = 0.0
+        self.window_buckets = max(1, int(self.window_sec // self.bucket_sec))
+        self._first_idx = None  # ilk hit'in kovası (öncesi pencereye sayılmaz)
+        self._cur_idx = 0
         self._cur_count = 0
-        self._hist: Deque[int] = deque()  # geçmiş kovalar
-        self._hist_ts: Deque[float] = deque()
+        # pencere içindeki boş olmayan geçmiş kovalar: (index, sayı), index artan
+        self._hist: Deque[Tuple[int, int]] = deque(maxlen=self.window_buckets)
+        self._sum = 0
+        self._sumsq = 0
 
     def _roll_if_needed(self, now: float):
-        if self._cur_bucket_ts == 0.0:
-            self._cur_bucket_ts = now
+        idx = int(now // self.bucket_sec)
+        if self._first_idx is None:
+            self._first_idx = self._cur_idx = idx
+            return
+        if idx <= self._cur_idx:
             return
-        if now - self._cur_bucket_ts >= self.bucket_sec:
-            # mevcut kovayı geçmişe at
-            self._hist.append(self._cur_count)
-            self._hist_ts.append(self._cur_bucket_ts)
-            self._cur_bucket_ts = now
-            self._cur_count = 0
-            # pencere dışını temizle
-            cutoff = now - self.window_sec
-            while self._hist_ts and self._hist_ts[0] < cutoff:
-                self._hist_ts.popleft()
-                self._hist.popleft()
+        # pencere dışını temizle
+        cutoff = idx - self.window_buckets
+        while self._hist and self._hist[0][0] < cutoff:
+            _, c = self._hist.popleft()
+            self._sum -= c
+            self._sumsq -= c * c
+        # mevcut kovayı geçmişe at (boşsa ya da pencereden çıkmışsa saklamaya gerek yok)
+        c = self._cur_count
+        if c and self._cur_idx >= cutoff:
+            self._hist.append((self._cur_idx, c))
+            self._sum += c
+            self._sumsq += c * c
+        self._cur_idx = idx
+        self._cur_count = 0
 
     def add_hit(self, now: float | None = None) -> Tuple[float, bool]:
         """
@@ -47,15 +63,23 @@ class ZScoreWindow:
         self._cur_count += 1
         return self.score(now)
 
+    def samples(self) -> int:
+        """Penceredeki geçmiş kova sayısı (boşlar dahil, ilk hit'ten önceki kovalar hariç)."""
+        if self._first_idx is None:
+            return 0
+        return min(self.window_buckets, self._cur_idx - self._first_idx)
+
     def score(self, now: float | None = None) -> Tuple[float, bool]:
         now = now or time.time()
+        self._roll_if_needed(now)
         # güncel kova dahil edilmeden geçmişten ölç (leak önlemek için)
-        samples = list(self._hist)
-        n = len(samples)
-        if n < self.min_samples:
+        n = self.samples()
+        if n < max(self.min_samples, 1):
             return 0.0, False
-        mean = sum(samples) / n
-        var = sum((x - mean) ** 2 for x in samples) / max(n - 1, 1)
+        s = self._sum
+        mean = s / n
+        # örnek varyansı; pay tam sayı aritmetiğiyle kesin
+        var = (n * self._sumsq - s * s) / (n * (n - 1)) if n > 1 else 0.0
         std = math.sqrt(var) if var > 0 else 0.0
         z = 0.0
         if std > 0:
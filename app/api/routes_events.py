@@ -1,16 +1,26 @@
 # app/api/routes_events.py
 from __future__ import annotations
 from datetime import datetime, timezone
-from typing import Optional, List, Any
+from typing import Literal, Optional, List
 
 from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field, conint, constr
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_session
-from app.repositories.events import list_events, daily_counts, top_reason_counts, top_paths
-import time, inspect
-import app.repositories.events as repo  # module import for insert/search helpers
+from app.db.session import get_read_session, get_session
+from app.repositories.events import list_events, next_cursor
+import time, json, zlib, os
+from pydantic import ValidationError
+import app.repositories.events as repo
+from app.services.archive import archive_dir, search_archive
+from app.services.rollups import invalidate_from
+from app.services.query_cache import SEARCH_TTL, get_query_cache
+from app.services.hot_tail import get_hot_tail
+from app.repositories.lookups import EventRow, decode_ip_hash, encode_ip_hash
+from app.services import export as exp
+from app.services.fast_json import event_dicts, json_response, parse_fields
+from app.db.session import read_router
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -26,8 +36,21 @@ class EventOut(BaseModel):
     meta: Optional[dict] = None
 
 class EventsPage(BaseModel):
-    total: int
+    total: Optional[int] = Field(None, description="total=none ise boş; estimate ise yaklaşık")
     items: List[EventOut]
+    next_cursor: Optional[str] = None
+
+class SearchPage(EventsPage):
+    limit: int
+    offset: int
+    count: int
+
+# Sayfalar satır başına model kurulmadan baytlara çevrilir (app.services.fast_json); şema
+# yalnızca OpenAPI için. fields= ile istenmeyen item anahtarları yanıtta hiç yer almaz.
+_FIELDS_NOTE = "fields= verilirse items yalnızca istenen alanları içerir; diğer EventOut anahtarları yer almaz."
+
+_TotalMode = Literal["exact", "estimate", "none"]
+_MatchMode = Literal["exact", "prefix", "contains"]
 
 # --- Yeni ingest/search modelleri ---
 _Str32 = constr(strip_whitespace=True, min_length=1, max_length=32)
@@ -46,6 +69,31 @@ class OkCreated(BaseModel):
     ok: bool = True
     id: Optional[int] = None
 
+class BulkBatch(BaseModel):
+    batch: int
+    first_line: int
+    last_line: int
+    inserted: int
+    error: Optional[str] = None
+
+class BulkRejected(BaseModel):
+    line: int
+    error: str
+
+class BulkResult(BaseModel):
+    accepted: int
+    rejected: int
+    batches: List[BulkBatch]
+    rejected_lines: List[BulkRejected]
+    rejected_lines_truncated: bool = False
+
+# Bulk ingest sınırları (bellek sabit kalsın diye her şey üstten sınırlı)
+BULK_BATCH_ROWS = int(os.getenv("BULK_BATCH_ROWS", "5000"))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", "65536"))
+BULK_MAX_REJECT_DETAILS = int(os.getenv("BULK_MAX_REJECT_DETAILS", "1000"))
+# Export: server-side cursor'dan tek seferde çekilen satır sayısı
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+
 def _parse_ts(s: Optional[str]):
     """float epoch ya da ISO (YYYY-MM-DD[THH:MM:SS]) -> datetime | None"""
     if not s:
@@ -70,21 +118,7 @@ def _parse_ts(s: Optional[str]):
         pass
     return None
 
-async def _call_repo(fn, *args, **kwargs):
-    """
-    Repo fonksiyonu async ise await, sync ise direkt çağır.
-    Ayrıca fn imzasında olmayan keyword'leri filtrele.
-    """
-    try:
-        sig = inspect.signature(fn)
-        fkwargs = {k: v for k, v in kwargs.items() if k in sig.parameters}
-    except Exception:
-        fkwargs = kwargs
-    if inspect.iscoroutinefunction(fn):
-        return await fn(*args, **fkwargs)
-    return fn(*args, **fkwargs)
-
-@router.get("", response_model=EventsPage)
+@router.get("", response_class=Response, responses={200: {"model": EventsPage, "description": _FIELDS_NOTE}})
 async def get_events(
     start_ts: Optional[datetime] = Query(None),
     end_ts: Optional[datetime] = Query(None),
@@ -93,15 +127,35 @@ async def get_events(
     ip_hash: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    session: AsyncSession = Depends(get_session),
+    cursor: Optional[str] = Query(None, description="önceki sayfanın next_cursor'ı; verilirse offset yok sayılır"),
+    total: _TotalMode = Query("exact"),
+    fields: Optional[str] = Query(None, description="virgülle alan listesi (örn. ts,reason,path); yalnızca bunlar okunur/döner"),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    total, rows = await list_events(
-        session,
-        start_ts=start_ts, end_ts=end_ts, reason=reason, path=path, ip_hash=ip_hash,
-        limit=limit, offset=offset
-    )
-    items = [EventOut.model_validate(r.__dict__) for r in rows]
-    return EventsPage(total=total, items=items)
+    """
+    Filtreli olay sayfası ((ts, id) azalan). Gövde EventsPage biçimindedir; fields=
+    verilirse items yalnızca istenen anahtarları içerir (istenmeyenler düşer).
+    """
+    try:
+        cols = parse_fields(fields)
+        # son dakikalar tampondan (kapsam dışıysa None -> DB)
+        hit = get_hot_tail().query(
+            start_ts=start_ts, end_ts=end_ts, reason=reason, path=path, ip_hash=ip_hash,
+            limit=limit, offset=offset, cursor=cursor, total=total,
+        )
+        if hit is not None:
+            n_total, rows = hit
+        else:
+            n_total, rows = await list_events(
+                session,
+                start_ts=start_ts, end_ts=end_ts, reason=reason, path=path, ip_hash=ip_hash,
+                limit=limit, offset=offset, cursor=cursor, total=total, fields=cols,
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # EventsPage ile aynı baytlar (satır başına model yok; bkz. app.services.fast_json)
+    page = {"total": n_total, "items": event_dicts(rows, cols), "next_cursor": next_cursor(rows, limit)}
+    return json_response(page, utc_z=True)
 
 
 # --- Yeni ingest/search uçları ---
@@ -110,49 +164,227 @@ async def get_events(
 async def create_event(payload: EventIn, session: AsyncSession = Depends(get_session)):
     """
     Yeni olay ingest ucu. Var olan GET /events'i bozmaz; aynı path'e POST.
+    client -> ip_hash; kind şemada yok (yok sayılır). Şema uyumluluğu için
+    ua/score/severity boş yerine ""/0.0/0 yazılır.
     """
-    # repo.insert_event bekleniyor; yoksa 500 döner
-    if not hasattr(repo, "insert_event"):
-        raise HTTPException(status_code=500, detail="insert_event() not available")
-    ts = float(payload.ts or time.time())
+    ts = datetime.fromtimestamp(float(payload.ts or time.time()), tz=timezone.utc)
     try:
-        # Repo isim farklarını tolere et: client -> ip_hash, ts -> ts|timestamp
-        kw = dict(
-            client=payload.client,
-            ip_hash=payload.client,   # her iki isim de denensin
-            kind=payload.kind,
-            reason=payload.reason,
+        new_id = await repo.insert_event(
+            session,
+            ip_hash=payload.client,
+            ua="",
             path=payload.path,
+            reason=payload.reason,
+            score=0.0,
+            severity=0,
             meta=payload.meta or {},
             ts=ts,
-            timestamp=ts,
-            ua=None,
-            score=None,
-            severity=None,
         )
-        # Şema uyumluluğu: bazı kurulumlarda NOT NULL olabilir
-        if kw.get("severity") is None:
-            kw["severity"] = 0
-        if kw.get("score") is None:
-            kw["score"] = 0.0
-        if kw.get("ua") is None:
-            kw["ua"] = ""
-        fn = getattr(repo, "insert_event", None)
-        if not fn:
-            raise HTTPException(status_code=500, detail="insert_event not available")
-        new_id = await _call_repo(fn, session, **kw)
+        await invalidate_from(session, ts)
         # Insert'i kalıcı yap
         try:
             await session.commit()
         except Exception as ce:
             await session.rollback()
             raise HTTPException(status_code=500, detail=f"commit failed: {ce}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"insert failed: {e}")
-    return OkCreated(ok=True, id=int(new_id) if isinstance(new_id, int) else None)
+    get_query_cache().invalidate_range(ts, ts)
+    get_hot_tail().add([EventRow(
+        id=int(new_id), ts=ts, ip_hash=decode_ip_hash(encode_ip_hash(payload.client)), ua="",
+        path=payload.path, reason=payload.reason, score=0.0, severity=0, meta=payload.meta or {},
+    )])
+    return OkCreated(ok=True, id=int(new_id))
+
+
+async def _iter_ndjson(request: Request, gzipped: bool):
+    """
+    İstek gövdesini akış halinde okuyup (lineno, bytes | None) üretir.
+    Satır BULK_MAX_LINE_BYTES'ı aşarsa None döner (reddedilir); gövde asla tamamen belleğe alınmaz.
+    """
+    dec = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS) if gzipped else None
+    buf = b""
+    lineno = 0
+    oversized = False
 
+    def _split(data: bytes):
+        nonlocal buf, lineno, oversized
+        buf += data
+        while True:
+            nl = buf.find(b"\n")
+            if nl < 0:
+                if len(buf) > BULK_MAX_LINE_BYTES:
+                    # satırın geri kalanını at, sonunda reddet
+                    oversized = True
+                    buf = b""
+                return
+            line, buf = buf[:nl], buf[nl + 1:]
+            lineno += 1
+            if oversized or len(line) > BULK_MAX_LINE_BYTES:
+                oversized = False
+                yield lineno, None
+            else:
+                yield lineno, line
 
-@router.get("/search")
+    async for chunk in request.stream():
+        if dec is not None:
+            # decompression bomb'a karşı çıktıyı parça parça aç
+            data = dec.decompress(chunk, BULK_MAX_LINE_BYTES)
+            for item in _split(data):
+                yield item
+            while dec.unconsumed_tail:
+                data = dec.decompress(dec.unconsumed_tail, BULK_MAX_LINE_BYTES)
+                for item in _split(data):
+                    yield item
+        else:
+            for item in _split(chunk):
+                yield item
+    if dec is not None:
+        for item in _split(dec.flush()):
+            yield item
+    if buf.strip() or oversized:
+        lineno += 1
+        yield lineno, (None if oversized else buf)
+
+def _bulk_record(line: bytes) -> tuple:
+    """NDJSON satırı -> COPY kaydı (POST /events ile aynı alan eşlemesi)."""
+    payload = EventIn.model_validate(json.loads(line))
+    ts = datetime.fromtimestamp(float(payload.ts or time.time()), tz=timezone.utc)
+    meta = json.dumps(payload.meta or {}, ensure_ascii=False)
+    return (ts, payload.client, "", payload.path, payload.reason, 0.0, 0, meta)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_ingest(
+    request: Request,
+    gzip: bool = Query(False, description="Gövde gzip ise true (ya da Content-Encoding: gzip)"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    NDJSON toplu ingest. Gövde akış halinde okunur, satırlar tek tek doğrulanır ve
+    BULK_BATCH_ROWS'luk parçalar halinde COPY ile yüklenir; her parça ayrı commit edilir.
+    """
+    gzipped = gzip or "gzip" in (request.headers.get("content-encoding") or "").lower()
+    batches: List[BulkBatch] = []
+    rejected: List[BulkRejected] = []
+    n_rejected = 0
+    accepted = 0
+    records: List[tuple] = []
+    first_line = 0
+    last_line = 0
+
+    async def _flush():
+        nonlocal records, accepted
+        if not records:
+            return
+        b = BulkBatch(batch=len(batches) + 1, first_line=first_line, last_line=last_line, inserted=0)
+        try:
+            b.inserted = await repo.copy_events(session, records)
+            await invalidate_from(session, min(r[0] for r in records))
+            await session.commit()
+            get_query_cache().invalidate_range(min(r[0] for r in records), max(r[0] for r in records))
+            # COPY id döndürmez: tampon bu aralığı kapsayamaz
+            get_hot_tail().gap(max(r[0] for r in records))
+            accepted += b.inserted
+        except Exception as e:
+            await session.rollback()
+            b.error = f"copy failed: {e}"
+        batches.append(b)
+        records = []
+
+    def _reject(lineno: int, err: str):
+        nonlocal n_rejected
+        n_rejected += 1
+        if len(rejected) < BULK_MAX_REJECT_DETAILS:
+            rejected.append(BulkRejected(line=lineno, error=err[:200]))
+
+    try:
+        async for lineno, line in _iter_ndjson(request, gzipped):
+            if line is None:
+                _reject(lineno, f"line exceeds {BULK_MAX_LINE_BYTES} bytes")
+                continue
+            if not line.strip():
+                continue
+            try:
+                rec = _bulk_record(line)
+            except ValidationError as e:
+                errs = e.errors()
+                _reject(lineno, "; ".join(f"{'.'.join(map(str, x['loc'])) or 'row'}: {x['msg']}" for x in errs[:3]))
+                continue
+            except (ValueError, OverflowError, OSError) as e:
+                _reject(lineno, str(e) or e.__class__.__name__)
+                continue
+            if not records:
+                first_line = lineno
+            last_line = lineno
+            records.append(rec)
+            if len(records) >= BULK_BATCH_ROWS:
+                await _flush()
+        await _flush()
+    except zlib.error as e:
+        await _flush()
+        raise HTTPException(status_code=400, detail=f"gzip decode failed after {accepted} rows: {e}")
+
+    return BulkResult(
+        accepted=accepted,
+        rejected=n_rejected,
+        batches=batches,
+        rejected_lines=rejected,
+        rejected_lines_truncated=n_rejected > len(rejected),
+    )
+
+
+def _meta_params(request: Request, meta: Optional[str]):
+    """?meta={...} ve meta.<key><op><value> parametreleri -> (içerme nesnesi, filtreler)."""
+    obj = None
+    if meta:
+        try:
+            obj = json.loads(meta)
+        except ValueError:
+            raise ValueError("meta must be a JSON object") from None
+        if not isinstance(obj, dict):
+            raise ValueError("meta must be a JSON object")
+    out = []
+    for k, v in request.query_params.multi_items():
+        if k.startswith("meta."):
+            # meta.z>5 anahtar olarak, meta.z>=5 "meta.z>" = "5" olarak gelir
+            out.append(repo.parse_meta_filter(k if v == "" else f"{k}={v}"))
+    return obj, tuple(out)
+
+
+def _event_filters(
+    request: Request,
+    *,
+    since: Optional[str],
+    until: Optional[str],
+    client: Optional[str],
+    reason: Optional[str],
+    path: Optional[str],
+    ua: Optional[str],
+    path_match: str,
+    ua_match: str,
+    icase: bool,
+    meta: Optional[str],
+) -> dict:
+    """/events/search ve /events/export'un ortak filtreleri (repo list_events/stream_events anahtarları)."""
+    meta_obj, meta_filters = _meta_params(request, meta)
+    return dict(
+        start_ts=_parse_ts(since),
+        end_ts=_parse_ts(until),
+        reason=reason,
+        path=path,
+        ip_hash=client,
+        ua=ua,
+        path_match=path_match,
+        ua_match=ua_match,
+        icase=icase,
+        meta=meta_obj,
+        meta_filters=meta_filters,
+    )
+
+
+@router.get("/search", response_class=Response, responses={200: {"model": SearchPage, "description": _FIELDS_NOTE}})
 async def search_events(
     request: Request,
     limit: conint(ge=1, le=1000) = 100,
@@ -163,66 +395,152 @@ async def search_events(
     kind: Optional[str] = None,  # şimdilik repo desteklemiyorsa yok sayılır
     reason: Optional[str] = None,
     path: Optional[str] = None,
-    session: AsyncSession = Depends(get_session),
+    ua: Optional[str] = None,
+    path_match: _MatchMode = "exact",
+    ua_match: _MatchMode = "exact",
+    icase: bool = False,
+    meta: Optional[str] = Query(None, description='JSON içerme nesnesi, örn. {"phase":"ban_set"}'),
+    cursor: Optional[str] = None,
+    total: _TotalMode = "exact",
+    fields: Optional[str] = Query(None, description="virgülle alan listesi (örn. ts,reason,path)"),
+    session: AsyncSession = Depends(get_read_session),
 ):
     """
-    Gelişmiş arama. Mevcut list_events() imzasına uyacak şekilde map eder.
+    Gelişmiş arama: since/until (epoch ya da ISO), client (= ip_hash), reason, path, ua.
+    path/ua için path_match/ua_match = exact|prefix|contains, icase=true harf duyarsız
+    (örn. path=wp-&path_match=contains, ua=sqlmap&ua_match=prefix&icase=true).
+    meta: meta={"phase":"ban_set"} içerme, meta.<key><op><value> anahtar filtreleri
+    (meta.phase=ban_set, meta.z>5, meta.count>=10, meta.status!=ok; hepsi AND).
+    kind şemada olmadığından yok sayılır. Derin sayfalar için cursor (= next_cursor)
+    kullanın; total=estimate|none büyük filtrelerde count maliyetini kaldırır.
+    fields=ts,reason,path yalnızca istenen kolonları okur ve döndürür; items'ta istenmeyen
+    anahtarlar yer almaz (gövde aksi halde SearchPage biçimindedir).
     """
     try:
-        start_ts = _parse_ts(since)
-        end_ts = _parse_ts(until)
-        # client/ip_hash ve tarih isim farklarını tolere et
-        kw = dict(
-            limit=int(limit),
-            offset=int(offset),
-            since=start_ts,
-            until=end_ts,
-            start_ts=start_ts,
-            end_ts=end_ts,
-            client=client,
-            ip_hash=client,
-            kind=kind,
-            reason=reason,
-            path=path,
+        filters = _event_filters(
+            request, since=since, until=until, client=client, reason=reason, path=path, ua=ua,
+            path_match=path_match, ua_match=ua_match, icase=icase, meta=meta,
         )
-        fn = getattr(repo, "list_events", None) or getattr(repo, "search_events", None)
-        if not fn:
-            raise HTTPException(status_code=500, detail="list_events/search_events not available")
-        res = await _call_repo(fn, session, **kw)
-        # Hem (total, rows) hem de sadece rows dönen imzaları destekle
-        if isinstance(res, tuple) and len(res) == 2:
-            total, rows = res
+        cols = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    start, end, meta_filters = filters["start_ts"], filters["end_ts"], filters["meta_filters"]
+    filters.update(limit=int(limit), offset=int(offset), cursor=cursor, total=total)
+
+    def _page(n_total, rows):
+        items = event_dicts(rows, cols)
+        return {
+            "items": items,
+            "limit": limit,
+            "offset": offset,
+            "count": len(items),
+            "total": None if n_total is None else int(n_total),
+            "next_cursor": next_cursor(rows, int(limit)),
+        }
+
+    async def _q():
+        return _page(*await list_events(session, fields=cols, **filters))
+
+    params = {
+        "limit": int(limit), "offset": int(offset), "since": start, "until": end, "client": client,
+        "reason": reason, "path": path, "cursor": cursor, "total": total,
+        "ua": ua, "path_match": path_match, "ua_match": ua_match, "icase": icase,
+        "meta": meta, "meta_filters": meta_filters or None, "fields": cols,
+    }
+    try:
+        hit = get_hot_tail().query(**filters)
+        if hit is not None:
+            page = _page(*hit)
         else:
-            rows = res or []
-            total = len(rows)
-        items = []
-        for r in rows:
-            try:
-                items.append(EventOut.model_validate(getattr(r, "__dict__", r)).model_dump())
-            except Exception:
-                # dict ya da raw satır olabilir
-                items.append(r)
-        return {"items": items, "limit": limit, "offset": offset, "count": len(items), "total": int(total)}
+            page = await get_query_cache().get_or_compute(
+                "events.search", params, SEARCH_TTL, _q, start=start, end=end
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"search failed: {e}")
+    return json_response(page)
 
-stats_router = APIRouter(prefix="/stats", tags=["stats"])
 
-class KeyCount(BaseModel):
-    key: Any = Field(..., description="day/reason/path")
-    cnt: int
+@router.get("/export")
+async def export_events(
+    request: Request,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    client: Optional[str] = None,
+    reason: Optional[str] = None,
+    path: Optional[str] = None,
+    ua: Optional[str] = None,
+    path_match: _MatchMode = "exact",
+    ua_match: _MatchMode = "exact",
+    icase: bool = False,
+    meta: Optional[str] = Query(None, description='JSON içerme nesnesi, örn. {"phase":"ban_set"}'),
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    compression: Literal["none", "gzip", "zstd"] = "none",
+):
+    """
+    /events/search filtreleriyle (ua, path_match/ua_match, icase, meta ve meta.<key><op><value>
+    dahil) eşleşen tüm olayları (ts, id) artan sırada akıtır.
+    Satırlar server-side cursor'dan EXPORT_CHUNK_ROWS'luk parçalarla okunur, parça
+    parça serileştirilip sıkıştırılır; sayım ve Pydantic modeli yoktur, bellek sabittir.
+    Session yanıt akarken açık kalmalı, bu yüzden dependency yerine generator içinde açılır.
+    """
+    try:
+        comp = exp.compressor(compression)
+        filters = _event_filters(
+            request, since=since, until=until, client=client, reason=reason, path=path, ua=ua,
+            path_match=path_match, ua_match=ua_match, icase=icase, meta=meta,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    encode = exp.csv_chunk if fmt == "csv" else exp.ndjson_chunk
+
+    async def _body():
+        if fmt == "csv":
+            yield comp.compress(exp.csv_header())
+        # dışa aktarım uzun sürer: ingest'in havuzunu tutmasın (replika varsa)
+        async with (await read_router.factory())() as session:
+            async for part in repo.stream_events(session, chunk_rows=EXPORT_CHUNK_ROWS, **filters):
+                data = comp.compress(encode(part))
+                if data:
+                    yield data
+        yield comp.flush()
 
-@stats_router.get("/daily", response_model=List[KeyCount])
-async def stats_daily(days: int = Query(7, ge=1, le=90), session: AsyncSession = Depends(get_session)):
-    rows = await daily_counts(session, days=days)
-    return [{"key": r.day, "cnt": r.cnt} for r in rows]
+    name = exp.filename(fmt, compression)
+    media = exp.FORMATS[fmt][0] if compression == "none" else "application/octet-stream"
+    return StreamingResponse(
+        _body(), media_type=media, headers={"Content-Disposition": f'attachment; filename="{name}"'}
+    )
 
-@stats_router.get("/reasons", response_model=List[KeyCount])
-async def stats_reasons(limit: int = Query(10, ge=1, le=100), session: AsyncSession = Depends(get_session)):
-    rows = await top_reason_counts(session, limit=limit)
-    return [{"key": r.reason, "cnt": r.cnt} for r in rows]
 
-@stats_router.get("/paths", response_model=List[KeyCount])
-async def stats_paths(limit: int = Query(10, ge=1, le=100), session: AsyncSession = Depends(get_session)):
-    rows = await top_paths(session, limit=limit)
-    return [{"key": r.path, "cnt": r.cnt} for r in rows]
\ No newline at end of file
+@router.get("/archive")
+async def search_archived_events(
+    limit: conint(ge=1, le=1000) = 100,
+    offset: conint(ge=0) = 0,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    client: Optional[str] = None,
+    reason: Optional[str] = None,
+    path: Optional[str] = None,
+):
+    """
+    Retention ile DB'den düşmüş (arşivlenmiş) aralıklarda /events/search benzeri arama.
+    Yalnızca [since, until) aralığına düşen gün dosyaları taranır; sonuçlar eskiden yeniye sıralıdır.
+    """
+    directory = archive_dir()
+    if not directory:
+        raise HTTPException(status_code=404, detail="archive disabled (ARCHIVE_DIR not set)")
+    try:
+        items, scanned = await search_archive(
+            directory,
+            start=_parse_ts(since),
+            end=_parse_ts(until),
+            ip_hash=client,
+            reason=reason,
+            path=path,
+            limit=int(limit),
+            offset=int(offset),
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"archive search failed: {e}")
+    return {"items": items, "limit": limit, "offset": offset, "count": len(items), "scanned_files": scanned}
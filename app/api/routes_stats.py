@@ -1,21 +1,30 @@
 from __future__ import annotations
 
-import inspect
-
-from fastapi import APIRouter, Depends, Query, HTTPException, Request
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.persistence.db import get_session
-from app.persistence.repo import daily_summary, retention_purge
-from app.core.settings import get_settings
 
-from typing import Optional
-
-try:
-    from app.repositories import events as repo
-    from app.db.session import get_session as get_db
-except Exception as _e:  # pragma: no cover
-    repo = None  # type: ignore
-    get_db = None  # type: ignore
+from app.api.routes_debug_alerts import list_recent_alerts
+from app.api.routes_debug_banlist import banlist
+from app.db.session import get_read_session, read_session
+from app.metrics import STATS_OVERVIEW_DEGRADED
+from app.repositories.events import (
+    daily_counts,
+    daily_summary,
+    severity_counts,
+    top_paths as repo_top_paths,
+    top_reason_counts,
+)
+from app.core.settings import get_settings
+from app.services.query_cache import STATS_TTL, get_query_cache
+from app.services.retention import current_policy
 
 
 router = APIRouter(prefix="/stats", tags=["stats"])
@@ -23,92 +32,189 @@ _settings = get_settings()
 
 router_admin = APIRouter(prefix="/_admin/stats", tags=["stats"])
 
-def _parse_ts(s: Optional[str]) -> Optional[float]:
+# /stats/overview: bölüm başına süre bütçesi (sn)
+OVERVIEW_SECTION_TIMEOUT_SEC = float(os.getenv("STATS_OVERVIEW_SECTION_TIMEOUT_SEC", "2.0"))
+
+class KeyCount(BaseModel):
+    key: Any = Field(..., description="day/reason/path")
+    cnt: int
+
+def _parse_ts(s: Optional[str]) -> Optional[datetime]:
+    """float epoch ya da ISO (YYYY-MM-DD[THH:MM[:SS]]) -> UTC datetime | None"""
     if not s:
         return None
     try:
-        return float(s)
-    except Exception:
-        pass
-    try:
-        from datetime import datetime
-        for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S"):
-            try:
-                return datetime.strptime(s, fmt).timestamp()
-            except Exception:
-                continue
+        return datetime.fromtimestamp(float(s), tz=timezone.utc)
     except Exception:
         pass
+    for fmt in ("%Y-%m-%d", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(s, fmt).replace(tzinfo=timezone.utc)
+        except Exception:
+            continue
     return None
 
-async def _call_repo(fn, *args, **kwargs):
-    try:
-        sig = inspect.signature(fn)
-        fkwargs = {k: v for k, v in kwargs.items() if k in sig.parameters}
-    except Exception:
-        fkwargs = kwargs
-    if inspect.iscoroutinefunction(fn):
-        return await fn(*args, **fkwargs)
-    return fn(*args, **fkwargs)
-
 # Basit admin guard: local/dev için X-Debug-Admin: 1
 async def require_admin(request: Request):
     if request.headers.get("X-Debug-Admin") == "1":
         return True
     raise HTTPException(status_code=403, detail="admin only")
 
+# Uç başına sorgular: tekil uçlar ve /overview aynı cache anahtarlarını paylaşır
+
+async def _daily_items(session: AsyncSession, days: int):
+    rows = await daily_counts(session, days=days)
+    return [{"key": r.day, "cnt": r.cnt} for r in rows]
+
+async def _reason_items(session: AsyncSession, limit: int):
+    rows = await top_reason_counts(session, limit=limit)
+    return [{"key": r.reason, "cnt": r.cnt} for r in rows]
+
+async def _path_items(session: AsyncSession, limit: int):
+    rows = await repo_top_paths(session, limit=limit)
+    return [{"key": r.path, "cnt": r.cnt} for r in rows]
+
+@router.get("/daily", response_model=List[KeyCount])
+async def stats_daily(days: int = Query(7, ge=1, le=90), session: AsyncSession = Depends(get_read_session)):
+    return await get_query_cache().get_or_compute(
+        "stats.daily", {"days": days}, STATS_TTL, lambda: _daily_items(session, days)
+    )
+
+@router.get("/reasons", response_model=List[KeyCount])
+async def stats_reasons(limit: int = Query(10, ge=1, le=100), session: AsyncSession = Depends(get_read_session)):
+    return await get_query_cache().get_or_compute(
+        "stats.reasons", {"limit": limit}, STATS_TTL, lambda: _reason_items(session, limit)
+    )
+
+@router.get("/paths", response_model=List[KeyCount])
+async def stats_paths(limit: int = Query(10, ge=1, le=100), session: AsyncSession = Depends(get_read_session)):
+    return await get_query_cache().get_or_compute(
+        "stats.paths", {"limit": limit}, STATS_TTL, lambda: _path_items(session, limit)
+    )
+
+@router.get("/severities", response_model=List[KeyCount])
+async def stats_severities(session: AsyncSession = Depends(get_read_session)):
+    async def _q():
+        rows = await severity_counts(session)
+        return [{"key": r.severity, "cnt": r.cnt} for r in rows]
+    return await get_query_cache().get_or_compute("stats.severities", {}, STATS_TTL, _q)
+
 @router.get("/daily_summary")
-async def get_daily_summary(session: AsyncSession = Depends(get_session)):
-    return await daily_summary(session)
+async def get_daily_summary(session: AsyncSession = Depends(get_read_session)):
+    return await get_query_cache().get_or_compute(
+        "stats.daily_summary", {}, STATS_TTL, lambda: daily_summary(session)
+    )
+
+class Overview(BaseModel):
+    daily: Optional[List[KeyCount]] = None
+    reasons: Optional[List[KeyCount]] = None
+    paths: Optional[List[KeyCount]] = None
+    daily_summary: Optional[Any] = Field(None, description="reason -> son 24 saat sayımı")
+    banlist: Optional[List[Dict[str, Any]]] = None
+    alerts: Optional[List[Any]] = None
+    degraded: Dict[str, str] = Field(default_factory=dict, description="süresi dolan/hata veren bölümler (değerleri null)")
+
+@router.get("/overview", response_model=Overview)
+async def stats_overview(
+    request: Request,
+    days: int = Query(7, ge=1, le=90),
+    limit: int = Query(10, ge=1, le=100),
+    alerts_limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Dashboard'un tek isteği: /stats/daily, /reasons, /paths, /daily_summary,
+    /_debug/banlist ve /_debug/alerts. DB bölümleri ayrı bağlantılarda eşzamanlı
+    çalışır; STATS_OVERVIEW_SECTION_TIMEOUT_SEC içinde bitmeyen ya da hata veren
+    bölüm null döner ve degraded'da listelenir, sayfanın geri kalanı beklemez.
+    """
+    cache = get_query_cache()
+
+    async def _db(fn, *args):
+        # AsyncSession tek bağlantıda eşzamanlı sorgu çalıştıramaz: bölüm başına session
+        async with read_session() as s:
+            return await fn(s, *args)
+
+    sections = {
+        "daily": lambda: cache.get_or_compute(
+            "stats.daily", {"days": days}, STATS_TTL, lambda: _db(_daily_items, days)),
+        "reasons": lambda: cache.get_or_compute(
+            "stats.reasons", {"limit": limit}, STATS_TTL, lambda: _db(_reason_items, limit)),
+        "paths": lambda: cache.get_or_compute(
+            "stats.paths", {"limit": limit}, STATS_TTL, lambda: _db(_path_items, limit)),
+        "daily_summary": lambda: cache.get_or_compute(
+            "stats.daily_summary", {}, STATS_TTL, lambda: _db(daily_summary)),
+        "banlist": banlist,
+        "alerts": lambda: list_recent_alerts(request, limit=alerts_limit),
+    }
+    degraded: Dict[str, str] = {}
+
+    async def _run(name, fn):
+        try:
+            return await asyncio.wait_for(fn(), timeout=OVERVIEW_SECTION_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            degraded[name] = "timeout"
+        except Exception as e:
+            degraded[name] = f"error: {type(e).__name__}"
+        STATS_OVERVIEW_DEGRADED.labels(section=name, reason=degraded[name].split(":")[0]).inc()
+        return None
 
-@router.post("/purge")
-async def purge_retention(days: int = Query(default=None, ge=1, le=365), session: AsyncSession = Depends(get_session)):
-    d = days if days is not None else _settings.RETENTION_DAYS
-    await retention_purge(session, d)
-    return {"ok": True, "purged_older_than_days": d}
+    values = dict(zip(sections, await asyncio.gather(*(_run(n, fn) for n, fn in sections.items()))))
+    summary = values.pop("daily_summary")
+    out = Overview(**values, degraded=degraded).model_dump(mode="json")
+    # reason=NULL anahtarı: /stats/daily_summary ile aynı ("null") kodlama
+    out["daily_summary"] = jsonable_encoder(summary)
+    return JSONResponse(out)
+
+@router.post("/purge", status_code=202)
+async def purge_retention(
+    request: Request,
+    background: BackgroundTasks,
+    days: int = Query(default=None, ge=1, le=365),
+):
+    """
+    Retention'ı arka planda zamanlanmış işle aynı sarmalayıcıyla (bakım lideri + DB kesicisi)
+    başlatır ve hemen 202 döner; toplu silme hız bütçesiyle dakikalar sürebilir.
+    days yoksa kademeli politika uygulanır; yanıt politikayı ve ufkunu bildirir.
+    """
+    policy = current_policy(days)
+    background.add_task(request.app.state.retention_job, days=days)
+    return {
+        "ok": True,
+        "scheduled": True,
+        "purged_older_than_days": policy.horizon_days(),
+        "policy": policy.describe(),
+    }
 
 
 # --- Admin endpoints ---
 
 @router_admin.get("/top-reasons", dependencies=[Depends(require_admin)])
-async def top_reasons(limit: int = 10, since: Optional[str] = None, until: Optional[str] = None, db=Depends(get_db)):
-    if repo is None or get_db is None:
-        raise HTTPException(status_code=500, detail="Repository/DB not wired")
+async def top_reasons(limit: int = 10, since: Optional[str] = None, until: Optional[str] = None, db: AsyncSession = Depends(get_read_session)):
+    start, end, n = _parse_ts(since), _parse_ts(until), max(1, min(int(limit), 1000))
+
+    async def _q():
+        rows = await top_reason_counts(db, limit=n, start_ts=start, end_ts=end)
+        return {"items": [{"key": r.reason, "cnt": r.cnt} for r in rows]}
     try:
-        fn = getattr(repo, "top_reason_counts", None) or getattr(repo, "top_reasons", None)
-        if not fn:
-            raise RuntimeError("top_reason_counts/top_reasons not found in repository")
-        rows = await _call_repo(
-            fn,
-            db,
-            limit=max(1, min(int(limit), 1000)),
-            since=_parse_ts(since),
-            until=_parse_ts(until),
-            start_ts=_parse_ts(since),
-            end_ts=_parse_ts(until),
+        return await get_query_cache().get_or_compute(
+            "admin.top_reasons", {"limit": n, "since": start, "until": end}, STATS_TTL, _q,
+            start=start, end=end,
         )
-        return {"items": rows}
     except Exception as e:  # pragma: no cover
         raise HTTPException(status_code=500, detail=f"top_reasons failed: {e}")
 
 
 @router_admin.get("/top-paths", dependencies=[Depends(require_admin)])
-async def top_paths(limit: int = 10, since: Optional[str] = None, until: Optional[str] = None, db=Depends(get_db)):
-    if repo is None or get_db is None:
-        raise HTTPException(status_code=500, detail="Repository/DB not wired")
+async def top_paths(limit: int = 10, since: Optional[str] = None, until: Optional[str] = None, db: AsyncSession = Depends(get_read_session)):
+    start, end, n = _parse_ts(since), _parse_ts(until), max(1, min(int(limit), 1000))
+
+    async def _q():
+        rows = await repo_top_paths(db, limit=n, start_ts=start, end_ts=end)
+        return {"items": [{"key": r.path, "cnt": r.cnt} for r in rows]}
     try:
-        fn = getattr(repo, "top_paths", None) or getattr(repo, "top_path_counts", None)
-        if not fn:
-            raise RuntimeError("top_paths/top_path_counts not found in repository")
-        rows = await _call_repo(
-            fn,
-            db,
-            limit=max(1, min(int(limit), 1000)),
-            since=_parse_ts(since),
-            until=_parse_ts(until),
-            start_ts=_parse_ts(since),
-            end_ts=_parse_ts(until),
+        return await get_query_cache().get_or_compute(
+            "admin.top_paths", {"limit": n, "since": start, "until": end}, STATS_TTL, _q,
+            start=start, end=end,
         )
-        return {"items": rows}
     except Exception as e:  # pragma: no cover
-        raise HTTPException(status_code=500, detail=f"top_paths failed: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"top_paths failed: {e}")
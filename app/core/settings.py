@@ -7,6 +7,19 @@ class Settings(BaseSettings):
     PORT: int = 8000
 
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_CONNECT_TIMEOUT: float = 3.0
+
+    # Okuma replikası (boş = kapalı): arama/export/stats uçları
+    DATABASE_READ_URL: str = ""
+    DB_READ_POOL_SIZE: int = 5
+    DB_READ_MAX_OVERFLOW: int = 10
+    DB_READ_MAX_LAG_SEC: float = 5.0
+    DB_READ_LAG_CHECK_SEC: float = 2.0
 
     IP_SALT: str = "change_me"
 
@@ -0,0 +1,124 @@
+# app/db/backends.py
+"""
+Depolama backend'leri: PostgreSQL (asyncpg, varsayılan/ölçeklenen) ve gömülü SQLite
+(aiosqlite, tek düğüm sensörler ve CI).
+
+SQLite'ta:
+  - Bağlantı başına PRAGMA'lar: WAL (okuyucular yazarı beklemez), synchronous=NORMAL
+    (WAL'da commit başına fsync yok, checkpoint'te var), busy_timeout (tek yazar kilidi).
+  - Şema alembic yerine metadata'dan kurulur (migration'lar PG SQL'i); sözlük
+    tablolarının value unique index'leri ve events_v görünümü burada eklenir.
+  - Rollup tabloları ve günlük bölümler PG özelliğidir; stats ham tablodan hesaplanır.
+
+Backend'e özgü SQL yazan kod dialect'i session'dan sorar (backend_name).
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "65536"))
+
+
+def is_sqlite_url(url: str) -> bool:
+    return url.startswith("sqlite+aiosqlite:")
+
+
+def is_postgres_url(url: str) -> bool:
+    return url.startswith("postgresql+asyncpg:")
+
+
+def backend_name(session: AsyncSession) -> str:
+    """'postgresql' ya da 'sqlite'."""
+    return session.get_bind().dialect.name
+
+
+def bind_key(session: AsyncSession) -> Any:
+    """Process içi cache'leri engine başına ayırmak için anahtar (sync Engine)."""
+    return session.get_bind()
+
+
+async def set_statement_timeout(session: AsyncSession, ms: int) -> None:
+    """Bu transaction'daki sorgular için sunucu tarafı zaman aşımı (PG; SQLite'ta yok)."""
+    if backend_name(session) == "postgresql":
+        await session.execute(text(f"SET LOCAL statement_timeout = {int(ms)}"))
+
+
+# --- SQLite kurulum -------------------------------------------------------------
+
+def sqlite_engine_options() -> Dict[str, Any]:
+    # aiosqlite bağlantısı kendi thread'inde çalışır; check_same_thread gereksiz
+    return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+
+
+def install_sqlite_pragmas(engine: AsyncEngine) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+            cur.execute("PRAGMA temp_store=MEMORY")
+        finally:
+            cur.close()
+
+
+_SQLITE_EXTRA_DDL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_event_reasons_value ON event_reasons (value)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_event_paths_value ON event_paths (value)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_event_uas_value ON event_uas (value)",
+    """
+    CREATE VIEW IF NOT EXISTS events_v AS
+    SELECT e.id, e.ts, printf('%016x', e.ip_hash) AS ip_hash,
+           u.value AS ua, p.value AS path, r.value AS reason,
+           e.score, e.severity, e.meta
+    FROM events e
+    LEFT JOIN event_uas u ON u.id = e.ua_id
+    LEFT JOIN event_paths p ON p.id = e.path_id
+    LEFT JOIN event_reasons r ON r.id = e.reason_id
+    """,
+)
+
+
+async def init_sqlite_schema(engine: AsyncEngine) -> None:
+    """Tabloları (yoksa) oluştur; idempotent, her açılışta çağrılabilir."""
+    from app.db.models import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        for ddl in _SQLITE_EXTRA_DDL:
+            await conn.execute(text(ddl))
+
+
+# --- Taşınabilir SQL parçaları ----------------------------------------------------
+
+class day_trunc(FunctionElement):
+    """Zaman damgasını gün başına yuvarlar (PG date_trunc, SQLite strftime)."""
+    inherit_cache = True
+
+    def __init__(self, expr):
+        from app.db.models import UTCDateTime
+
+        super().__init__(expr)
+        self.type = UTCDateTime()
+
+
+@compiles(day_trunc)
+def _day_trunc_pg(element, compiler, **kw):
+    # 'day' bind parametre olursa GROUP BY ifadesi SELECT ile eşleşmez; literal kullan
+    return "date_trunc('day', %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_trunc, "sqlite")
+def _day_trunc_sqlite(element, compiler, **kw):
+    # saklama biçimiyle aynı ('YYYY-MM-DD HH:MM:SS.ffffff', UTC)
+    return "strftime('%%Y-%%m-%%d 00:00:00.000000', %s)" % compiler.process(element.clauses, **kw)
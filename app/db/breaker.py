@@ -0,0 +1,164 @@
+# app/db/breaker.py
+"""
+API uçları dışındaki DB kullanımı (event writer flush'ı, zamanlanmış işler) için
+devre kesici.
+
+DB yavaş/erişilemezken her çağrı connect/pool/sorgu zaman aşımlarını beklerse DB
+olayı tüm API'nin gecikme olayına döner. Kesici ardışık DB hatalarını sayar:
+
+  closed    -> normal; DB_BREAKER_FAILURES ardışık hata -> open
+  open      -> çağrılar DB'ye gitmeden BreakerOpen ile düşer (DB_BREAKER_RESET_SEC)
+  half_open -> tek deneme (probe) geçer; başarı -> closed, hata -> tekrar open
+
+Yalnızca bağlantı/zaman aşımı türü hatalar sayılır; IntegrityError/DataError gibi
+veri hataları DB'nin ayakta olduğunu gösterir ve başarı sayılır.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy import exc as sa_exc
+
+from app.metrics import DB_BREAKER_REJECTED, DB_BREAKER_STATE, DB_BREAKER_TRANSITIONS
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class BreakerOpen(RuntimeError):
+    """Kesici açık: DB çağrısı yapılmadı."""
+
+
+# Veri/sorgu hatası SQLSTATE sınıfları: 22 veri, 23 bütünlük, 42 sözdizimi/erişim,
+# 54 program sınırı. asyncpg bunları çoğu zaman genel DBAPIError olarak sarar.
+_DATA_SQLSTATE_CLASSES = ("22", "23", "42", "54")
+
+
+def _sqlstate(e: BaseException) -> Optional[str]:
+    orig = getattr(e, "orig", None)
+    for cand in (orig, getattr(orig, "__cause__", None)):
+        code = getattr(cand, "sqlstate", None) or getattr(cand, "pgcode", None)
+        if isinstance(code, str):
+            return code
+    return None
+
+
+def is_db_failure(e: BaseException) -> bool:
+    """Kesiciyi besleyen hata mı (bağlantı, havuz, zaman aşımı)?"""
+    if isinstance(e, (sa_exc.IntegrityError, sa_exc.DataError, sa_exc.ProgrammingError)):
+        return False
+    code = _sqlstate(e)
+    if code is not None and code[:2] in _DATA_SQLSTATE_CLASSES:
+        return False
+    return isinstance(e, (sa_exc.DBAPIError, sa_exc.TimeoutError, asyncio.TimeoutError, TimeoutError, OSError))
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_after_sec: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_after = max(0.0, float(reset_after_sec))
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._listeners: List[Callable[[str, str, str], None]] = []
+        DB_BREAKER_STATE.labels(name=name).set(0)
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_after:
+            return HALF_OPEN
+        return self._state
+
+    def add_listener(self, fn: Callable[[str, str, str], None]) -> None:
+        """fn(name, eski_durum, yeni_durum); geçişlerde senkron çağrılır."""
+        self._listeners.append(fn)
+
+    def _set(self, new: str) -> None:
+        old, self._state = self._state, new
+        if old == new:
+            return
+        if new == OPEN:
+            self._opened_at = self._clock()
+        DB_BREAKER_STATE.labels(name=self.name).set(_STATE_VALUE[new])
+        DB_BREAKER_TRANSITIONS.labels(name=self.name, to=new).inc()
+        for fn in list(self._listeners):
+            try:
+                fn(self.name, old, new)
+            except Exception:
+                pass
+
+    def allow(self) -> bool:
+        """Çağrı geçebilir mi? half_open'da aynı anda tek probe."""
+        st = self.state
+        if st == CLOSED:
+            return True
+        if st == HALF_OPEN and not self._probing:
+            self._set(HALF_OPEN)
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        self._set(CLOSED)
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._set(OPEN)
+
+    @asynccontextmanager
+    async def guard(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        async with breaker.guard(timeout=2.0): ...  — açıkken BreakerOpen; timeout verilirse
+        blok (havuz beklemesi dahil) bu sürede bitmezse TimeoutError ve hata sayılır.
+        """
+        if not self.allow():
+            DB_BREAKER_REJECTED.labels(name=self.name).inc()
+            raise BreakerOpen(f"db circuit '{self.name}' is open")
+        try:
+            if timeout:
+                async with asyncio.timeout(timeout):
+                    yield
+            else:
+                yield
+        except Exception as e:
+            if is_db_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # iptal: sonuç bilinmiyor, probe hakkını bırak
+            self._probing = False
+            raise
+        self.record_success()
+
+
+_BREAKER: Optional[CircuitBreaker] = None
+
+
+def get_db_breaker() -> CircuitBreaker:
+    global _BREAKER
+    if _BREAKER is None:
+        _BREAKER = CircuitBreaker(
+            "primary",
+            failure_threshold=int(os.getenv("DB_BREAKER_FAILURES", "5")),
+            reset_after_sec=float(os.getenv("DB_BREAKER_RESET_SEC", "10")),
+        )
+    return _BREAKER
@@ -0,0 +1,101 @@
+# app/db/leader.py
+"""
+Zamanlanmış bakım işleri (retention, bölüm yönetimi, rollup) için lider seçimi.
+
+Her worker process kendi APScheduler'ını başlatır; N worker x M düğümde 03:30
+retention'ı N*M kez aynı satırlar üzerinde çalışırdı. Lider, ayrılmış bir
+bağlantıda oturum düzeyi pg_try_advisory_lock(MAINTENANCE_LOCK_ID) tutan process'tir;
+yalnızca o bakım işlerini çalıştırır, diğerleri atlar.
+
+- Kilit bağlantıya bağlıdır: lider process ölür ya da bağlantısı koparsa sunucu
+  kilidi bırakır, sıradaki işte başka bir process lider olur.
+- Her işten önce bağlantı yoklanır (SELECT 1); kopmuşsa liderlik bırakılır.
+- SQLite tek düğümdür: kilit yok, process her zaman lider sayılır.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.metrics import MAINTENANCE_LEADER
+
+
+def lock_id(name: str) -> int:
+    """İsimden kararlı, işaretli 32 bit advisory lock anahtarı."""
+    n = zlib.crc32(name.encode())
+    return n - (1 << 32) if n >= (1 << 31) else n
+
+
+class AdvisoryLeader:
+    def __init__(self, engine: AsyncEngine, key: int):
+        self.engine = engine
+        self.key = int(key)
+        self._conn: Optional[AsyncConnection] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None or self.engine.dialect.name != "postgresql"
+
+    async def acquire(self) -> bool:
+        """Lider miyiz? Değilsek kilidi bir kez dener (bloklamaz)."""
+        if self.engine.dialect.name != "postgresql":
+            MAINTENANCE_LEADER.set(1)
+            return True
+        if self._conn is not None:
+            try:
+                await self._conn.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                await self._drop()
+        conn = await self.engine.connect()
+        try:
+            # AUTOCOMMIT: bağlantı açık transaction'da beklemesin (idle in transaction)
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            got = (await conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": self.key})).scalar()
+        except BaseException:
+            await conn.close()
+            raise
+        if not got:
+            await conn.close()
+            MAINTENANCE_LEADER.set(0)
+            return False
+        self._conn = conn
+        MAINTENANCE_LEADER.set(1)
+        return True
+
+    async def release(self) -> None:
+        """Kapanışta liderliği bırak (sıradaki process beklemeden devralsın)."""
+        if self._conn is None:
+            return
+        try:
+            await self._conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+        except Exception:
+            pass
+        await self._drop()
+
+    async def _drop(self) -> None:
+        conn, self._conn = self._conn, None
+        MAINTENANCE_LEADER.set(0)
+        if conn is not None:
+            try:
+                # havuza dönmesin: kilit (unlock başarısızsa) fiziksel bağlantıyla gitsin
+                await conn.invalidate()
+                await conn.close()
+            except Exception:
+                pass
+
+
+_LEADER: Optional[AdvisoryLeader] = None
+
+
+def get_maintenance_leader() -> AdvisoryLeader:
+    global _LEADER
+    if _LEADER is None:
+        from app.db.session import engine
+        key = os.getenv("MAINTENANCE_LOCK_ID")
+        _LEADER = AdvisoryLeader(engine, int(key) if key else lock_id("secmon:maintenance"))
+    return _LEADER
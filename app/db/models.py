@@ -1,23 +1,143 @@
 # app/db/models.py
-from datetime import datetime
+"""
+Tek Event modeli. app.persistence.models geri-uyumluluk için buradan re-export eder.
+
+PostgreSQL şeması migrations/'dadır; bu modeller ORM eşlemesi ve SQLite'ta
+(init_sqlite_schema/create_all) şema kurulumu içindir. Bilinen farklar:
+  - events: migration bölümlü tabloda PRIMARY KEY (id, ts) kurar (bölüm anahtarı PK'da
+    olmak zorunda); modelde PK yalnızca id'dir, çünkü SQLite yalnızca tek kolonlu
+    INTEGER PRIMARY KEY'i otomatik artırır. id her iki backend'de de tekildir.
+  - events_hourly_reason/path: PG'de PK yerine (hour, md5(değer)) tekil index'i vardır.
+
+Saatlik rollup tabloları stats uçlarını besler (bkz. app.services.rollups).
+"""
+from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 
-from sqlalchemy import BigInteger, Integer, String, Text, DateTime, Float
+from sqlalchemy import JSON, BigInteger, Integer, String, Text, DateTime, Float, Index, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+# --- Backend'ler arası tipler (bkz. app.db.backends) ---
+# SQLite'ta yalnızca INTEGER PRIMARY KEY rowid'e bağlanır (otomatik artan)
+_PK_BIG = BigInteger().with_variant(Integer(), "sqlite")
+_JSON = JSON().with_variant(JSONB(), "postgresql")
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    timestamptz. SQLite saat dilimi saklamaz: UTC'ye çevrilip naive yazılır, okurken
+    UTC olarak işaretlenir (metin karşılaştırması zaman sırasıyla aynı kalır).
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == "sqlite" and isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and dialect.name == "sqlite" and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
 
 class Base(DeclarativeBase):
     pass
 
 class Event(Base):
+    """
+    Kompakt satır: ua/path/reason lookup tablolarına id ile bağlanır, ip_hash 16 hex
+    hanenin işaretli bigint hali. Okuma/yazma app.repositories.lookups üzerinden
+    şeffaf çevrilir; elle SQL için events_v görünümü eski kolonları sunar.
+    """
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_ts", "ts"),
+        Index("ix_events_ip_ts", "ip_hash", "ts"),
+        Index("ix_events_reason_ts", "reason_id", "ts"),
+        Index("ix_events_path_ts", "path_id", "ts"),
+        Index("ix_events_ua_ts", "ua_id", "ts"),
+    )
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default="now()", index=True)
-    ip_hash: Mapped[str] = mapped_column(String(64), index=False)
-    ua: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    path: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
-    reason: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # PG'de PK (id, ts) (bölümleme); bkz. modül docstring'i
+    id: Mapped[int] = mapped_column(_PK_BIG, primary_key=True, autoincrement=True)
+    ts: Mapped[datetime] = mapped_column(UTCDateTime(), server_default=func.now())
+    ip_hash: Mapped[int] = mapped_column(BigInteger, index=False)
     score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     severity: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    meta: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB, nullable=True)
\ No newline at end of file
+    meta: Mapped[Optional[Dict[str, Any]]] = mapped_column(_JSON, nullable=True)
+    reason_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    path_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    ua_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+
+# --- Lookup (sözlük) tabloları ---
+# value üzerinde md5(value) unique index var (uzun UA'lar btree sınırını aşmasın);
+# SQLite'ta düz value unique index'i (app.db.backends). Desen araması için PG'de
+# value text_pattern_ops (prefix) ve pg_trgm varsa GIN trigram (contains/ILIKE) index'leri.
+
+class EventReason(Base):
+    __tablename__ = "event_reasons"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    value: Mapped[str] = mapped_column(Text)
+
+class EventPath(Base):
+    __tablename__ = "event_paths"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    value: Mapped[str] = mapped_column(Text)
+
+class EventUA(Base):
+    __tablename__ = "event_uas"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    value: Mapped[str] = mapped_column(Text)
+
+
+# --- Saatlik rollup'lar ---
+# NULL anahtarlar PK'ya giremediği için sentinel ile saklanır: reason/path '' , severity -1
+# PG'de reason/path anahtarı (hour, md5(değer)) tekil index'iyle korunur (değerler sınırsız text)
+
+class ReasonHourly(Base):
+    __tablename__ = "events_hourly_reason"
+
+    hour: Mapped[datetime] = mapped_column(UTCDateTime(), primary_key=True)
+    reason: Mapped[str] = mapped_column(Text, primary_key=True)
+    cnt: Mapped[int] = mapped_column(BigInteger)
+
+class PathHourly(Base):
+    __tablename__ = "events_hourly_path"
+
+    hour: Mapped[datetime] = mapped_column(UTCDateTime(), primary_key=True)
+    path: Mapped[str] = mapped_column(Text, primary_key=True)
+    cnt: Mapped[int] = mapped_column(BigInteger)
+
+class SeverityHourly(Base):
+    __tablename__ = "events_hourly_severity"
+
+    hour: Mapped[datetime] = mapped_column(UTCDateTime(), primary_key=True)
+    severity: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cnt: Mapped[int] = mapped_column(BigInteger)
+
+class RollupState(Base):
+    """watermark: bu saatten önceki saatler rollup'larda tamdır."""
+    __tablename__ = "rollup_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    watermark: Mapped[Optional[datetime]] = mapped_column(UTCDateTime(), nullable=True)
+
+
+class EventBatch(Base):
+    """
+    Writer batch'lerinin tekrarsızlık defteri: batch event'leriyle aynı transaction'da
+    yazılır; spool replay'i defterde bulunan anahtarı atlar (bkz. app.services.spool).
+    """
+    __tablename__ = "event_batches"
+
+    key: Mapped[str] = mapped_column(String(32), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime(), server_default=func.now(), index=True)
@@ -0,0 +1,101 @@
+# app/db/replica.py
+"""
+Salt-okunur uçlar (arama, dışa aktarım, stats) için okuma replikası yönlendirmesi.
+
+DATABASE_READ_URL ayarlıysa ağır analist sorguları ayrı bir engine/havuzda çalışır;
+ingest ve karantina yazımları birincil havuzu bu yükle paylaşmaz. Replika en fazla
+DB_READ_MAX_LAG_SEC gerideyse kullanılır; gecikme DB_READ_LAG_CHECK_SEC'te bir
+ölçülür. Replika gerideyse, erişilemiyorsa ya da bir sorgu bağlantı hatası verirse
+okumalar bir sonraki kontrole kadar birincile düşer.
+
+Not: replika asenkron kopyadır; az önce yazılan event'ler gecikme kadar geç görünür.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.metrics import DB_READ_ROUTE, DB_REPLICA_LAG
+
+# Birincilde (pg_is_in_recovery() = false) ve tüm WAL'ı uygulamış replikada 0;
+# yoksa son uygulanan transaction'ın yaşı (boştaki birincil replay zamanını ilerletmez)
+_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+async def replica_lag(session: AsyncSession) -> float:
+    """Replikanın birincilden gerisi (sn)."""
+    return float((await session.execute(_LAG_SQL)).scalar() or 0.0)
+
+
+class ReadRouter:
+    """Okuma session fabrikası seçer: sağlıklı replika ya da birincil."""
+
+    def __init__(
+        self,
+        primary_factory,
+        replica_factory=None,
+        *,
+        max_lag_sec: float = 5.0,
+        check_interval_sec: float = 2.0,
+        check_timeout_sec: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.primary = primary_factory
+        self.replica = replica_factory
+        self.max_lag = float(max_lag_sec)
+        self.check_interval = max(0.0, float(check_interval_sec))
+        self.check_timeout = float(check_timeout_sec) if check_timeout_sec and check_timeout_sec > 0 else None
+        self._clock = clock
+        self._healthy = False
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica is not None
+
+    @property
+    def healthy(self) -> bool:
+        return self._healthy
+
+    def mark_down(self) -> None:
+        """Replika sorgusu bağlantı hatası verdi: sonraki kontrole kadar birincil."""
+        self._healthy = False
+        self._checked_at = self._clock()
+
+    async def check(self) -> None:
+        try:
+            async with asyncio.timeout(self.check_timeout), self.replica() as s:
+                lag = await replica_lag(s)
+        except Exception:
+            self._healthy = False
+            DB_REPLICA_LAG.set(-1)
+        else:
+            self._healthy = lag <= self.max_lag
+            DB_REPLICA_LAG.set(lag)
+        self._checked_at = self._clock()
+
+    def _due(self) -> bool:
+        return self._checked_at is None or self._clock() - self._checked_at >= self.check_interval
+
+    async def factory(self):
+        if self.replica is None:
+            return self.primary
+        if self._due():
+            async with self._lock:
+                # aynı anda gelen istekler tek kontrol yapsın
+                if self._due():
+                    await self.check()
+        if self._healthy:
+            DB_READ_ROUTE.labels(target="replica").inc()
+            return self.replica
+        DB_READ_ROUTE.labels(target="primary").inc()
+        return self.primary
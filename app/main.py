@@ -1,6 +1,10 @@
 from dotenv import load_dotenv
 load_dotenv()  # .env'yi import zincirinden önce yükle
+import asyncio
+import functools
 import os
+import time
+from datetime import datetime, timezone
 
 
 # app/main.py
@@ -11,13 +15,26 @@ from app.security.middleware_monitor import MonitorMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from app.api.routes_events import router as events_router
-from app.db.session import get_session, SessionLocal
+from app.db.session import dispose_engines, get_session, init_schema, SessionLocal
 from app.services.retention import run_retention
+from app.services.partitions import ensure_partitions
+from app.services.rollups import refresh_rollups
+from app.services.query_cache import get_query_cache
+from app.services.event_writer import get_event_writer
+from app.services.spool import get_spool_replayer
+from app.db.breaker import BreakerOpen, get_db_breaker
+from app.db.leader import get_maintenance_leader
+from app.anomaly.batch import get_batch_scorer
 
 from app.api.routes_debug import router as debug_router
 from app.api.routes_metrics import router as metrics_router
-from app.metrics import get_metrics
-from app.alerts import AlertManager
+from app.metrics import (
+    MAINTENANCE_JOB_AFFECTED,
+    MAINTENANCE_JOB_RUNS,
+    MAINTENANCE_JOB_SECONDS,
+    get_metrics,
+)
+from app.alerts import AlertManager, make_payload
 
 
 # --- Ana app
@@ -59,6 +76,18 @@ try:
 except Exception:
     pass
 
+# ---- DB devre kesicisi: açılış/toparlanma alert'i (cooldown flapping'i bastırır)
+def _on_db_breaker_change(name: str, old: str, new: str) -> None:
+    if new == "open" or (new == "closed" and old != "closed"):
+        try:
+            asyncio.get_running_loop().create_task(app.state.alerts.emit(
+                make_payload(f"db_circuit_{new}", "-", name, "db_breaker", {"from": old})
+            ))
+        except RuntimeError:
+            pass
+
+get_db_breaker().add_listener(_on_db_breaker_change)
+
 # 2) Debug config endpoint (istediğin gibi)
 @app.get("/_debug/config")
 def debug_config():
@@ -99,33 +128,144 @@ except Exception:
     pass
 app.include_router(events_router)
 try:
-    from app.api.routes_stats import router_admin as stats_admin_router
+    from app.api.routes_stats import router as stats_router, router_admin as stats_admin_router
+    app.include_router(stats_router)
     app.include_router(stats_admin_router)
 except Exception:
     pass
 
 app.include_router(debug_router)
 
+# Path normalizer route tablosunu bilsin (metrik etiketleri, event path'leri)
+try:
+    from app.observability.paths import get_path_normalizer
+    get_path_normalizer().bind(app.routes)
+except Exception:
+    pass
+
 @app.on_event("startup")
 async def _startup():
+    # SQLite backend'inde şemayı kur (PG'de alembic)
+    await init_schema()
+    # sonradan eklenen route'lar da eşleşsin
+    try:
+        from app.observability.paths import get_path_normalizer
+        get_path_normalizer().bind(app.routes)
+    except Exception:
+        pass
+    # Arka plan event writer (middleware event'leri kuyruktan toplu yazılır)
+    await get_event_writer().start()
+    # DB kesintisinde diske yazılan batch'leri geri yükle
+    try:
+        replayer = get_spool_replayer()
+        if replayer is not None:
+            await replayer.start()
+    except Exception:
+        pass
     # APScheduler
     app.state.scheduler = AsyncIOScheduler()
     # Her gün 03:30'da retention
     app.state.scheduler.add_job(_retention_job, CronTrigger(hour=3, minute=30))
+    # Gelecek günlerin bölümlerini önceden aç (açılışta bir kez + saatlik)
+    app.state.scheduler.add_job(
+        _partition_job, CronTrigger(minute=5), next_run_time=datetime.now(timezone.utc)
+    )
+    # Stats rollup'ları: kapanan saatleri işle (açılışta bir kez + 5 dakikada bir)
+    app.state.scheduler.add_job(
+        _rollup_job, CronTrigger(minute="*/5"), next_run_time=datetime.now(timezone.utc)
+    )
     app.state.scheduler.start()
 
-async def _retention_job():
-    # bağımsız bir session açıp retention çalıştır
+def _db_job(fn):
+    """
+    Zamanlanmış bakım işi: yalnızca lider process'te (Postgres advisory lock, bkz.
+    app.db.leader) ve kesicinin arkasında çalışır; kesici açıksa DB'yi beklemeden atlanır.
+    İş, etkilediği satır/bölüm/saat sayısını döndürür.
+    """
+    job = fn.__name__.strip("_").removesuffix("_job")
+
+    @functools.wraps(fn)
+    async def _run(*args, **kwargs):
+        t0 = time.perf_counter()
+        result = "ok"
+        try:
+            async with get_db_breaker().guard():
+                if not await get_maintenance_leader().acquire():
+                    result = "not_leader"
+                    return
+                MAINTENANCE_JOB_AFFECTED.labels(job=job).inc(await fn(*args, **kwargs) or 0)
+        except BreakerOpen:
+            result = "breaker_open"
+        except Exception:
+            result = "error"
+            raise
+        finally:
+            MAINTENANCE_JOB_RUNS.labels(job=job, result=result).inc()
+            if result in ("ok", "error"):
+                MAINTENANCE_JOB_SECONDS.labels(job=job).observe(time.perf_counter() - t0)
+    return _run
+
+_RETENTION_LOCK = asyncio.Lock()
+
+@_db_job
+async def _retention_job(days=None):
+    # aynı process'te zamanlanmış iş ile POST /stats/purge üst üste binmesin
+    if _RETENTION_LOCK.locked():
+        return 0
+    async with _RETENTION_LOCK:
+        # bağımsız bir session açıp retention çalıştır
+        async with SessionLocal() as session:
+            deleted = await run_retention(session, days=days)
+            await session.commit()
+            get_query_cache().clear()
+            return deleted
+
+# POST /stats/purge aynı sarmalayıcıyla (lider + kesici) arka planda çalıştırır
+app.state.retention_job = _retention_job
+
+@_db_job
+async def _partition_job():
+    async with SessionLocal() as session:
+        created = await ensure_partitions(session, days_ahead=int(os.getenv("PARTITION_DAYS_AHEAD", "7")))
+        await session.commit()
+        return created
+
+@_db_job
+async def _rollup_job():
+    hours = 0
     async with SessionLocal() as session:
-        deleted = await run_retention(session)
+        # backfill parça parça ilerler; her parça ayrı commit
+        while n := await refresh_rollups(session):
+            hours += n
+            await session.commit()
         await session.commit()
-        # print(f"[retention] deleted={deleted}")
+    return hours
 
 @app.on_event("shutdown")
 async def _shutdown():
     sch = getattr(app.state, "scheduler", None)
     if sch:
         sch.shutdown(wait=False)
+    # Liderliği bırak: sıradaki process bir sonraki işte devralır
+    try:
+        await get_maintenance_leader().release()
+    except Exception:
+        pass
+    # z-score batch scorer'ın kova görevini durdur
+    try:
+        scorer = get_batch_scorer()
+        if scorer is not None:
+            await scorer.stop()
+    except Exception:
+        pass
+    # Kuyrukta kalan event'leri yaz
+    await get_event_writer().stop()
+    # spool'u diske indir (kalanlar bir sonraki açılışta yüklenir)
+    replayer = get_spool_replayer()
+    if replayer is not None:
+        await replayer.stop()
+    # Havuzdaki bağlantıları kapat (aiosqlite bağlantı thread'leri süreci açık tutar)
+    await dispose_engines()
 
 # 5) MIDDLEWARE SIRASI (Monitor en son eklenecek -> ilk çalışır)
 # Starlette: En son eklenen middleware ilk çalışır (outermost).
@@ -11,6 +11,41 @@ from .registry import (
     QUARANTINED_IP_COUNT,
     ZSCORE_ANOMALIES,
     REQUEST_LATENCY,
+    EVENTS_ENQUEUED,
+    EVENTS_WRITTEN,
+    EVENTS_DROPPED,
+    EVENT_QUEUE_DEPTH,
+    EVENT_FLUSH_SECONDS,
+    EVENT_BATCH_SIZE,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_IN_USE,
+    DB_POOL_CAPACITY,
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    QUERY_CACHE_HITS,
+    QUERY_CACHE_MISSES,
+    QUERY_CACHE_BYTES,
+    HOT_TAIL_QUERIES,
+    HOT_TAIL_EVENTS,
+    DB_BREAKER_STATE,
+    DB_BREAKER_TRANSITIONS,
+    DB_BREAKER_REJECTED,
+    ZSCORE_BATCH_TICK_SECONDS,
+    ZSCORE_BATCH_CLIENTS,
+    STATS_OVERVIEW_DEGRADED,
+    RETENTION_DELETED,
+    RETENTION_BATCHES,
+    RETENTION_CURSOR_TS,
+    MAINTENANCE_LEADER,
+    MAINTENANCE_JOB_RUNS,
+    MAINTENANCE_JOB_SECONDS,
+    MAINTENANCE_JOB_AFFECTED,
+    DB_READ_ROUTE,
+    DB_REPLICA_LAG,
+    SPOOL_EVENTS,
+    SPOOL_BYTES,
+    SPOOL_OLDEST_AGE,
+    SPOOL_REPLAYED,
+    SPOOL_CORRUPT,
     get_metrics,
 )
 
@@ -21,5 +56,40 @@ __all__ = [
     "QUARANTINED_IP_COUNT",
     "ZSCORE_ANOMALIES",
     "REQUEST_LATENCY",
+    "EVENTS_ENQUEUED",
+    "EVENTS_WRITTEN",
+    "EVENTS_DROPPED",
+    "EVENT_QUEUE_DEPTH",
+    "EVENT_FLUSH_SECONDS",
+    "EVENT_BATCH_SIZE",
+    "DB_POOL_CHECKOUT_WAIT",
+    "DB_POOL_IN_USE",
+    "DB_POOL_CAPACITY",
+    "DB_POOL_CHECKOUT_TIMEOUTS",
+    "QUERY_CACHE_HITS",
+    "QUERY_CACHE_MISSES",
+    "QUERY_CACHE_BYTES",
+    "HOT_TAIL_QUERIES",
+    "HOT_TAIL_EVENTS",
+    "DB_BREAKER_STATE",
+    "DB_BREAKER_TRANSITIONS",
+    "DB_BREAKER_REJECTED",
+    "ZSCORE_BATCH_TICK_SECONDS",
+    "ZSCORE_BATCH_CLIENTS",
+    "STATS_OVERVIEW_DEGRADED",
+    "RETENTION_DELETED",
+    "RETENTION_BATCHES",
+    "RETENTION_CURSOR_TS",
+    "MAINTENANCE_LEADER",
+    "MAINTENANCE_JOB_RUNS",
+    "MAINTENANCE_JOB_SECONDS",
+    "MAINTENANCE_JOB_AFFECTED",
+    "DB_READ_ROUTE",
+    "DB_REPLICA_LAG",
+    "SPOOL_EVENTS",
+    "SPOOL_BYTES",
+    "SPOOL_OLDEST_AGE",
+    "SPOOL_REPLAYED",
+    "SPOOL_CORRUPT",
     "get_metrics",
 ]
\ No newline at end of file
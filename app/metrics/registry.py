@@ -80,6 +80,52 @@ else:
             latency=REQUEST_LATENCY,
         ),
     )
+    _store = getattr(builtins, _KEY)
+
+
+def _metric(key: str, factory):
+    """Reload-safe metrik: singleton store'da varsa onu döndür, yoksa üret ve sakla."""
+    m = _store.get(key)
+    if m is None:
+        m = factory()
+        _store[key] = m
+    return m
+
+
+# --- Event writer (arka plan toplu yazım) ---
+EVENTS_ENQUEUED = _metric("events_enqueued", lambda: Counter(
+    "events_enqueued_total",
+    "Events accepted into the background writer queue",
+    registry=METRICS_REGISTRY,
+))
+EVENTS_WRITTEN = _metric("events_written", lambda: Counter(
+    "events_written_total",
+    "Events persisted by the background writer",
+    registry=METRICS_REGISTRY,
+))
+EVENTS_DROPPED = _metric("events_dropped", lambda: Counter(
+    "events_dropped_total",
+    "Events dropped by the background writer",
+    ["reason"],
+    registry=METRICS_REGISTRY,
+))
+EVENT_QUEUE_DEPTH = _metric("event_queue_depth", lambda: Gauge(
+    "event_writer_queue_depth",
+    "Events waiting in the background writer queue",
+    registry=METRICS_REGISTRY,
+))
+EVENT_FLUSH_SECONDS = _metric("event_flush_seconds", lambda: Histogram(
+    "event_writer_flush_seconds",
+    "Background writer batch flush duration in seconds",
+    registry=METRICS_REGISTRY,
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+EVENT_BATCH_SIZE = _metric("event_batch_size", lambda: Histogram(
+    "event_writer_batch_size",
+    "Rows per background writer flush",
+    registry=METRICS_REGISTRY,
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+))
 
 
 def get_metrics() -> dict[str, object]:
@@ -90,4 +136,196 @@ def get_metrics() -> dict[str, object]:
         "ipcount": QUARANTINED_IP_COUNT,
         "zscore": ZSCORE_ANOMALIES,
         "latency": REQUEST_LATENCY,
-    }
\ No newline at end of file
+    }
+# --- DB bağlantı havuzu ---
+DB_POOL_CHECKOUT_WAIT = _metric("db_pool_checkout_wait", lambda: Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection",
+    ["pool"],
+    registry=METRICS_REGISTRY,
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+))
+DB_POOL_IN_USE = _metric("db_pool_in_use", lambda: Gauge(
+    "db_pool_in_use",
+    "DB connections currently checked out",
+    ["pool"],
+    registry=METRICS_REGISTRY,
+))
+DB_POOL_CAPACITY = _metric("db_pool_capacity", lambda: Gauge(
+    "db_pool_capacity",
+    "Configured pool_size + max_overflow",
+    ["pool"],
+    registry=METRICS_REGISTRY,
+))
+DB_POOL_CHECKOUT_TIMEOUTS = _metric("db_pool_checkout_timeouts", lambda: Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT",
+    ["pool"],
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- Sorgu sonuç cache'i ---
+QUERY_CACHE_HITS = _metric("query_cache_hits", lambda: Counter(
+    "query_cache_hits_total",
+    "Query cache hits (including requests coalesced onto an in-flight query)",
+    ["endpoint"],
+    registry=METRICS_REGISTRY,
+))
+QUERY_CACHE_MISSES = _metric("query_cache_misses", lambda: Counter(
+    "query_cache_misses_total",
+    "Query cache misses that ran the underlying query",
+    ["endpoint"],
+    registry=METRICS_REGISTRY,
+))
+QUERY_CACHE_BYTES = _metric("query_cache_bytes", lambda: Gauge(
+    "query_cache_bytes",
+    "Approximate size of cached query results",
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- Hot tail (son olaylar tamponu) ---
+HOT_TAIL_QUERIES = _metric("hot_tail_queries", lambda: Counter(
+    "hot_tail_queries_total",
+    "Event queries with a since bound, by whether the in-memory tail answered them",
+    ["result"],
+    registry=METRICS_REGISTRY,
+))
+HOT_TAIL_EVENTS = _metric("hot_tail_events", lambda: Gauge(
+    "hot_tail_events",
+    "Events currently held in the in-memory tail",
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- DB devre kesici ---
+DB_BREAKER_STATE = _metric("db_breaker_state", lambda: Gauge(
+    "db_breaker_state",
+    "DB circuit breaker state (0=closed, 1=half_open, 2=open)",
+    ["name"],
+    registry=METRICS_REGISTRY,
+))
+DB_BREAKER_TRANSITIONS = _metric("db_breaker_transitions", lambda: Counter(
+    "db_breaker_transitions_total",
+    "DB circuit breaker state transitions",
+    ["name", "to"],
+    registry=METRICS_REGISTRY,
+))
+DB_BREAKER_REJECTED = _metric("db_breaker_rejected", lambda: Counter(
+    "db_breaker_rejected_total",
+    "DB calls failed fast because the circuit was open",
+    ["name"],
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- Bakım işleri (lider seçimi) ---
+MAINTENANCE_LEADER = _metric("maintenance_leader", lambda: Gauge(
+    "maintenance_leader",
+    "1 if this process holds the maintenance advisory lock (runs scheduled jobs)",
+    registry=METRICS_REGISTRY,
+))
+MAINTENANCE_JOB_RUNS = _metric("maintenance_job_runs", lambda: Counter(
+    "maintenance_job_runs_total",
+    "Scheduled maintenance job runs by result (ok|error|not_leader|breaker_open)",
+    ["job", "result"],
+    registry=METRICS_REGISTRY,
+))
+MAINTENANCE_JOB_SECONDS = _metric("maintenance_job_seconds", lambda: Histogram(
+    "maintenance_job_duration_seconds",
+    "Duration of scheduled maintenance jobs run by the leader",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+    registry=METRICS_REGISTRY,
+))
+MAINTENANCE_JOB_AFFECTED = _metric("maintenance_job_affected", lambda: Counter(
+    "maintenance_job_affected_total",
+    "Work done by maintenance jobs (retention: rows deleted, partition: partitions created, rollup: hours rolled up)",
+    ["job"],
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- Retention ---
+RETENTION_DELETED = _metric("retention_rows_deleted", lambda: Counter(
+    "retention_rows_deleted_total",
+    "Rows removed by retention (method=batch|partition_drop; partition drops are planner estimates)",
+    ["method"],
+    registry=METRICS_REGISTRY,
+))
+RETENTION_BATCHES = _metric("retention_batches", lambda: Counter(
+    "retention_batches_total",
+    "Bounded retention DELETE batches executed",
+    registry=METRICS_REGISTRY,
+))
+RETENTION_CURSOR_TS = _metric("retention_cursor_timestamp", lambda: Gauge(
+    "retention_cursor_timestamp_seconds",
+    "Event timestamp retention has deleted up to in the current/last run (unix seconds)",
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- /stats/overview ---
+STATS_OVERVIEW_DEGRADED = _metric("stats_overview_degraded", lambda: Counter(
+    "stats_overview_degraded_total",
+    "Dashboard overview sections returned empty, by section and reason (timeout|error)",
+    ["section", "reason"],
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- Z-score batch scorer ---
+ZSCORE_BATCH_TICK_SECONDS = _metric("zscore_batch_tick_seconds", lambda: Histogram(
+    "zscore_batch_tick_seconds",
+    "Time to close one z-score bucket for all clients (vectorized pass)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    registry=METRICS_REGISTRY,
+))
+ZSCORE_BATCH_CLIENTS = _metric("zscore_batch_clients", lambda: Gauge(
+    "zscore_batch_clients",
+    "Clients tracked by the batch z-score scorer",
+    registry=METRICS_REGISTRY,
+))
+
+# --- Okuma replikası ---
+DB_READ_ROUTE = _metric("db_read_route", lambda: Counter(
+    "db_read_route_total",
+    "Read-only requests by the database they were routed to (replica|primary)",
+    ["target"],
+    registry=METRICS_REGISTRY,
+))
+DB_REPLICA_LAG = _metric("db_replica_lag_seconds", lambda: Gauge(
+    "db_replica_lag_seconds",
+    "Last measured read replica lag (-1 when the replica is unreachable)",
+    registry=METRICS_REGISTRY,
+))
+
+
+# --- Diskteki event spool'u ---
+SPOOL_EVENTS = _metric("spool_depth_events", lambda: Gauge(
+    "spool_depth_events",
+    "Events waiting in the on-disk spool for replay",
+    registry=METRICS_REGISTRY,
+))
+SPOOL_BYTES = _metric("spool_bytes", lambda: Gauge(
+    "spool_bytes",
+    "Size of the on-disk spool segments in bytes",
+    registry=METRICS_REGISTRY,
+))
+SPOOL_OLDEST_AGE = _metric("spool_oldest_age_seconds", lambda: Gauge(
+    "spool_oldest_age_seconds",
+    "Age of the oldest spooled batch (0 when the spool is empty)",
+    registry=METRICS_REGISTRY,
+))
+SPOOL_REPLAYED = _metric("spool_replayed", lambda: Counter(
+    "spool_replayed_total",
+    "Spooled events replayed into the database, by result (written|duplicate|quarantined)",
+    ["result"],
+    registry=METRICS_REGISTRY,
+))
+SPOOL_CORRUPT = _metric("spool_corrupt_records", lambda: Counter(
+    "spool_corrupt_records_total",
+    "Spool records skipped on replay (torn tail, checksum mismatch, bad payload)",
+    registry=METRICS_REGISTRY,
+))
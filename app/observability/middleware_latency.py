@@ -5,6 +5,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 from app.metrics import REQUEST_LATENCY
+from app.observability.paths import UNMATCHED, get_path_normalizer
 
 EXCLUDE_PREFIXES = ("/metrics",)
 
@@ -20,12 +21,15 @@ class LatencyMiddleware(BaseHTTPMiddleware):
             response: Response = await call_next(request)
         finally:
             duration = time.perf_counter() - start
-            # route şablonu varsa onu kullan, yoksa gerçek path
-            route_tpl = path
+            # route şablonu varsa onu kullan; yoksa (BaseHTTPMiddleware routing'den önce
+            # okur, 404'ler) route tablosundan şablon ya da UNMATCHED: etiket kardinalitesi sınırlı
+            route_tpl = UNMATCHED
             try:
                 r = request.scope.get("route")
                 if r and getattr(r, "path", None):
                     route_tpl = r.path
+                else:
+                    route_tpl = get_path_normalizer().route_label(path)
             except Exception:
                 pass
             status = "0"
@@ -0,0 +1,104 @@
+# app/observability/paths.py
+"""
+İstek path'lerini sınırlı kardinaliteli şablonlara indirger.
+
+Tarayıcı trafiği (/wp-admin/xyz123, rastgele id'ler) ham path'le etiketlenen metriklerde
+sınırsız seri, events.path / top_paths'te işe yaramaz top-N listeleri üretir.
+
+- Önce app'in route tablosu denenir (Starlette sırası, ilk eşleşen): /events/{id} gibi.
+- Eşleşmeyen path segment segment PATH_NORMALIZE_RULES kurallarıyla şablonlanır
+  ("ad=regex;ad=regex", segmentin tamamı eşleşirse {ad} olur).
+- Metrik etiketi için eşleşmeyenler tek bir UNMATCHED kovasına düşer; event/stats
+  path'i şablonlanmış hâliyle tutulur (tarama önekleri top-N'de görünür kalır).
+- Sonuçlar ham path başına LRU'da tutulur (PATH_NORMALIZE_CACHE_SIZE).
+"""
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Pattern, Tuple
+
+UNMATCHED = "__unmatched__"
+
+DEFAULT_RULES = ";".join([
+    "uuid=[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
+    "hash=[0-9a-fA-F]{16,}",
+    "id=[0-9]+",
+    # hem harf hem rakam içeren >= 6 karakterlik parçalar: rastgele anahtar/id
+    "token=(?=[A-Za-z_-]*[0-9])(?=[0-9_-]*[A-Za-z])[A-Za-z0-9_-]{6,}",
+])
+
+
+def parse_rules(spec: Optional[str]) -> Tuple[Tuple[str, Pattern[str]], ...]:
+    """'ad=regex;ad=regex' -> ((ad, derlenmiş regex), ...). Boş/None: varsayılan kurallar."""
+    rules = []
+    for part in (p.strip() for p in (spec or DEFAULT_RULES).split(";")):
+        if not part:
+            continue
+        name, sep, rx = part.partition("=")
+        if not sep or not name.strip() or not rx:
+            raise ValueError(f"invalid path rule: {part!r}")
+        try:
+            rules.append((name.strip(), re.compile(rx)))
+        except re.error as e:
+            raise ValueError(f"invalid path rule regex {part!r}: {e}") from None
+    return tuple(rules)
+
+
+class PathNormalizer:
+    def __init__(self, routes: Iterable = (), rules: Optional[str] = None, cache_size: int = 4096):
+        self.rules = parse_rules(rules)
+        self._routes: Tuple[Tuple[Pattern[str], str], ...] = ()
+        self._resolve_cached = lru_cache(maxsize=max(0, int(cache_size)))(self._resolve)
+        self.bind(routes)
+
+    def bind(self, routes: Iterable) -> None:
+        """Route tablosunu (app.routes) bağla; cache sıfırlanır."""
+        self._routes = tuple(
+            (r.path_regex, r.path_format)
+            for r in routes
+            if getattr(r, "path_regex", None) is not None and getattr(r, "path_format", None)
+        )
+        self._resolve_cached.cache_clear()
+
+    def template(self, path: str) -> str:
+        """Route tablosuna bakmadan yalnızca segment kurallarını uygular."""
+        segs = path.split("/")
+        for i, seg in enumerate(segs):
+            for name, rx in self.rules:
+                if seg and rx.fullmatch(seg):
+                    segs[i] = "{" + name + "}"
+                    break
+        return "/".join(segs)
+
+    def _resolve(self, path: str) -> Tuple[bool, str]:
+        for rx, fmt in self._routes:
+            if rx.match(path):
+                return True, fmt
+        return False, self.template(path)
+
+    def normalize(self, path: Optional[str]) -> str:
+        """events.path / stats / alert'ler için: route şablonu ya da kurallarla şablonlanmış path."""
+        return self._resolve_cached(path or "/")[1]
+
+    def route_label(self, path: Optional[str]) -> str:
+        """Metrik etiketi için: route şablonu ya da UNMATCHED."""
+        matched, tpl = self._resolve_cached(path or "/")
+        return tpl if matched else UNMATCHED
+
+    def cache_info(self):
+        return self._resolve_cached.cache_info()
+
+
+_NORMALIZER: Optional[PathNormalizer] = None
+
+
+def get_path_normalizer() -> PathNormalizer:
+    global _NORMALIZER
+    if _NORMALIZER is None:
+        _NORMALIZER = PathNormalizer(
+            rules=os.getenv("PATH_NORMALIZE_RULES") or None,
+            cache_size=int(os.getenv("PATH_NORMALIZE_CACHE_SIZE", "4096")),
+        )
+    return _NORMALIZER
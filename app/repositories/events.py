@@ -1,11 +1,28 @@
 # app/repositories/events.py
-from datetime import datetime
-from typing import Sequence, Any, Optional
+import base64
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Sequence, Any, Optional, Dict, List
 
-from sqlalchemy import select, func, desc, and_, insert
+from sqlalchemy import (
+    BigInteger, Text, select, func, desc, and_, or_, false, insert, union_all, cast, not_, literal, literal_column, text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Event
+from app.db.backends import backend_name, day_trunc
+from app.db.models import Event, EventPath, EventReason, PathHourly, ReasonHourly, SeverityHourly
+from app.repositories.lookups import (
+    PATHS,
+    REASONS,
+    UAS,
+    EventRow,
+    decode_events,
+    encode_events,
+    encode_ip_hash,
+)
+from app.services.rollups import ceil_hour, floor_hour, get_watermark
 
 async def insert_event(
     session: AsyncSession,
@@ -17,73 +34,503 @@ async def insert_event(
     score: Optional[float],
     severity: Optional[int],
     meta: Optional[dict],
+    ts: Optional[datetime] = None,
 ) -> int:
-    # ts=func.now() kritik: NOT NULL ts için DB tarafında timestamp atar
-    stmt = (
-        insert(Event.__table__)
-        .values(
-            ts=func.now(),
-            ip_hash=ip_hash,
-            ua=ua,
-            path=path,
-            reason=reason,
-            score=score,
-            severity=severity,
-            meta=meta,
-        )
-        .returning(Event.__table__.c.id)
-    )
+    (values,) = await encode_events(session, [dict(
+        ts=ts, ip_hash=ip_hash, ua=ua, path=path, reason=reason, score=score, severity=severity, meta=meta,
+    )])
+    # ts yoksa func.now() kritik: NOT NULL ts için DB tarafında timestamp atar
+    if values["ts"] is None:
+        values["ts"] = func.now()
+    stmt = insert(Event.__table__).values(**values).returning(Event.__table__.c.id)
     res = await session.execute(stmt)
     return res.scalar_one()
 
-async def list_events(
+_INSERT_CHUNK_ROWS = 4000
+
+async def insert_events(session: AsyncSession, rows: Sequence[dict]) -> int:
+    """
+    Çok-satırlı INSERT ile toplu yazım (event writer batch'leri; büyük girdiler parçalanır).
+    Her satır en az ts/ip_hash taşımalı; eksik kolonlar NULL kalır.
+    ua/path/reason lookup id'lerine, ip_hash bigint'e çevrilir.
+    """
+    if not rows:
+        return 0
+    values = await encode_events(session, rows)
+    # bind parametre sınırı (asyncpg 32767, SQLite 32766): 8 kolonla parça başına 4000 satır
+    for i in range(0, len(values), _INSERT_CHUNK_ROWS):
+        await session.execute(insert(Event.__table__).values(values[i:i + _INSERT_CHUNK_ROWS]))
+    return len(values)
+
+async def insert_events_returning(session: AsyncSession, rows: Sequence[dict]) -> List[EventRow]:
+    """insert_events gibi; yazılan satırları (id ve DB'nin ts'i ile) çözülmüş döndürür."""
+    if not rows:
+        return []
+    values = await encode_events(session, rows)
+    t = Event.__table__
+    out = []
+    for i in range(0, len(values), _INSERT_CHUNK_ROWS):
+        res = await session.execute(insert(t).values(values[i:i + _INSERT_CHUNK_ROWS]).returning(*t.c))
+        out.extend(res.all())
+    return await decode_events(session, out)
+
+# Giriş kaydı sırası (çağıranlar için değişmedi) ve COPY'nin yazdığı kolonlar
+_COPY_INPUT = ("ts", "ip_hash", "ua", "path", "reason", "score", "severity", "meta")
+_COPY_COLUMNS = ("ts", "ip_hash", "ua_id", "path_id", "reason_id", "score", "severity", "meta")
+
+async def copy_events(session: AsyncSession, records: Sequence[tuple]) -> int:
+    """
+    Postgres COPY (binary) ile toplu yükleme. records: _COPY_INPUT sırasında tuple'lar;
+    meta JSON string olarak gelmeli (asyncpg jsonb codec'i str bekler).
+    """
+    if not records:
+        return 0
+    if backend_name(session) != "postgresql":
+        # COPY yok: aynı satırlar çok-satırlı INSERT ile (meta JSON string -> dict)
+        rows = [dict(zip(_COPY_INPUT, r)) for r in records]
+        for r in rows:
+            if isinstance(r["meta"], str):
+                r["meta"] = json.loads(r["meta"])
+        return await insert_events(session, rows)
+    encoded = await encode_events(session, [dict(zip(_COPY_INPUT, r)) for r in records])
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        Event.__tablename__,
+        records=[tuple(e[c] for c in _COPY_COLUMNS) for e in encoded],
+        columns=_COPY_COLUMNS,
+    )
+    return len(records)
+
+async def claim_batch_keys(session: AsyncSession, keys: Sequence[str]) -> set:
+    """
+    Batch anahtarlarını event_batches defterine ekler; yalnızca ilk kez görülenleri
+    döndürür. Event'lerle aynı transaction'da çağrılmalı (bkz. app.services.spool).
+    """
+    if not keys:
+        return set()
+    params = {f"k{i}": k for i, k in enumerate(keys)}
+    values = ", ".join(f"(:k{i})" for i in range(len(keys)))
+    res = await session.execute(text(
+        f"INSERT INTO event_batches (key) VALUES {values} ON CONFLICT (key) DO NOTHING RETURNING key"
+    ), params)
+    return set(res.scalars().all())
+
+def encode_cursor(ts: datetime, id_: int) -> str:
+    """(ts, id) -> opak, URL-güvenli sayfa imleci."""
+    raw = json.dumps({"ts": ts.isoformat(), "id": int(id_)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """encode_cursor'ın tersi; bozuk imleçte ValueError."""
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + pad))
+        ts = datetime.fromisoformat(data["ts"])
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return ts, int(data["id"])
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}") from None
+
+TOTAL_MODES = ("exact", "estimate", "none")
+
+# --- meta (JSONB) filtreleri ---
+# meta.<key><op><value>: "=" / "!=" içerme (@>, GIN jsonb_path_ops), "<", "<=", ">", ">="
+# sayısal karşılaştırma (meta_num(meta, 'key'); sıcak anahtarlar için ifade index'i
+# app/scripts/meta_indexes.py ile eklenir). Anahtar SQL'e literal gömülür (index
+# ifadesiyle eşleşsin diye), bu yüzden dar bir kalıpla sınırlıdır.
+_META_KEY_RE = re.compile(r"^[A-Za-z0-9_]{1,64}$")
+_META_EXPR_RE = re.compile(r"^meta\.([^<>=!]+?)\s*(>=|<=|!=|>|<|=)\s*(.*)$", re.S)
+META_OPS = ("=", "!=", "<", "<=", ">", ">=")
+
+def _meta_scalar(raw: str) -> Any:
+    """'5' -> 5, 'true' -> True, '"5"' -> '5', diğerleri düz metin."""
+    try:
+        v = json.loads(raw)
+    except ValueError:
+        return raw
+    return v if not isinstance(v, (dict, list)) else raw
+
+def parse_meta_filter(expr: str) -> tuple:
+    """'meta.z>5' -> ('z', '>', 5.0); geçersizde ValueError."""
+    m = _META_EXPR_RE.match(expr.strip())
+    if not m or not _META_KEY_RE.match(m.group(1)):
+        raise ValueError(f"invalid meta filter: {expr!r} (meta.<key><op><value>, op in {META_OPS})")
+    key, op, raw = m.group(1), m.group(2), m.group(3).strip()
+    if op in ("=", "!="):
+        return key, op, _meta_scalar(raw)
+    try:
+        return key, op, float(raw)
+    except ValueError:
+        raise ValueError(f"meta filter {expr!r}: {op} needs a number") from None
+
+def _meta_conds(session: AsyncSession, meta: Optional[dict], meta_filters: Sequence[tuple]) -> list:
+    pg = backend_name(session) == "postgresql"
+    conds = []
+
+    def contains(obj: dict):
+        if pg:
+            # dict bind yerine JSON metni: _estimate_rows literal_binds ile derleyebilsin
+            return Event.meta.op("@>")(cast(literal(json.dumps(obj), Text), JSONB))
+        parts = []
+        for k, v in obj.items():
+            if isinstance(v, (dict, list)):
+                raise ValueError("nested meta containment requires PostgreSQL")
+            path = f"$.{json.dumps(k)}"
+            if v is None:
+                parts.append(func.json_type(Event.meta, path) == "null")
+            else:
+                parts.append(func.json_extract(Event.meta, path) == (int(v) if isinstance(v, bool) else v))
+        return and_(*parts)
+
+    if meta:
+        if not isinstance(meta, dict):
+            raise ValueError("meta must be a JSON object")
+        conds.append(contains(meta))
+    for key, op, value in meta_filters:
+        if op == "=":
+            conds.append(contains({key: value}))
+        elif op == "!=":
+            # anahtarı olmayan satırlar da eşleşir
+            conds.append(not_(func.coalesce(contains({key: value}), False)))
+        else:
+            if pg:
+                num = func.meta_num(Event.meta, literal_column(f"'{key}'"))
+            else:
+                path = f"$.{key}"
+                num = func.iif(func.json_type(Event.meta, path).in_(("integer", "real")),
+                               func.json_extract(Event.meta, path), None)
+            conds.append({"<": num < value, "<=": num <= value, ">": num > value, ">=": num >= value}[op])
+    return conds
+
+async def _estimate_rows(session: AsyncSession, q) -> int:
+    """
+    Planner istatistiğinden satır tahmini (EXPLAIN); sorguyu çalıştırmaz.
+    SQLite'ta planner tahmini yok: kesin sayım (tek düğüm ölçeğinde ucuz).
+    """
+    if backend_name(session) != "postgresql":
+        return (await session.execute(select(func.count()).select_from(q.subquery()))).scalar_one()
+    conn = await session.connection()
+    sql = q.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def _event_conds(
     session: AsyncSession,
     *,
-    start_ts: Optional[datetime],
-    end_ts: Optional[datetime],
-    reason: Optional[str],
-    path: Optional[str],
-    ip_hash: Optional[str],
-    limit: int = 100,
-    offset: int = 0,
-) -> tuple[int, Sequence[Event]]:
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    reason: Optional[str] = None,
+    path: Optional[str] = None,
+    ip_hash: Optional[str] = None,
+    ua: Optional[str] = None,
+    path_match: str = "exact",
+    ua_match: str = "exact",
+    icase: bool = False,
+    meta: Optional[dict] = None,
+    meta_filters: Sequence[tuple] = (),
+) -> list:
+    """
+    list_events/stream_events'in ortak filtre kurucusu (anahtarlar list_events ile aynı).
+    Filtreler kompakt kolonlara kodlanır; sözlükte olmayan değer hiçbir satırla eşleşmez.
+    path/ua desenleri (prefix/contains/icase) önce küçük sözlük tablosunda çözülür
+    (text_pattern_ops / pg_trgm index'leri), events'e id listesi olarak iner.
+    """
     conds = []
     if start_ts:
         conds.append(Event.ts >= start_ts)
     if end_ts:
         conds.append(Event.ts < end_ts)
     if reason:
-        conds.append(Event.reason == reason)
-    if path:
-        conds.append(Event.path == path)
+        # reason her zaman tam eşleşme (icase yalnızca path/ua için; hot tail ile aynı)
+        id_ = await REASONS.lookup(session, reason)
+        conds.append(false() if id_ is None else Event.reason_id == id_)
+    for value, mode, col, interner in (
+        (path, path_match, Event.path_id, PATHS),
+        (ua, ua_match, Event.ua_id, UAS),
+    ):
+        if not value:
+            continue
+        if mode == "exact" and not icase:
+            id_ = await interner.lookup(session, value)
+            conds.append(false() if id_ is None else col == id_)
+            continue
+        ids = await interner.match_ids(session, value, mode, icase)
+        if ids is None:
+            conds.append(col.in_(interner.match_select(session, value, mode, icase)))
+        else:
+            conds.append(col.in_(ids) if ids else false())
     if ip_hash:
-        conds.append(Event.ip_hash == ip_hash)
+        conds.append(Event.ip_hash == encode_ip_hash(ip_hash))
+    conds.extend(_meta_conds(session, meta, meta_filters))
+    return conds
 
+async def list_events(
+    session: AsyncSession,
+    *,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    reason: Optional[str] = None,
+    path: Optional[str] = None,
+    ip_hash: Optional[str] = None,
+    ua: Optional[str] = None,
+    path_match: str = "exact",
+    ua_match: str = "exact",
+    icase: bool = False,
+    meta: Optional[dict] = None,
+    meta_filters: Sequence[tuple] = (),
+    limit: int = 100,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    total: str = "exact",
+    fields: Optional[Sequence[str]] = None,
+) -> tuple[Optional[int], List[EventRow]]:
+    """
+    Filtreli olay listesi, (ts, id) DESC sırasında.
+    cursor verilirse keyset sayfalama yapılır (offset yok sayılır): imleçten sonraki
+    satırlar ts indeksinden okunur, derin sayfalar da sabit maliyetlidir.
+    total: "exact" (count), "estimate" (planner tahmini) ya da "none" (None döner).
+    path_match/ua_match: "exact", "prefix" ya da "contains"; icase harf duyarsız eşler.
+    meta: içerme nesnesi (meta @> meta); meta_filters: parse_meta_filter çıktıları (AND).
+    fields: EventRow alan adları; verilirse yalnızca o kolonlar okunur (id/ts her zaman,
+    imleç için), diğerleri None döner.
+    """
+    if total not in TOTAL_MODES:
+        raise ValueError(f"total must be one of {TOTAL_MODES}")
+    conds = await _event_conds(
+        session, start_ts=start_ts, end_ts=end_ts, reason=reason, path=path, ip_hash=ip_hash, ua=ua,
+        path_match=path_match, ua_match=ua_match, icase=icase, meta=meta, meta_filters=meta_filters,
+    )
     where = and_(*conds) if conds else None
 
-    q_count = select(func.count()).select_from(Event if where is None else select(Event).where(where).subquery())
-    total = (await session.execute(q_count)).scalar_one()
+    n_total: Optional[int] = None
+    if total == "exact":
+        q_count = select(func.count()).select_from(Event if where is None else select(Event).where(where).subquery())
+        n_total = (await session.execute(q_count)).scalar_one()
+    elif total == "estimate":
+        q_est = select(Event.id)
+        if where is not None:
+            q_est = q_est.where(where)
+        n_total = await _estimate_rows(session, q_est)
 
-    q = select(Event).order_by(desc(Event.ts)).limit(limit).offset(offset)
+    # ORM nesnesi yok: Core satırları doğrudan EventRow'a çözülür
+    q = select(*_projection(fields))
     if where is not None:
-        q = select(Event).where(where).order_by(desc(Event.ts)).limit(limit).offset(offset)
+        q = q.where(where)
+    if cursor:
+        c_ts, c_id = decode_cursor(cursor)
+        # ts <= c_ts indeks aralığı olarak kullanılır; eşit ts'ler id ile ayrılır
+        q = q.where(Event.ts <= c_ts, or_(Event.ts < c_ts, Event.id < c_id))
+    else:
+        q = q.offset(offset)
+    q = q.order_by(desc(Event.ts), desc(Event.id)).limit(limit)
 
-    rows = (await session.execute(q)).scalars().all()
-    return total, rows
+    rows = (await session.execute(q)).all()
+    return n_total, await decode_events(session, rows)
 
-async def daily_counts(session: AsyncSession, days: int = 7):
-    q = select(
-        func.date_trunc("day", Event.ts).label("day"),
-        func.count().label("cnt")
-    ).group_by(func.date_trunc("day", Event.ts)).order_by(func.date_trunc("day", Event.ts))
-    if days:
-        q = q.where(Event.ts >= func.now() - func.make_interval(days=days))
-    return (await session.execute(q)).all()
+# EventRow alanı -> events kolonu (lookup'lı alanlar id kolonundan çözülür)
+_FIELD_COLUMNS = {
+    "id": "id", "ts": "ts", "ip_hash": "ip_hash", "ua": "ua_id", "path": "path_id",
+    "reason": "reason_id", "score": "score", "severity": "severity", "meta": "meta",
+}
+
+def _projection(fields: Optional[Sequence[str]]) -> list:
+    t = Event.__table__
+    if not fields:
+        return list(t.c)
+    bad = [f for f in fields if f not in _FIELD_COLUMNS]
+    if bad:
+        raise ValueError(f"unknown fields: {', '.join(bad)}")
+    names = {"id", "ts"} | {_FIELD_COLUMNS[f] for f in fields}
+    return [c for c in t.c if c.name in names]
 
-async def top_reason_counts(session: AsyncSession, limit: int = 10):
-    q = select(Event.reason, func.count().label("cnt")).group_by(Event.reason).order_by(desc("cnt")).limit(limit)
+async def stream_events(
+    session: AsyncSession,
+    *,
+    chunk_rows: int = 5000,
+    after_id: Optional[int] = None,
+    **filters: Any,
+) -> AsyncIterator[List[EventRow]]:
+    """
+    Filtreli olayları (ts, id) artan sırada server-side cursor ile chunk_rows'luk
+    parçalar halinde üretir (ORM nesnesi yok, Core satırları çözülür). Bellek sabittir.
+    filters: list_events'in filtre anahtarları (start_ts, end_ts, reason, path, ip_hash,
+    ua, path_match, ua_match, icase, meta, meta_filters); aynı kurucudan geçer.
+    after_id: yalnızca id'si bundan büyük satırlar (arşivin ek parçaları için).
+    """
+    t = Event.__table__
+    q = select(t).order_by(t.c.ts, t.c.id).execution_options(yield_per=chunk_rows)
+    conds = await _event_conds(session, **filters)
+    if after_id is not None:
+        conds.append(t.c.id > after_id)
+    if conds:
+        q = q.where(and_(*conds))
+    result = await session.stream(q)
+    try:
+        async for part in result.partitions(chunk_rows):
+            yield await decode_events(session, part)
+    finally:
+        await result.close()
+
+def next_cursor(rows: Sequence[EventRow], limit: int) -> Optional[str]:
+    """Sayfa doluysa son satırdan sonraki sayfanın imleci; değilse None."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.ts, last.id)
+
+# Stats sorguları saatlik rollup'lardan okunur: watermark'tan önceki tam saatler rollup
+# tablosundan, aralığın hizasız başı/sonu ve açık saat(ler) ham tablodan (bkz. app.services.rollups).
+# (rollup modeli, rollup anahtarı, events kolonu, lookup modeli, NULL sentinel'i)
+_ROLLUPS = {
+    "reason": (ReasonHourly, ReasonHourly.reason, Event.reason_id, EventReason, ""),
+    "path": (PathHourly, PathHourly.path, Event.path_id, EventPath, ""),
+    "severity": (SeverityHourly, SeverityHourly.severity, Event.severity, None, -1),
+}
+
+def _by_day(col):
+    return day_trunc(col)
+
+async def _rollup_counts(
+    session: AsyncSession,
+    dim: str,
+    *,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+    by_day: bool = False,
+    limit: Optional[int] = None,
+    label: str,
+):
+    """
+    dim anahtarına (ya da by_day ise güne) göre sayım; sonuç kolonları (label, cnt).
+    Rollup tabloları yoksa tamamen ham tablodan hesaplanır.
+    """
+    model, r_key, e_key, lookup, sentinel = _ROLLUPS[dim]
+    wm = await get_watermark(session)
+
+    parts = []
+    raw_ranges = [(start_ts, end_ts)]
+    if wm is not None:
+        lo = ceil_hour(start_ts) if start_ts else None
+        hi = min(floor_hour(end_ts), wm) if end_ts else wm
+        if lo is None or lo < hi:
+            key = _by_day(model.hour) if by_day else r_key
+            q = select(key.label("k"), func.sum(model.cnt).label("cnt")).where(model.hour < hi)
+            if lo is not None:
+                q = q.where(model.hour >= lo)
+            parts.append(q.group_by(key))
+            raw_ranges = []
+            if start_ts and start_ts < lo:
+                raw_ranges.append((start_ts, lo))
+            if end_ts is None or hi < end_ts:
+                raw_ranges.append((hi, end_ts))
+
+    if by_day:
+        raw_key = _by_day(Event.ts)
+    elif lookup is None:
+        raw_key = func.coalesce(e_key, sentinel)
+    else:
+        raw_key = e_key
+    for lo_, hi_ in raw_ranges:
+        conds = _range_conds(lo_, hi_)
+        q = select(raw_key.label("k"), func.count().label("cnt"))
+        if conds:
+            q = q.where(and_(*conds))
+        q = q.group_by(raw_key)
+        if not by_day and lookup is not None:
+            # önce id'ye göre say, sonra (küçük) sonucu sözlükle çöz
+            g = q.subquery()
+            q = select(func.coalesce(lookup.value, sentinel).label("k"), g.c.cnt).select_from(
+                g.outerjoin(lookup, lookup.id == g.c.k)
+            )
+        parts.append(q)
+
+    u = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery()
+    out_key = u.c.k if by_day else func.nullif(u.c.k, sentinel)
+    q = select(out_key.label(label), func.sum(u.c.cnt).cast(BigInteger).label("cnt")).group_by(u.c.k)
+    q = q.order_by(u.c.k) if by_day else q.order_by(desc("cnt"))
+    if limit is not None:
+        q = q.limit(limit)
     return (await session.execute(q)).all()
 
-async def top_paths(session: AsyncSession, limit: int = 10):
-    q = select(Event.path, func.count().label("cnt")).group_by(Event.path).order_by(desc("cnt")).limit(limit)
-    return (await session.execute(q)).all()
\ No newline at end of file
+async def daily_counts(session: AsyncSession, days: int = 7):
+    start = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+    return await _rollup_counts(session, "reason", start_ts=start, by_day=True, label="day")
+
+def _range_conds(start_ts: Optional[datetime], end_ts: Optional[datetime]) -> list:
+    conds = []
+    if start_ts:
+        conds.append(Event.ts >= start_ts)
+    if end_ts:
+        conds.append(Event.ts < end_ts)
+    return conds
+
+async def top_reason_counts(
+    session: AsyncSession,
+    limit: int = 10,
+    *,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+):
+    return await _rollup_counts(
+        session, "reason", start_ts=start_ts, end_ts=end_ts, limit=limit, label="reason"
+    )
+
+async def top_paths(
+    session: AsyncSession,
+    limit: int = 10,
+    *,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+):
+    return await _rollup_counts(
+        session, "path", start_ts=start_ts, end_ts=end_ts, limit=limit, label="path"
+    )
+
+async def severity_counts(
+    session: AsyncSession,
+    *,
+    start_ts: Optional[datetime] = None,
+    end_ts: Optional[datetime] = None,
+):
+    return await _rollup_counts(
+        session, "severity", start_ts=start_ts, end_ts=end_ts, label="severity"
+    )
+
+async def query_events(
+    session: AsyncSession,
+    *,
+    ip_hash: Optional[str] = None,
+    reason: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = 200,
+) -> List[Dict[str, Any]]:
+    stmt = select(Event).order_by(Event.ts.desc()).limit(limit)
+    conds = await _event_conds(session, start_ts=since, reason=reason, ip_hash=ip_hash)
+    if conds:
+        stmt = stmt.where(and_(*conds))
+    rows = await decode_events(session, (await session.execute(stmt)).scalars().all())
+    return [dict(
+        id=r.id, ts=r.ts.isoformat(), ip_hash=r.ip_hash, ua=r.ua, path=r.path,
+        reason=r.reason, score=r.score, severity=r.severity, meta=r.meta
+    ) for r in rows]
+
+async def daily_summary(session: AsyncSession) -> Dict[Optional[str], int]:
+    """Son 24 saatin reason bazlı sayımı."""
+    since = datetime.now(timezone.utc) - timedelta(days=1)
+    rows = await _rollup_counts(session, "reason", start_ts=since, label="reason")
+    return {r.reason: r.cnt for r in rows}
+
+async def retention_purge(session: AsyncSession, days: Optional[int] = None) -> int:
+    """
+    days günden eski eventleri temizler ve commit eder; silinen satır sayısını döndürür.
+    days yoksa RETENTION_POLICY kademeleri uygulanır (bkz. app.services.retention).
+    """
+    from app.services.retention import run_retention
+
+    removed = await run_retention(session, days=days)
+    await session.commit()
+    return removed
@@ -0,0 +1,340 @@
+# app/repositories/lookups.py
+"""
+Kompakt events şeması için şeffaf kodlama/çözme.
+
+- ua/path/reason: lookup tablolarında (event_uas/event_paths/event_reasons) tutulur,
+  events satırı küçük tamsayı id taşır. Process içi LRU cache iki yönlüdür.
+- ip_hash: 16 hex hane -> işaretli bigint. 16 hex olmayan değerler (örn. POST /events
+  client alanı) önce sha256(değer)'in ilk 16 hanesine çevrilir; filtreler aynı
+  kuralla kodlandığı için arama tutarlıdır, okumada 16 hex geri döner.
+
+Yeni lookup satırları çağıranın transaction'ında eklenir; id'ler cache'e ancak commit
+sonrası girer (rollback'te unutulur), böylece cache hiç commit edilmemiş id tutmaz.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, bindparam, column, event, func, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.backends import backend_name, bind_key
+
+_HEX16 = re.compile(r"^[0-9a-fA-F]{16}$")
+_U64 = 1 << 64
+_PENDING_KEY = "_lookup_pending"
+
+LOOKUP_CACHE_SIZE = int(os.getenv("LOOKUP_CACHE_SIZE", "50000"))
+# Desen aramasında id listesi olarak gömülecek en fazla sözlük eşleşmesi (fazlası alt sorgu)
+SEARCH_MATCH_MAX_IDS = int(os.getenv("SEARCH_MATCH_MAX_IDS", "1000"))
+
+MATCH_MODES = ("exact", "prefix", "contains")
+
+
+def encode_ip_hash(value: str) -> int:
+    h = value if _HEX16.match(value) else hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+    n = int(h, 16)
+    return n - _U64 if n >= 1 << 63 else n
+
+
+def decode_ip_hash(n: Optional[int]) -> Optional[str]:
+    return None if n is None else format(n % _U64, "016x")
+
+
+def normalize_ip_hash(value: Optional[str]) -> Optional[str]:
+    """Canlı tablonun saklayıp döndürdüğü biçim: 16 küçük hex hane (bkz. encode_ip_hash)."""
+    if value is None:
+        return None
+    if _HEX16.match(value):
+        return value.lower()
+    return decode_ip_hash(encode_ip_hash(value))
+
+
+class _Cache:
+    """value <-> id LRU çifti (tek engine için)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.by_value: "OrderedDict[str, int]" = OrderedDict()
+        self.by_id: "OrderedDict[int, str]" = OrderedDict()
+
+    def remember(self, value: str, id_: int) -> None:
+        for d, k, v in ((self.by_value, value, id_), (self.by_id, id_, value)):
+            d[k] = v
+            d.move_to_end(k)
+            if len(d) > self.max_size:
+                d.popitem(last=False)
+
+    def get_id(self, value: str) -> Optional[int]:
+        id_ = self.by_value.get(value)
+        if id_ is not None:
+            self.by_value.move_to_end(value)
+        return id_
+
+
+class Interner:
+    """
+    Tek bir lookup tablosu için value <-> id eşlemesi. Cache engine başınadır: aynı
+    process'te iki veritabanı (örn. PG + SQLite) varsa id'ler karışmaz.
+    """
+
+    def __init__(self, table: str, max_size: int = LOOKUP_CACHE_SIZE):
+        self.table = table
+        self.max_size = max(1, int(max_size))
+        self._caches: "weakref.WeakKeyDictionary[Any, _Cache]" = weakref.WeakKeyDictionary()
+
+    def cache_for(self, bind: Any) -> _Cache:
+        c = self._caches.get(bind)
+        if c is None:
+            c = self._caches[bind] = _Cache(self.max_size)
+        return c
+
+    def cached_id(self, session: AsyncSession, value: str) -> Optional[int]:
+        return self.cache_for(bind_key(session)).get_id(value)
+
+    async def lookup(self, session: AsyncSession, value: str) -> Optional[int]:
+        """Salt okuma: değer yoksa None (filtrelerde kullanılır, satır eklemez)."""
+        cache = self.cache_for(bind_key(session))
+        id_ = cache.get_id(value) or _pending(session).get(self.table, {}).get(value)
+        if id_ is not None:
+            return id_
+        if backend_name(session) == "postgresql":
+            q = f"SELECT id FROM {self.table} WHERE md5(value) = md5(:v) AND value = :v"
+        else:
+            q = f"SELECT id FROM {self.table} WHERE value = :v"
+        id_ = (await session.execute(text(q), {"v": value})).scalar()
+        if id_ is not None:
+            cache.remember(value, id_)
+        return id_
+
+    async def get_or_create(self, session: AsyncSession, values: Iterable[str]) -> Dict[str, int]:
+        cache = self.cache_for(bind_key(session))
+        out: Dict[str, int] = {}
+        pending = _pending(session).setdefault(self.table, {})
+        missing = []
+        for v in set(values):
+            id_ = cache.get_id(v) or pending.get(v)
+            if id_ is None:
+                missing.append(v)
+            else:
+                out[v] = id_
+        if not missing:
+            return out
+        # Sabit sıra: eşzamanlı transaction'lar unique index kilitlerini aynı sırada alsın
+        missing.sort()
+        pg = backend_name(session) == "postgresql"
+        if pg:
+            created = (await session.execute(
+                text(
+                    f"INSERT INTO {self.table} (value) SELECT unnest(CAST(:vals AS text[])) "
+                    f"ON CONFLICT ((md5(value))) DO NOTHING RETURNING id, value"
+                ),
+                {"vals": missing},
+            )).all()
+            rest_q = text(
+                f"SELECT id, value FROM {self.table} "
+                f"WHERE md5(value) = ANY(SELECT md5(x) FROM unnest(CAST(:vals AS text[])) x) "
+                f"AND value = ANY(CAST(:vals AS text[]))"
+            )
+        else:
+            # SQLite: tek yazar kilidi altında çalışır, RETURNING yerine sonradan okunur
+            await session.execute(
+                text(f"INSERT INTO {self.table} (value) VALUES (:v) ON CONFLICT (value) DO NOTHING"),
+                [{"v": v} for v in missing],
+            )
+            created = []
+            rest_q = text(f"SELECT id, value FROM {self.table} WHERE value IN :vals").bindparams(
+                bindparam("vals", expanding=True)
+            )
+        for id_, v in created:
+            pending[v] = id_
+            out[v] = id_
+        rest = [v for v in missing if v not in out]
+        if rest:
+            rows = (await session.execute(rest_q, {"vals": rest})).all()
+            for id_, v in rows:
+                if pg:
+                    # başka transaction'ın commit ettiği satır: doğrudan cache'lenebilir
+                    cache.remember(v, id_)
+                else:
+                    # SQLite'ta bu transaction'ın eklediğinden ayırt edilemez; commit'i bekle
+                    pending[v] = id_
+                out[v] = id_
+        return out
+
+    async def values(self, session: AsyncSession, ids: Iterable[int]) -> Dict[int, str]:
+        by_id = self.cache_for(bind_key(session)).by_id
+        out: Dict[int, str] = {}
+        missing = []
+        for i in set(ids):
+            v = by_id.get(i)
+            if v is None:
+                missing.append(i)
+            else:
+                out[i] = v
+        if missing:
+            rows = (await session.execute(
+                text(f"SELECT id, value FROM {self.table} WHERE id IN :ids").bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": missing},
+            )).all()
+            for id_, v in rows:
+                # id'ler yeniden kullanılmaz (sequence), id -> value her zaman güvenli
+                by_id[id_] = v
+                out[id_] = v
+            while len(by_id) > self.max_size:
+                by_id.popitem(last=False)
+        return out
+
+
+    # --- desen araması (prefix/contains/icase) ---------------------------------
+
+    def _match_clause(self, dialect: str, pattern: str, mode: str, icase: bool):
+        v = column("value")
+        esc = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        like = {"exact": esc, "prefix": esc + "%", "contains": "%" + esc + "%"}[mode]
+        if icase:
+            # PG: ILIKE (pg_trgm GIN), SQLite: lower() LIKE lower()
+            return v.ilike(like, escape="\\")
+        if dialect != "postgresql":
+            # SQLite LIKE ASCII'de harf duyarsız; instr duyarlı
+            pos = func.instr(v, pattern)
+            return {"exact": v == pattern, "prefix": pos == 1, "contains": pos > 0}[mode]
+        if mode == "exact":
+            return v == pattern
+        if mode == "prefix":
+            # text_pattern_ops btree aralığı; parametreli (generic) planda da index taraması
+            hi = _prefix_upper(pattern)
+            return and_(v.op("~>=~")(pattern), *([v.op("~<~")(hi)] if hi else []))
+        return v.like(like, escape="\\")
+
+    def match_select(self, session: AsyncSession, pattern: str, mode: str, icase: bool):
+        """Desene uyan sözlük id'leri (alt sorgu olarak)."""
+        t = table(self.table, column("id"), column("value"))
+        return select(t.c.id).where(self._match_clause(backend_name(session), pattern, mode, icase))
+
+    async def match_ids(
+        self, session: AsyncSession, pattern: str, mode: str, icase: bool, limit: Optional[int] = None
+    ) -> Optional[List[int]]:
+        """
+        Desene uyan sözlük id'leri; limit'i aşarsa None (çağıran match_select'i alt sorgu
+        olarak kullanır). Küçük listeler sabit olarak gömülür: planner gerçek seçiciliği görür.
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"match must be one of {MATCH_MODES}")
+        limit = SEARCH_MATCH_MAX_IDS if limit is None else limit
+        ids = (await session.execute(self.match_select(session, pattern, mode, icase).limit(limit + 1))).scalars().all()
+        return None if len(ids) > limit else list(ids)
+
+
+def _prefix_upper(p: str) -> Optional[str]:
+    """p ile başlayan her metinden (kod noktası/UTF-8 bayt sırasında) büyük en küçük sınır."""
+    for i in range(len(p) - 1, -1, -1):
+        c = ord(p[i]) + 1
+        if 0xD800 <= c <= 0xDFFF:
+            c = 0xE000
+        if c <= 0x10FFFF:
+            return p[:i] + chr(c)
+    return None
+
+
+REASONS = Interner("event_reasons")
+PATHS = Interner("event_paths")
+UAS = Interner("event_uas")
+_INTERNERS = {i.table: i for i in (REASONS, PATHS, UAS)}
+
+
+def _pending(session: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """Bu session'ın commit edilmemiş lookup id'leri; commit'te cache'e taşınır."""
+    info = session.info
+    p = info.get(_PENDING_KEY)
+    if p is None:
+        p = info[_PENDING_KEY] = {}
+        sync = session.sync_session
+
+        def _promote(sess):
+            bind = sess.get_bind()
+            for table, m in p.items():
+                cache = _INTERNERS[table].cache_for(bind)
+                for v, id_ in m.items():
+                    cache.remember(v, id_)
+            p.clear()
+
+        def _discard(_sess):
+            p.clear()
+
+        event.listen(sync, "after_commit", _promote)
+        event.listen(sync, "after_rollback", _discard)
+    return p
+
+
+# --- Satır kodlama/çözme -------------------------------------------------------
+
+_COLUMN_INTERNERS = (("reason", "reason_id", REASONS), ("path", "path_id", PATHS), ("ua", "ua_id", UAS))
+
+
+async def encode_events(session: AsyncSession, rows: Sequence[dict]) -> List[dict]:
+    """ts/ip_hash/ua/path/reason/... dict'leri -> events kolonları (id'ler + bigint ip_hash)."""
+    ids = {}
+    for col, _, interner in _COLUMN_INTERNERS:
+        vals = {r.get(col) for r in rows} - {None}
+        ids[col] = await interner.get_or_create(session, vals) if vals else {}
+    out = []
+    for r in rows:
+        e = {
+            "ts": r.get("ts"),
+            "ip_hash": encode_ip_hash(r["ip_hash"]),
+            "score": r.get("score"),
+            "severity": r.get("severity"),
+            "meta": r.get("meta"),
+        }
+        for col, idcol, _ in _COLUMN_INTERNERS:
+            v = r.get(col)
+            e[idcol] = None if v is None else ids[col][v]
+        out.append(e)
+    return out
+
+
+@dataclass
+class EventRow:
+    """Çözülmüş olay satırı (API/export/arşiv eski kolon adlarıyla çalışır)."""
+    id: int
+    ts: datetime
+    ip_hash: str
+    ua: Optional[str]
+    path: Optional[str]
+    reason: Optional[str]
+    score: Optional[float]
+    severity: Optional[int]
+    meta: Optional[Dict[str, Any]]
+
+
+async def decode_events(session: AsyncSession, rows: Sequence[Any]) -> List[EventRow]:
+    """events satırları (ORM ya da Core) -> EventRow; eksik lookup'lar tek sorguda çekilir."""
+    maps = {}
+    for col, idcol, interner in _COLUMN_INTERNERS:
+        ids = {getattr(r, idcol, None) for r in rows} - {None}
+        maps[col] = await interner.values(session, ids) if ids else {}
+    # projeksiyonla (list_events fields=) seçilmeyen kolonlar None kalır
+    return [
+        EventRow(
+            id=r.id,
+            ts=r.ts,
+            ip_hash=decode_ip_hash(getattr(r, "ip_hash", None)),
+            ua=maps["ua"].get(getattr(r, "ua_id", None)),
+            path=maps["path"].get(getattr(r, "path_id", None)),
+            reason=maps["reason"].get(getattr(r, "reason_id", None)),
+            score=getattr(r, "score", None),
+            severity=getattr(r, "severity", None),
+            meta=getattr(r, "meta", None),
+        )
+        for r in rows
+    ]
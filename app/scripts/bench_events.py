@@ -0,0 +1,469 @@
+# app/scripts/bench_events.py
+"""
+events repository/API benchmark'ı.
+
+Ayrı bir Postgres veritabanını (adında "bench" geçmeli, ya da --force) gerçekçi,
+çarpık dağılımlı sentetik olaylarla doldurur ve her veri boyutunda şunları ölçer:
+
+  - repository fonksiyonları (list_events, daily_counts, top_reason_counts, top_paths,
+    daily_summary, run_retention — retention transaction'ı geri alınır, veri kalır)
+  - aynı sorguların API uçları (ASGI üzerinden, ağ yok; sorgu cache'i kapalı)
+  - her repository çağrısının SQL'leri için EXPLAIN (ANALYZE, BUFFERS) planı
+
+Çıktı makine-okunur JSON rapordur. --baseline ile önceki rapora göre p50 gecikme
+artışı ya da plan şekli değişimi regresyon sayılır ve çıkış kodu 2 olur.
+
+Örnek:
+  BENCH_DATABASE_URL=postgresql+asyncpg://postgres@127.0.0.1:5432/secmon_bench \\
+    python app/scripts/bench_events.py --sizes 100000,1000000,10000000 --out bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Dağılım: k = floor(n * random()^skew) -> küçük k'ler baskın (Zipf benzeri)
+N_REASONS, REASON_SKEW = 24, 3.0
+N_PATHS, PATH_SKEW = 2000, 4.0
+N_UAS, UA_SKEW = 300, 2.0
+N_IPS, IP_SKEW = 200_000, 3.0
+SEED_BATCH = 500_000
+
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="events repository/API benchmark")
+    ap.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                    help="asyncpg URL (varsayılan: BENCH_DATABASE_URL)")
+    ap.add_argument("--sizes", default="100000,1000000",
+                    help="virgüllü satır sayıları; tablo her boyuta kadar doldurulur")
+    ap.add_argument("--days", type=int, default=30, help="olayların yayıldığı gün sayısı")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--no-api", action="store_true", help="API uçlarını ölçme")
+    ap.add_argument("--no-explain", action="store_true", help="EXPLAIN planlarını toplama")
+    ap.add_argument("--reset", action="store_true", help="başlamadan önce events ve sözlükleri boşalt")
+    ap.add_argument("--out", default="bench-report.json")
+    ap.add_argument("--baseline", help="karşılaştırılacak önceki rapor")
+    ap.add_argument("--max-slowdown", type=float, default=1.5,
+                    help="p50 bu oranı (ve --min-delta-ms'i) aşarsa regresyon")
+    ap.add_argument("--min-delta-ms", type=float, default=5.0)
+    ap.add_argument("--force", action="store_true", help="adında 'bench' geçmeyen DB'ye de yaz")
+    return ap.parse_args(argv)
+
+
+def _prepare_env(url: str) -> None:
+    """app modülleri import edilmeden önce: bench DB'si, cache/karantina/arşiv kapalı."""
+    os.environ["DATABASE_URL"] = url
+    os.environ["QUERY_CACHE_ENABLED"] = "0"
+    os.environ["QUARANTINE_ENABLED"] = "0"
+    os.environ.pop("ARCHIVE_DIR", None)
+
+
+# --- Veri üretimi ---------------------------------------------------------------
+
+async def _ensure_lookups(session) -> Dict[str, List[int]]:
+    from app.repositories.lookups import PATHS, REASONS, UAS
+
+    out = {}
+    for key, interner, n, fmt in (
+        ("reason", REASONS, N_REASONS, "bench_reason_{:02d}"),
+        ("path", PATHS, N_PATHS, "/bench/{:04d}"),
+        ("ua", UAS, N_UAS, "bench-agent/{:03d}"),
+    ):
+        values = [fmt.format(i) for i in range(n)]
+        ids = await interner.get_or_create(session, values)
+        # dizideki sıra = popülerlik sırası
+        out[key] = [ids[v] for v in values]
+    await session.commit()
+    return out
+
+
+async def _ensure_partitions(session, days: int) -> None:
+    from app.services.partitions import create_partition, ensure_partitions, is_partitioned
+
+    if not await is_partitioned(session):
+        return
+    today = datetime.now(timezone.utc).date()
+    for i in range(days + 1):
+        await create_partition(session, today - timedelta(days=i))
+    await ensure_partitions(session, days_ahead=1)
+    await session.commit()
+
+
+async def _seed(session, target: int, days: int, ids: Dict[str, List[int]]) -> int:
+    """events'i target satıra kadar doldurur (server-side generate_series, batch'ler halinde)."""
+    from sqlalchemy import text
+
+    have = (await session.execute(text("SELECT count(*) FROM events"))).scalar_one()
+    q = text(
+        f"""
+        INSERT INTO events (ts, ip_hash, ua_id, path_id, reason_id, score, severity, meta)
+        SELECT
+            now() - random() * (:days * interval '1 day'),
+            hashtextextended('bench-ip-' || floor({N_IPS} * random() ^ {IP_SKEW})::int, 0),
+            (CAST(:uas AS int[]))[1 + floor({N_UAS} * random() ^ {UA_SKEW})::int],
+            (CAST(:paths AS int[]))[1 + floor({N_PATHS} * random() ^ {PATH_SKEW})::int],
+            (CAST(:reasons AS int[]))[1 + floor({N_REASONS} * random() ^ {REASON_SKEW})::int],
+            round((random() * 10)::numeric, 2)::float8,
+            floor(random() ^ 2 * 5)::int,
+            CASE WHEN random() < 0.1 THEN jsonb_build_object('bench', true, 'rps', floor(random() * 100)) END
+        FROM generate_series(1, :n)
+        """
+    )
+    while have < target:
+        n = min(SEED_BATCH, target - have)
+        t0 = time.perf_counter()
+        await session.execute(
+            q, {"n": n, "days": days, "uas": ids["ua"], "paths": ids["path"], "reasons": ids["reason"]}
+        )
+        await session.commit()
+        have += n
+        print(f"  seed +{n} -> {have} ({time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+    await session.execute(text("ANALYZE events"))
+    await session.commit()
+    return have
+
+
+async def _reset(session) -> None:
+    from sqlalchemy import text
+
+    await session.execute(text(
+        "TRUNCATE events, event_reasons, event_paths, event_uas, "
+        "events_hourly_reason, events_hourly_path, events_hourly_severity"
+    ))
+    await session.execute(text("UPDATE rollup_state SET watermark = NULL"))
+    await session.commit()
+
+
+async def _refresh_rollups(session) -> float:
+    from app.services.rollups import refresh_rollups
+
+    t0 = time.perf_counter()
+    while await refresh_rollups(session):
+        await session.commit()
+    await session.commit()
+    return time.perf_counter() - t0
+
+
+# --- Ölçüm --------------------------------------------------------------------
+
+class _Capture:
+    """Bir çağrı boyunca engine'e giden SELECT'leri (SQL + parametre) toplar."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.active = False
+        self.stmts: List[tuple] = []
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _on_execute(conn, cursor, statement, parameters, context, executemany):
+            head = statement.lstrip()[:6].upper()
+            if self.active and not executemany and head.startswith(("SELECT", "WITH")):
+                self.stmts.append((statement, parameters))
+
+    def start(self) -> None:
+        self.stmts = []
+        self.active = True
+
+    def stop(self) -> List[tuple]:
+        self.active = False
+        return self.stmts
+
+
+_PARTITION_RE = re.compile(r"events_p\d{8}")
+
+
+def _shape(node: Dict[str, Any]) -> str:
+    """
+    Plan ağacının düğüm tipleri (maliyet/sayı yok) — plan değişimini yakalamak için.
+    Günlük bölüm adları tarihten arındırılır, art arda aynı çocuklar tek yazılır
+    (bölüm sayısı her gün değişir).
+    """
+    name = node.get("Node Type", "?")
+    if node.get("Relation Name"):
+        name += f"[{node['Relation Name']}]"
+    if node.get("Index Name"):
+        name += f"<{node['Index Name']}>"
+    name = _PARTITION_RE.sub("events_p*", name)
+    kids: List[str] = []
+    for k in node.get("Plans") or []:
+        sk = _shape(k)
+        if not kids or kids[-1] != sk:
+            kids.append(sk)
+    return name + ("(" + ",".join(kids) + ")" if kids else "")
+
+
+async def _explain(session, stmts: List[tuple]) -> List[Dict[str, Any]]:
+    out = []
+    for sql, params in stmts:
+        try:
+            conn = await session.connection()
+            res = await conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params
+            )
+            plan = res.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            top = plan[0]
+            out.append({
+                "sql": " ".join(sql.split())[:2000],
+                "shape": _shape(top["Plan"]),
+                "planning_ms": top.get("Planning Time"),
+                "execution_ms": top.get("Execution Time"),
+                "shared_hit": top["Plan"].get("Shared Hit Blocks"),
+                "shared_read": top["Plan"].get("Shared Read Blocks"),
+                "plan": top["Plan"],
+            })
+        except Exception as e:
+            out.append({"sql": " ".join(sql.split())[:2000], "error": str(e)})
+        finally:
+            await session.rollback()
+    return out
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    s = sorted(samples)
+    p95 = s[min(len(s) - 1, int(round(0.95 * (len(s) - 1))))]
+    return {
+        "n": len(s),
+        "p50_ms": round(statistics.median(s) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "min_ms": round(s[0] * 1000, 3),
+        "max_ms": round(s[-1] * 1000, 3),
+    }
+
+
+async def _time(fn: Callable[[], Awaitable[Any]], repeat: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _repo_targets(hot: Dict[str, Any], days: int) -> Dict[str, Callable]:
+    from app.repositories.events import (
+        daily_counts,
+        daily_summary,
+        list_events,
+        next_cursor,
+        top_paths,
+        top_reason_counts,
+    )
+    from app.services.retention import run_retention
+
+    async def page2(s):
+        _, rows = await list_events(s, limit=100, total="none")
+        return await list_events(s, limit=100, total="none", cursor=next_cursor(rows, 100))
+
+    last_week = datetime.now(timezone.utc) - timedelta(days=7)
+    return {
+        "list_events.latest": lambda s: list_events(s, limit=100),
+        "list_events.latest_estimate": lambda s: list_events(s, limit=100, total="estimate"),
+        "list_events.offset_5000": lambda s: list_events(s, limit=100, offset=5000, total="none"),
+        "list_events.cursor_page2": page2,
+        "list_events.hot_reason": lambda s: list_events(s, reason=hot["reason"], limit=100),
+        "list_events.cold_path": lambda s: list_events(s, path=hot["cold_path"], limit=100),
+        "list_events.hot_ip": lambda s: list_events(s, ip_hash=hot["ip_hash"], limit=100),
+        "daily_counts.7d": lambda s: daily_counts(s, days=7),
+        "top_reason_counts.all": lambda s: top_reason_counts(s, limit=10),
+        "top_reason_counts.7d": lambda s: top_reason_counts(s, limit=10, start_ts=last_week),
+        "top_paths.all": lambda s: top_paths(s, limit=10),
+        "daily_summary": daily_summary,
+        # geri alınır: DETACH/DROP transaction içinde, veri yerinde kalır
+        "run_retention": lambda s: run_retention(s, days=max(1, days - 1), commit_batches=False),
+    }
+
+
+def _api_targets(hot: Dict[str, Any]) -> Dict[str, tuple]:
+    admin = {"X-Debug-Admin": "1"}
+    return {
+        "GET /events": ("/events", {"limit": 100}, None),
+        "GET /events/search?reason": ("/events/search", {"reason": hot["reason"], "limit": 100}, None),
+        "GET /events/search?client": ("/events/search", {"client": hot["ip_hash"], "limit": 100}, None),
+        "GET /stats/daily": ("/stats/daily", {"days": 7}, None),
+        "GET /stats/reasons": ("/stats/reasons", {"limit": 10}, None),
+        "GET /stats/paths": ("/stats/paths", {"limit": 10}, None),
+        "GET /stats/severities": ("/stats/severities", {}, None),
+        "GET /_admin/stats/top-reasons": ("/_admin/stats/top-reasons", {"limit": 10}, admin),
+    }
+
+
+async def _hot_values(session) -> Dict[str, Any]:
+    from sqlalchemy import text
+    from app.repositories.lookups import decode_ip_hash
+
+    ip = (await session.execute(text("SELECT hashtextextended('bench-ip-0', 0)"))).scalar_one()
+    return {
+        "reason": "bench_reason_00",
+        "cold_path": f"/bench/{N_PATHS - 1:04d}",
+        "ip_hash": decode_ip_hash(ip),
+    }
+
+
+async def _run_size(args, SessionLocal, capture, size: int, ids) -> Dict[str, Any]:
+    from sqlalchemy import text
+
+    async with SessionLocal() as s:
+        rows = await _seed(s, size, args.days, ids)
+        rollup_s = await _refresh_rollups(s)
+        table_bytes = (await s.execute(text("SELECT pg_total_relation_size('events')"))).scalar()
+        if not table_bytes:
+            # bölümlenmiş ebeveynin kendisi boş; bölümleri topla
+            table_bytes = (await s.execute(text(
+                "SELECT coalesce(sum(pg_total_relation_size(inhrelid)), 0) FROM pg_inherits "
+                "WHERE inhparent = 'events'::regclass"
+            ))).scalar()
+        hot = await _hot_values(s)
+
+    results = []
+    for name, fn in _repo_targets(hot, args.days).items():
+        async def call(fn=fn):
+            async with SessionLocal() as s:
+                await fn(s)
+                await s.rollback()
+
+        samples = await _time(call, args.repeat, args.warmup)
+        item = {"name": name, "kind": "repo", **_summary(samples)}
+        if not args.no_explain:
+            async with SessionLocal() as s:
+                capture.start()
+                try:
+                    await fn(s)
+                finally:
+                    stmts = capture.stop()
+                    await s.rollback()
+                item["plans"] = await _explain(s, stmts)
+        results.append(item)
+        print(f"  {name:32s} p50={item['p50_ms']:9.2f}ms p95={item['p95_ms']:9.2f}ms", file=sys.stderr)
+
+    if not args.no_api:
+        import httpx
+        from app.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, (path, params, headers) in _api_targets(hot).items():
+                async def call(path=path, params=params, headers=headers):
+                    r = await client.get(path, params=params, headers=headers)
+                    r.raise_for_status()
+
+                samples = await _time(call, args.repeat, args.warmup)
+                item = {"name": name, "kind": "api", **_summary(samples)}
+                results.append(item)
+                print(f"  {name:32s} p50={item['p50_ms']:9.2f}ms p95={item['p95_ms']:9.2f}ms", file=sys.stderr)
+
+    return {
+        "size": size,
+        "rows": rows,
+        "table_bytes": table_bytes,
+        "rollup_refresh_s": round(rollup_s, 3),
+        "results": results,
+    }
+
+
+# --- Karşılaştırma ----------------------------------------------------------------
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any], max_slowdown: float, min_delta_ms: float) -> List[str]:
+    """Regresyon açıklamaları listesi; boşsa temiz."""
+    def index(rep):
+        out = {}
+        for run in rep.get("runs", []):
+            for r in run.get("results", []):
+                out[(run["size"], r["name"])] = r
+        return out
+
+    old, new = index(baseline), index(report)
+    problems = []
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[0], k[1])):
+        o, n = old[key], new[key]
+        size, name = key
+        if n["p50_ms"] > o["p50_ms"] * max_slowdown and n["p50_ms"] - o["p50_ms"] > min_delta_ms:
+            problems.append(
+                f"{size} {name}: p50 {o['p50_ms']:.2f}ms -> {n['p50_ms']:.2f}ms"
+            )
+        # şekil ham plandan yeniden türetilir: eski raporlar da aynı kuralla kıyaslanır
+        o_shapes = [_shape(p["plan"]) if "plan" in p else p.get("shape") for p in o.get("plans", [])]
+        n_shapes = [_shape(p["plan"]) if "plan" in p else p.get("shape") for p in n.get("plans", [])]
+        if o_shapes and n_shapes and o_shapes != n_shapes:
+            for i, (a, b) in enumerate(zip(o_shapes, n_shapes)):
+                if a != b:
+                    problems.append(f"{size} {name}: plan[{i}] {a} -> {b}")
+            if len(o_shapes) != len(n_shapes):
+                problems.append(f"{size} {name}: {len(o_shapes)} -> {len(n_shapes)} statements")
+    return problems
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if not args.database_url or "asyncpg" not in args.database_url:
+        print("--database-url ya da BENCH_DATABASE_URL (asyncpg) gerekli", file=sys.stderr)
+        return 1
+    db_name = args.database_url.rsplit("/", 1)[-1].split("?")[0]
+    if "bench" not in db_name and not args.force:
+        print(f"'{db_name}' bench DB'sine benzemiyor; veri yazılacak. Emin isen --force", file=sys.stderr)
+        return 1
+    sizes = sorted(int(x) for x in args.sizes.split(",") if x.strip())
+
+    _prepare_env(args.database_url)
+    from sqlalchemy import text
+    from app.db.session import SessionLocal, engine
+
+    capture = _Capture(engine)
+    report: Dict[str, Any] = {
+        "started": datetime.now(timezone.utc).isoformat(),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "args": {k: v for k, v in vars(args).items() if k != "database_url"},
+        "runs": [],
+    }
+    async with SessionLocal() as s:
+        report["postgres"] = (await s.execute(text("SHOW server_version"))).scalar()
+        if args.reset:
+            await _reset(s)
+        await _ensure_partitions(s, args.days)
+        ids = await _ensure_lookups(s)
+
+    for size in sizes:
+        print(f"size={size}", file=sys.stderr)
+        report["runs"].append(await _run_size(args, SessionLocal, capture, size, ids))
+
+    await engine.dispose()
+    report["finished"] = datetime.now(timezone.utc).isoformat()
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"report -> {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(json.load(f), report, args.max_slowdown, args.min_delta_ms)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        if problems:
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,99 @@
+# app/scripts/meta_indexes.py
+"""
+Sıcak meta anahtarları için ifade index'leri (meta_num(meta, '<key>')).
+
+/events/search?meta.z>5 gibi sayısal filtreler bu ifadeyle derlenir; index yoksa
+ts aralığı içindeki satırlar taranır. events günlük bölümlü olduğundan index önce
+yalnızca ebeveynde (ON ONLY, geçersiz) açılır, her bölümde CONCURRENTLY kurulup
+bağlanır: yazımlar kilitlenmez. Sonradan açılan bölümler index'i otomatik alır.
+
+Örnek:
+  python app/scripts/meta_indexes.py z count
+  python app/scripts/meta_indexes.py --drop count
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+PARENT = "events"
+_KEY_RE = re.compile(r"^[A-Za-z0-9_]{1,40}$")
+
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="meta_num ifade index'leri")
+    ap.add_argument("keys", nargs="+", help="meta anahtarları (harf, rakam, _)")
+    ap.add_argument("--database-url", default=os.getenv("DATABASE_URL"),
+                    help="asyncpg URL (varsayılan: DATABASE_URL)")
+    ap.add_argument("--drop", action="store_true", help="index'leri kaldır")
+    return ap.parse_args(argv)
+
+
+def _expr(key: str) -> str:
+    return f"(meta_num(meta, '{key}'))"
+
+
+async def _valid(conn, name: str):
+    """True/False (indisvalid) ya da index yoksa None."""
+    q = text("SELECT i.indisvalid FROM pg_index i WHERE i.indexrelid = to_regclass(:n)")
+    return (await conn.execute(q, {"n": name})).scalar()
+
+
+async def _children(conn):
+    q = text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:t) ORDER BY c.relname"
+    )
+    return [r[0] for r in (await conn.execute(q, {"t": PARENT})).all()]
+
+
+async def create_index(conn, key: str) -> None:
+    parent_ix = f"ix_{PARENT}_meta_{key}"
+    children = await _children(conn)
+    if not children:
+        # bölümsüz tablo
+        await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {parent_ix} ON {PARENT} {_expr(key)}"))
+        return
+    await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {parent_ix} ON ONLY {PARENT} {_expr(key)}"))
+    for child in children:
+        ix = f"ix_{child}_meta_{key}"
+        if await _valid(conn, ix) is False:
+            # yarıda kalmış CONCURRENTLY denemesi
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY {ix}"))
+        await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {ix} ON {child} {_expr(key)}"))
+        await conn.execute(text(f"ALTER INDEX {parent_ix} ATTACH PARTITION {ix}"))
+        print(f"  {ix}")
+
+
+async def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if not args.database_url:
+        print("DATABASE_URL (ya da --database-url) gerekli", file=sys.stderr)
+        return 1
+    bad = [k for k in args.keys if not _KEY_RE.match(k)]
+    if bad:
+        print(f"geçersiz anahtar: {', '.join(bad)}", file=sys.stderr)
+        return 1
+    engine = create_async_engine(args.database_url)
+    try:
+        async with engine.connect() as conn:
+            # CONCURRENTLY transaction dışında çalışır
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for key in args.keys:
+                if args.drop:
+                    await conn.execute(text(f"DROP INDEX IF EXISTS ix_{PARENT}_meta_{key}"))
+                    print(f"dropped ix_{PARENT}_meta_{key}")
+                else:
+                    print(f"ix_{PARENT}_meta_{key}:")
+                    await create_index(conn, key)
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
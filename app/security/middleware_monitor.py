@@ -13,7 +13,10 @@ from app.metrics import SUSPICIOUS_REQUESTS, ZSCORE_ANOMALIES
 from app.security.ip_utils import get_client_info, is_allowlisted
 # Alerts (optional, new path)
 from app.alerts import AlertManager, make_payload  # noqa: F401
+from app.anomaly.batch import get_batch_scorer
 from app.anomaly.zscore import ZScoreWindow
+from app.observability.paths import get_path_normalizer
+from app.services.event_writer import get_event_writer
 
 # Z-score: client başına son alert attığımız bucket index (floor(now / bucket_sec))
 _Z_BUCKET_LAST_ALERT: Dict[str, int] = {}
@@ -66,17 +69,23 @@ def _inc_metric_suspicious(ip_hash: str, reason: str) -> None:
 
 def _create_event(request: Request, ip_hash: str, reason: str, severity: int = 1) -> None:
     """
-    DB event yazımı uygulamaya gömükse burada içe import yapıyoruz.
-    İçe import başarısızsa sessiz geçiyoruz.
+    Event'i arka plan writer kuyruğuna bırakır (DB gecikmesi istek yolunda değil).
+    Kuyruk doluysa event düşer; events_dropped_total metriğinde görünür.
     """
     try:
-        # Örnek bir event kaydedici fonksiyon adı. Projene uygun şekilde
-        # routes_events içinde ya da repo katmanında neyse onu import et.
-        from app.api.routes_events import create_event_programmatic  # type: ignore
-        ua = request.headers.get("User-Agent", "-")
-        path = request.url.path
+        raw = request.url.path
+        path = get_path_normalizer().normalize(raw)
         meta = {"client_ip_masked": True}
-        create_event_programmatic(ip_hash=ip_hash, ua=ua, path=path, reason=reason, severity=severity, meta=meta)
+        if path != raw:
+            meta["raw_path"] = raw
+        get_event_writer().submit(
+            ip_hash=ip_hash,
+            ua=request.headers.get("User-Agent", "-"),
+            path=path,
+            reason=reason,
+            severity=severity,
+            meta=meta,
+        )
     except Exception:
         # Opsiyonel: log'a yaz
         # print(f"[monitor] event yazılamadı: {reason}")
@@ -118,6 +127,8 @@ class MonitorMiddleware(BaseHTTPMiddleware):
         self.z_window_min = _env_int("ZSCORE_WINDOW_MIN", 15)
         self.z_min_samples = _env_int("ZSCORE_MIN_SAMPLES", 5)
         self.z_threshold = float(os.getenv("ZSCORE_THRESHOLD", "3.0"))
+        # ZSCORE_BATCH_ENABLED + numpy: skorlar kova kapanışında toplu hesaplanır
+        self.z_batch = get_batch_scorer() if self.z_enabled else None
 
     async def dispatch(self, request: Request, call_next):
         ip, ip_h = get_client_info(request)
@@ -183,7 +194,7 @@ class MonitorMiddleware(BaseHTTPMiddleware):
                                 make_payload(
                                     "rate_abuse",
                                     ip_h,
-                                    request.url.path,
+                                    get_path_normalizer().normalize(request.url.path),
                                     "threshold_exceeded",
                                     meta,
                                 )
@@ -194,18 +205,25 @@ class MonitorMiddleware(BaseHTTPMiddleware):
 
         # 3) Z-score anomali (client-bazlı)
         if self.z_enabled:
-            zs = _ZSCORE_BY_CLIENT.get(ip_h)
-            if zs is None:
-                zs = ZScoreWindow(
-                    bucket_sec=self.z_bucket_sec,
-                    window_min=self.z_window_min,
-                    min_samples=self.z_min_samples,
-                    threshold=self.z_threshold,
-                )
-                _ZSCORE_BY_CLIENT[ip_h] = zs
-            z, is_anom = zs.add_hit(now)
-            if is_anom:
+            if self.z_batch is not None:
+                # arka plan scorer: istek yolunda yalnızca sayaç + son kapanan kovanın sonucu
+                self.z_batch.hit(ip_h)
+                z = self.z_batch.lookup(ip_h)
+                is_anom = z is not None
+                bidx = self.z_batch.published_bucket
+            else:
+                zs = _ZSCORE_BY_CLIENT.get(ip_h)
+                if zs is None:
+                    zs = ZScoreWindow(
+                        bucket_sec=self.z_bucket_sec,
+                        window_min=self.z_window_min,
+                        min_samples=self.z_min_samples,
+                        threshold=self.z_threshold,
+                    )
+                    _ZSCORE_BY_CLIENT[ip_h] = zs
+                z, is_anom = zs.add_hit(now)
                 bidx = int(now // max(self.z_bucket_sec, 1))
+            if is_anom:
                 if _Z_BUCKET_LAST_ALERT.get(ip_h) != bidx:
                     _Z_BUCKET_LAST_ALERT[ip_h] = bidx
                     # 1) metrik
@@ -220,7 +238,8 @@ class MonitorMiddleware(BaseHTTPMiddleware):
                             meta = {"z": z, "threshold": self.z_threshold, "bucket": bidx}
                             asyncio.create_task(
                                 alerts.emit(
-                                    make_payload("zscore_anomaly", ip_h, request.url.path, "z_exceeded", meta)
+                                    make_payload("zscore_anomaly", ip_h, get_path_normalizer().normalize(request.url.path),
+                                                 "z_exceeded", meta)
                                 )
                             )
                     except Exception:
@@ -9,8 +9,8 @@ from app.security.ip_utils import get_client_info, is_allowlisted
 from time import time
 import asyncio
 from typing import Optional, Dict, Any, Dict as _Dict
-from app.db.session import SessionLocal
-from app.repositories.events import insert_event
+from app.observability.paths import get_path_normalizer
+from app.services.event_writer import get_event_writer
 
 
 # Process-local shadow counter (pytest/sade parserlar için deterministik toplama)
@@ -197,6 +197,10 @@ class QuarantineMiddleware(BaseHTTPMiddleware):
                 if self.debug:
                     print("[quarantine] suspicious inc failed (ignored)")
 
+        # event/alert path'i: route şablonu ya da kurallarla şablonlanmış hâli
+        path_norm = get_path_normalizer().normalize(path)
+        raw_meta = {"raw_path": path} if path_norm != path else {}
+
         # 4) Ban kontrol
         if float(rec.get("ban", 0.0)) > now_ts:
             if self.debug:
@@ -220,30 +224,27 @@ class QuarantineMiddleware(BaseHTTPMiddleware):
                 pass
             self._recalc_ipcount(now_ts)
 
-            # DB event write (blocked request while already banned)
+            # DB event (blocked request while already banned) -> arka plan writer kuyruğu
             try:
-                async with SessionLocal() as s:
-                    await insert_event(
-                        s,
-                        ip_hash=key,
-                        ua=request.headers.get("user-agent"),
-                        path=str(request.url.path),
-                        reason="quarantine_block",
-                        score=None,
-                        severity=2,
-                        meta={"status": self.block_status, "phase": "already_banned"},
-                    )
-                    await s.commit()
+                get_event_writer().submit(
+                    ip_hash=key,
+                    ua=request.headers.get("user-agent"),
+                    path=path_norm,
+                    reason="quarantine_block",
+                    score=None,
+                    severity=2,
+                    meta={"status": self.block_status, "phase": "already_banned", **raw_meta},
+                )
             except Exception as e:
                 if self.debug:
-                    print(f"[quarantine] event write failed: {e}")
+                    print(f"[quarantine] event enqueue failed: {e}")
 
             # Alert (fire-and-forget) for active ban block
             try:
                 alerts = getattr(request.app.state, "alerts", None)
                 if alerts is not None:
                     asyncio.create_task(alerts.emit(
-                        make_payload("quarantine_block", key, request.url.path, "active_ban")
+                        make_payload("quarantine_block", key, path_norm, "active_ban")
                     ))
             except Exception:
                 pass
@@ -285,29 +286,27 @@ class QuarantineMiddleware(BaseHTTPMiddleware):
                 pass
             self._recalc_ipcount(now_ts)
 
-            # DB event write (ban just set)
+            # DB event (ban just set) -> arka plan writer kuyruğu
             try:
-                async with SessionLocal() as s:
-                    await insert_event(
-                        s,
-                        ip_hash=key,
-                        ua=request.headers.get("user-agent"),
-                        path=str(request.url.path),
-                        reason="quarantine_block",
-                        score=None,
-                        severity=2,
-                        meta={
-                            "status": self.block_status,
-                            "phase": "ban_set",
-                            "count": rec["c"],
-                            "threshold": self.threshold,
-                            "window_seconds": self.win_seconds,
-                        },
-                    )
-                    await s.commit()
+                get_event_writer().submit(
+                    ip_hash=key,
+                    ua=request.headers.get("user-agent"),
+                    path=path_norm,
+                    reason="quarantine_block",
+                    score=None,
+                    severity=2,
+                    meta={
+                        "status": self.block_status,
+                        "phase": "ban_set",
+                        "count": rec["c"],
+                        "threshold": self.threshold,
+                        "window_seconds": self.win_seconds,
+                        **raw_meta,
+                    },
+                )
             except Exception as e:
                 if self.debug:
-                    print(f"[quarantine] event write failed: {e}")
+                    print(f"[quarantine] event enqueue failed: {e}")
 
             # Alert (fire-and-forget) when ban is set due to threshold
             try:
@@ -315,7 +314,7 @@ class QuarantineMiddleware(BaseHTTPMiddleware):
                 if alerts is not None:
                     meta = {"count": rec["c"], "threshold": self.threshold}
                     asyncio.create_task(alerts.emit(
-                        make_payload("quarantine_block", key, request.url.path, "ban_set", meta)
+                        make_payload("quarantine_block", key, path_norm, "ban_set", meta)
                     ))
             except Exception:
                 pass
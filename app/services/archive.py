@@ -0,0 +1,233 @@
+# app/services/archive.py
+"""
+Retention öncesi arşivleme: süresi dolan günler, DB'den silinmeden önce gün başına
+sıkıştırılmış NDJSON dosyalarına yazılır (ARCHIVE_DIR/events-YYYY-MM-DD.<id>.ndjson.gz).
+Satırlar server-side cursor ile (yield_per) okunur; bellek kullanımı sabittir.
+
+Bir gün birden çok parçadan oluşabilir: <id>, parçadaki en büyük event id'sidir. Gün
+arşivlendikten sonra gelen satırlar (spool replay'i, eski ts'li bulk ingest) sonraki
+çalışmada yalnızca id'si arşivdekilerden büyük olanlarla yeni bir parçaya yazılır;
+böylece arşivlenmeden silinmezler. Eski adlandırmadaki (id'siz) dosyalar da okunur.
+
+Okuma tarafı (search_archive) yalnızca istenen zaman aralığına düşen gün dosyalarını tarar.
+
+Sıkıştırma: varsayılan gzip (stdlib). ARCHIVE_COMPRESSION=zstd ve `zstandard`
+paketi kuruluysa .ndjson.zst yazılır; paket yoksa gzip'e düşülür.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import io
+import json
+import os
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Event
+from app.repositories.events import stream_events
+from app.repositories.lookups import normalize_ip_hash
+from app.services.export import ndjson_chunk
+
+try:  # opsiyonel bağımlılık
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None
+
+_FILE_RE = re.compile(r"^events-(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.ndjson\.(gz|zst)$")
+_STREAM_ROWS = 5000
+
+
+def archive_dir() -> Optional[str]:
+    """ARCHIVE_DIR boşsa arşivleme kapalıdır."""
+    d = os.getenv("ARCHIVE_DIR", "").strip()
+    return d or None
+
+
+def _ext() -> str:
+    if os.getenv("ARCHIVE_COMPRESSION", "gzip").lower() == "zstd" and zstandard is not None:
+        return "zst"
+    return "gz"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _archive_parts(directory: str) -> List[Tuple[date, Optional[int], str]]:
+    """(gün, parçanın son id'si ya da eski adlandırmada None, tam yol); gün ve parça sırasıyla."""
+    out = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        m = _FILE_RE.match(name)
+        if m:
+            last = int(m.group(2)) if m.group(2) else None
+            out.append((date.fromisoformat(m.group(1)), last, os.path.join(directory, name)))
+    return sorted(out, key=lambda x: (x[0], -1 if x[1] is None else x[1]))
+
+
+def list_archive_files(directory: str) -> List[Tuple[date, str]]:
+    """(gün, tam yol) listesi, gün ve parça sırasıyla (bir günün birden çok parçası olabilir)."""
+    return [(d, path) for d, _, path in _archive_parts(directory)]
+
+
+def _open_write(path: str):
+    if path.endswith(".zst"):
+        raw = open(path, "wb")
+        return zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+    return gzip.open(path, "wb", compresslevel=6)
+
+
+def _open_read(path: str):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard not installed, cannot read {path}")
+        raw = open(path, "rb")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return gzip.open(path, "rb")
+
+
+def _max_id(path: str) -> int:
+    """Eski adlandırmadaki (id'siz) parçanın kapsadığı en büyük id (dosya bir kez taranır)."""
+    return max((int(row["id"]) for row in _iter_file(path)), default=0)
+
+
+async def archive_day(session: AsyncSession, day: date, directory: str) -> int:
+    """
+    Bir günün henüz arşivlenmemiş satırlarını (id > mevcut parçaların son id'si) yeni bir
+    parçaya yazar; yeni satır yoksa 0 döner. Önce .part'a yazılır, bitince atomik rename.
+    """
+    os.makedirs(directory, exist_ok=True)
+    after = None
+    for d, last, path in _archive_parts(directory):
+        if d == day:
+            if last is None:
+                last = await asyncio.to_thread(_max_id, path)
+            after = last if after is None else max(after, last)
+    tmp = os.path.join(directory, f"events-{day.isoformat()}.ndjson.{_ext()}.part")
+    n, top = 0, after or 0
+    fh = await asyncio.to_thread(_open_write, tmp)
+    try:
+        async for part in stream_events(
+            session, start_ts=_day_start(day), end_ts=_day_start(day + timedelta(days=1)),
+            chunk_rows=_STREAM_ROWS, after_id=after,
+        ):
+            await asyncio.to_thread(fh.write, ndjson_chunk(part))
+            n += len(part)
+            top = max(top, max(r.id for r in part))
+    except BaseException:
+        await asyncio.to_thread(fh.close)
+        os.unlink(tmp)
+        raise
+    await asyncio.to_thread(fh.close)
+    if n == 0:
+        os.unlink(tmp)
+        return 0
+    os.replace(tmp, os.path.join(directory, f"events-{day.isoformat()}.{top}.ndjson.{_ext()}"))
+    return n
+
+
+async def archive_expired(session: AsyncSession, cutoff: datetime, directory: str) -> int:
+    """
+    cutoff'tan önce TAMAMEN biten günleri arşivler (cutoff gün sınırına yuvarlanmış olmalı).
+    Dönen değer arşive yazılan satır sayısıdır.
+    """
+    oldest = (await session.execute(select(func.min(Event.ts)).where(Event.ts < cutoff))).scalar()
+    if oldest is None:
+        return 0
+    day = oldest.astimezone(timezone.utc).date()
+    total = 0
+    while _day_start(day + timedelta(days=1)) <= cutoff:
+        total += await archive_day(session, day, directory)
+        day += timedelta(days=1)
+    return total
+
+
+def prune_archive(directory: str, keep_days: int) -> int:
+    """keep_days'ten eski arşiv dosyalarını siler."""
+    limit = datetime.now(timezone.utc).date() - timedelta(days=keep_days)
+    removed = 0
+    for day, path in list_archive_files(directory):
+        if day < limit:
+            os.unlink(path)
+            removed += 1
+    return removed
+
+
+# --- Okuma yolu --------------------------------------------------------------
+
+def _iter_file(path: str) -> Iterator[Dict[str, Any]]:
+    with _open_read(path) as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _scan(
+    directory: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    ip_hash: Optional[str],
+    reason: Optional[str],
+    path: Optional[str],
+    limit: int,
+    offset: int,
+) -> Tuple[List[Dict[str, Any]], int]:
+    files = list_archive_files(directory)
+    if start is not None:
+        files = [f for f in files if f[0] >= start.astimezone(timezone.utc).date()]
+    if end is not None:
+        files = [f for f in files if _day_start(f[0]) < end]
+    # canlı tablodaki gibi: 16 hex ya da sha256 öneki (eski arşivlerde ham değerler de olabilir)
+    ip_hash = normalize_ip_hash(ip_hash) if ip_hash else None
+    items: List[Dict[str, Any]] = []
+    skipped = 0
+    scanned = 0
+    for _, fpath in files:
+        scanned += 1
+        for row in _iter_file(fpath):
+            if ip_hash and normalize_ip_hash(row.get("ip_hash")) != ip_hash:
+                continue
+            if reason and row.get("reason") != reason:
+                continue
+            if path and row.get("path") != path:
+                continue
+            if start is not None or end is not None:
+                ts = datetime.fromisoformat(row["ts"])
+                if start is not None and ts < start:
+                    continue
+                if end is not None and ts >= end:
+                    continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            items.append(row)
+            if len(items) >= limit:
+                return items, scanned
+    return items, scanned
+
+
+async def search_archive(
+    directory: str,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    ip_hash: Optional[str] = None,
+    reason: Optional[str] = None,
+    path: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Arşivde /events/search benzeri filtreleme. Sonuçlar gün sırasıyla, gün içinde parça
+    sırasıyla (her parça eskiden yeniye; geç gelen satırlar günün sonraki parçasındadır).
+    (items, taranan dosya sayısı) döndürür. Dosya IO/decompress thread'de çalışır.
+    """
+    return await asyncio.to_thread(_scan, directory, start, end, ip_hash, reason, path, limit, offset)
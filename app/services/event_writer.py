@@ -0,0 +1,314 @@
+# app/services/event_writer.py
+"""
+In-process arka plan event yazıcısı.
+
+Middleware'ler event'i DB'ye istek yolunda yazmaz; submit() ile sınırlı bir
+kuyruğa bırakır ve yanıtı hemen döner. Arka plandaki görev kuyruğu
+EVENT_WRITER_BATCH_SIZE dolunca ya da EVENT_WRITER_FLUSH_SEC dolunca tek bir
+çok-satırlı INSERT ile yazar; DB batch'i reddederse satırlar tek tek yazılır.
+
+Flush DB devre kesicisinin arkasındadır: EVENT_WRITER_FLUSH_TIMEOUT_SEC içinde
+bitmeyen (havuz/connect beklemesi dahil) ya da DB_STATEMENT_TIMEOUT_MS'i aşan
+sorgular hata sayılır; kesici açıkken batch DB'yi beklemeden düşer.
+
+SPOOL_DIR ayarlıysa (varsayılan boş: kapalı) yazılamayan batch düşmek yerine diskteki
+spool'a eklenir ve DB sağlıklıyken geri yüklenir (app.services.spool). Her batch'in
+bir anahtarı vardır; event'lerle aynı transaction'da event_batches defterine yazılır,
+böylece replay aynı batch'i iki kez yazmaz.
+
+Düşürme politikası (events_dropped_total{reason=...}):
+  - queue_full : kuyruk dolu, yeni event kabul edilmedi
+  - db_error   : DB erişilemedi/zaman aşımı (spool kapalı)
+  - data_error : DB satırı reddetti (kısıt/veri hatası); batch reddedilince satırlar tek
+                 tek yeniden denenir, yalnızca reddedilen satır düşer (spool'a gitmez)
+  - breaker_open: DB devre kesicisi açık, yazım denenmedi (spool kapalı)
+  - spool_full : spool SPOOL_MAX_BYTES'a ulaştı ya da diske yazılamadı
+  - shutdown   : kapanışta süre doldu ya da kapanış sonrası submit
+  - no_loop    : çalışan event loop yok (sync bağlam)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.backends import set_statement_timeout
+from app.db.breaker import BreakerOpen, CircuitBreaker, get_db_breaker, is_db_failure
+from app.metrics import (
+    EVENTS_ENQUEUED,
+    EVENTS_WRITTEN,
+    EVENTS_DROPPED,
+    EVENT_QUEUE_DEPTH,
+    EVENT_FLUSH_SECONDS,
+    EVENT_BATCH_SIZE,
+)
+from app.services.hot_tail import get_hot_tail
+from app.services.query_cache import get_query_cache
+from app.services.spool import Spool, get_spool
+
+# Çok-satırlı INSERT: 8 kolon x 4000 satır, asyncpg'nin 32767 parametre sınırının altında kalır
+_MAX_BATCH = 4000
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+class EventWriter:
+    """
+    Sınırlı kuyruk + boyut/süre tetiklemeli toplu yazım.
+      - submit(): non-blocking; kuyruk doluysa event düşer ve metrikte görünür.
+      - start(): görev çalışan loop'ta başlar (submit de gerekirse tembel başlatır).
+      - stop(): kuyrukta kalanları yazar (graceful shutdown).
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        *,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        flush_timeout: float = 5.0,
+        statement_timeout_ms: int = 2000,
+        breaker: Optional[CircuitBreaker] = None,
+        spool: Optional[Spool] = None,
+        debug: bool = False,
+    ):
+        self._session_factory = session_factory
+        self._breaker = breaker
+        self.spool = spool
+        self.max_queue = max(1, int(max_queue))
+        self.batch_size = max(1, min(int(batch_size), _MAX_BATCH))
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.flush_timeout = float(flush_timeout) if flush_timeout and flush_timeout > 0 else None
+        self.statement_timeout_ms = max(0, int(statement_timeout_ms))
+        self.debug = debug
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+
+    # --- public API ---------------------------------------------------------
+
+    def submit(self, **fields: Any) -> bool:
+        """Event'i kuyruğa bırak. ts verilmezse şimdiki UTC zaman kullanılır."""
+        if self._closing:
+            EVENTS_DROPPED.labels(reason="shutdown").inc()
+            return False
+        if not self._ensure_started():
+            EVENTS_DROPPED.labels(reason="no_loop").inc()
+            return False
+        fields.setdefault("ts", datetime.now(timezone.utc))
+        try:
+            self._queue.put_nowait(fields)
+        except asyncio.QueueFull:
+            EVENTS_DROPPED.labels(reason="queue_full").inc()
+            return False
+        EVENTS_ENQUEUED.inc()
+        depth = self._queue.qsize()
+        EVENT_QUEUE_DEPTH.set(depth)
+        if depth >= self.batch_size:
+            self._full.set()
+        return True
+
+    async def start(self) -> None:
+        self._closing = False
+        self._ensure_started()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Yeni kabulü durdur, elde ve kuyrukta kalanları yaz."""
+        self._closing = True
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        if self._inflight is not None:
+            await asyncio.gather(self._inflight, return_exceptions=True)
+            self._inflight = None
+
+        pending: List[Dict[str, Any]] = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        EVENT_QUEUE_DEPTH.set(0)
+
+        done = 0
+
+        async def _drain():
+            nonlocal done
+            while done < len(pending):
+                chunk = pending[done:done + self.batch_size]
+                await self._flush(chunk)
+                done += len(chunk)
+
+        try:
+            await asyncio.wait_for(_drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            EVENTS_DROPPED.labels(reason="shutdown").inc(len(pending) - done)
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # --- internals ----------------------------------------------------------
+
+    def _factory(self):
+        if self._session_factory is None:
+            # içe import: DATABASE_URL kontrolü yalnızca gerçekten yazarken devreye girsin
+            from app.db.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    def _ensure_started(self) -> bool:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._task is not None and self._loop is loop and not self._task.done():
+            return True
+        if self._queue is not None and self._loop is not loop and self._queue.qsize():
+            # eski loop kapandı; orada kalanlar yazılamaz
+            EVENTS_DROPPED.labels(reason="shutdown").inc(self._queue.qsize())
+        if self._queue is None or self._loop is not loop:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._full = asyncio.Event()
+        self._loop = loop
+        self._task = loop.create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        q = self._queue
+        while True:
+            first = await q.get()
+            batch = [first]
+            if q.qsize() + 1 < self.batch_size:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            # iptal (stop) gelirse bu batch yarıda kalmasın
+            self._inflight = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        t0 = time.perf_counter()
+        key = uuid.uuid4().hex
+        try:
+            await self._write(key, batch)
+        except BreakerOpen:
+            await self._spool_or_drop(key, batch, "breaker_open")
+        except Exception as e:
+            if self.debug:
+                print(f"[event_writer] flush failed ({len(batch)} rows): {e}")
+            if is_db_failure(e):
+                await self._spool_or_drop(key, batch, "db_error")
+            else:
+                # tek bir bozuk satır tüm batch'i düşürmesin: satır satır dene
+                await self._write_rows(batch)
+        finally:
+            EVENT_FLUSH_SECONDS.observe(time.perf_counter() - t0)
+            EVENT_BATCH_SIZE.observe(len(batch))
+            EVENT_QUEUE_DEPTH.set(self.qsize())
+
+    async def _write(self, key: str, batch: List[Dict[str, Any]]) -> None:
+        from app.repositories.events import claim_batch_keys, insert_events, insert_events_returning
+
+        tail = get_hot_tail()
+        breaker = self._breaker or get_db_breaker()
+        async with breaker.guard(timeout=self.flush_timeout), self._factory()() as s:
+            if self.statement_timeout_ms and isinstance(s, AsyncSession):
+                await set_statement_timeout(s, self.statement_timeout_ms)
+            if self.spool is not None:
+                await claim_batch_keys(s, [key])
+            if tail.enabled:
+                written = await insert_events_returning(s, batch)
+                n = len(written)
+            else:
+                n = await insert_events(s, batch)
+            await s.commit()
+        EVENTS_WRITTEN.inc(n)
+        ts = [r["ts"] for r in batch]
+        get_query_cache().invalidate_range(min(ts), max(ts))
+        if tail.enabled:
+            tail.add(written)
+
+    async def _write_rows(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        DB batch'i reddetti: her satır kendi transaction'ında (savepoint değil: lookup
+        id'leri transaction sonunda cache'e girer) yazılır; yalnızca reddedilen satır
+        data_error olarak düşer. DB bu sırada erişilemez olursa kalanlar spool'a gider.
+        """
+        for i, row in enumerate(batch):
+            key = uuid.uuid4().hex
+            try:
+                await self._write(key, [row])
+            except Exception as e:
+                if isinstance(e, BreakerOpen) or is_db_failure(e):
+                    reason = "breaker_open" if isinstance(e, BreakerOpen) else "db_error"
+                    # bu satır commit olmuş olabilir: kendi anahtarıyla, kalanlar yeni anahtarla
+                    await self._spool_or_drop(key, [row], reason)
+                    if batch[i + 1:]:
+                        await self._spool_or_drop(uuid.uuid4().hex, batch[i + 1:], reason)
+                    return
+                if self.debug:
+                    print(f"[event_writer] row rejected: {e}")
+                EVENTS_DROPPED.labels(reason="data_error").inc()
+
+    async def _spool_or_drop(self, key: str, batch: List[Dict[str, Any]], reason: str) -> None:
+        if self.spool is None:
+            EVENTS_DROPPED.labels(reason=reason).inc(len(batch))
+            return
+        try:
+            ok = await asyncio.to_thread(self.spool.append, key, batch)
+        except Exception as e:
+            ok = False
+            if self.debug:
+                print(f"[event_writer] spool append failed ({len(batch)} rows): {e}")
+        if not ok:
+            EVENTS_DROPPED.labels(reason="spool_full").inc(len(batch))
+
+
+_WRITER: Optional[EventWriter] = None
+
+
+def get_event_writer() -> EventWriter:
+    """Process-local tekil writer (env ile yapılandırılır)."""
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = EventWriter(
+            max_queue=_env_int("EVENT_WRITER_QUEUE_MAX", 10000),
+            batch_size=_env_int("EVENT_WRITER_BATCH_SIZE", 500),
+            flush_interval=_env_float("EVENT_WRITER_FLUSH_SEC", 0.5),
+            flush_timeout=_env_float("EVENT_WRITER_FLUSH_TIMEOUT_SEC", 5.0),
+            statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", 2000),
+            spool=get_spool(),
+            debug=os.getenv("QUARANTINE_DEBUG", "0").lower() in ("1", "true", "yes", "on"),
+        )
+    return _WRITER
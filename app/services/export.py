@@ -0,0 +1,96 @@
+# app/services/export.py
+"""
+Olay dışa aktarımı: satır serileştiricileri (NDJSON/CSV) ve akış sıkıştırıcıları.
+
+GET /events/export ve retention arşivi aynı NDJSON satır biçimini kullanır.
+Serileştirme ve sıkıştırma parça (chunk) bazında yapılır; bellek sabit kalır.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, Iterable, Optional
+
+try:  # opsiyonel bağımlılık
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None
+
+COLUMNS = ("id", "ts", "ip_hash", "ua", "path", "reason", "score", "severity", "meta")
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def ndjson_line(r: Any) -> bytes:
+    return (json.dumps({
+        "id": r.id,
+        "ts": r.ts.isoformat(),
+        "ip_hash": r.ip_hash,
+        "ua": r.ua,
+        "path": r.path,
+        "reason": r.reason,
+        "score": r.score,
+        "severity": r.severity,
+        "meta": r.meta,
+    }, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def ndjson_chunk(rows: Iterable[Any]) -> bytes:
+    return b"".join(ndjson_line(r) for r in rows)
+
+
+def csv_header() -> bytes:
+    return (",".join(COLUMNS) + "\r\n").encode("utf-8")
+
+
+def csv_chunk(rows: Iterable[Any]) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for r in rows:
+        w.writerow((
+            r.id, r.ts.isoformat(), r.ip_hash, r.ua, r.path, r.reason, r.score, r.severity,
+            None if r.meta is None else json.dumps(r.meta, ensure_ascii=False),
+        ))
+    return buf.getvalue().encode("utf-8")
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+
+def compressor(kind: str):
+    """compress(bytes)/flush() arayüzlü akış sıkıştırıcı; zstd paketi yoksa ValueError."""
+    if kind == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if kind == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        return _Zstd()
+    if kind == "none":
+        return _Identity()
+    raise ValueError(f"unknown compression: {kind}")
+
+
+def filename(fmt: str, compression: str, stem: Optional[str] = None) -> str:
+    return f"{stem or 'events'}.{FORMATS[fmt][1]}{COMPRESSIONS[compression]}"
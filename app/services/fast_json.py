@@ -0,0 +1,97 @@
+# app/services/fast_json.py
+"""
+Olay listesi yanıtlarının hızlı JSON serileştirmesi (GET /events, /events/search).
+
+Satır başına pydantic model kurup doğrulamak yerine EventRow'lar doğrudan dict'e,
+sayfa tek seferde JSON bayta çevrilir. orjson (opsiyonel) kuruluysa o kullanılır;
+çıktı, önceki yolun (pydantic + Starlette JSONResponse: json.dumps, ensure_ascii=False,
+ayırıcılar ",", ":") ürettiği baytlarla birebir aynıdır:
+
+  - ts: GET /events pydantic json modunda UTC'yi "Z" ile yazar (OPT_UTC_Z);
+    /events/search isoformat ("+00:00") kullanır.
+  - orjson üstel gösterimli float'ları (1e-05, 1e+16) farklı yazar, NaN/inf'i null
+    yapar, 64 bit dışı tamsayıyı reddeder: sayfada böyle bir değer varsa stdlib json'a
+    düşülür (ender; meta içindeki değerler de taranır).
+"""
+from __future__ import annotations
+
+import json
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi.responses import Response
+
+try:  # opsiyonel bağımlılık
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+EVENT_FIELDS = ("id", "ts", "ip_hash", "ua", "path", "reason", "score", "severity", "meta")
+
+
+def parse_fields(spec: Optional[str]) -> Optional[tuple]:
+    """"ts,reason,path" -> EVENT_FIELDS sırasında tuple; boşsa None (tüm alanlar)."""
+    if not spec:
+        return None
+    want = {f.strip() for f in spec.split(",") if f.strip()}
+    bad = sorted(want - set(EVENT_FIELDS))
+    if bad:
+        raise ValueError(f"unknown fields: {', '.join(bad)} (allowed: {', '.join(EVENT_FIELDS)})")
+    return tuple(f for f in EVENT_FIELDS if f in want) or None
+
+
+def event_dicts(rows: Iterable[Any], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    names = fields or EVENT_FIELDS
+    return [{f: getattr(r, f) for f in names} for r in rows]
+
+
+def _orjson_safe(v: Any) -> bool:
+    """orjson bu değeri json.dumps ile aynı baytlarla yazar mı?"""
+    if v is None or v is True or v is False or isinstance(v, (str, datetime)):
+        return True
+    if isinstance(v, float):
+        a = abs(v)
+        return math.isfinite(v) and (a == 0.0 or 1e-4 <= a < 1e16)
+    if isinstance(v, int):
+        return -(1 << 63) <= v < (1 << 64)
+    if isinstance(v, dict):
+        return all(isinstance(k, str) and _orjson_safe(x) for k, x in v.items())
+    if isinstance(v, (list, tuple)):
+        return all(_orjson_safe(x) for x in v)
+    return False
+
+
+def _stdlib_default(o: Any):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(content: Any, *, utc_z: bool = False) -> bytes:
+    if orjson is not None and _orjson_safe(content):
+        try:
+            return orjson.dumps(content, option=orjson.OPT_UTC_Z if utc_z else 0)
+        except orjson.JSONEncodeError:
+            pass
+    if utc_z:
+        content = _z_timestamps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+        default=_stdlib_default,
+    ).encode("utf-8")
+
+
+def _z_timestamps(v: Any) -> Any:
+    if isinstance(v, datetime):
+        s = v.isoformat()
+        return s[:-6] + "Z" if s.endswith("+00:00") else s
+    if isinstance(v, dict):
+        return {k: _z_timestamps(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_z_timestamps(x) for x in v]
+    return v
+
+
+def json_response(content: Any, *, utc_z: bool = False) -> Response:
+    return Response(content=dumps(content, utc_z=utc_z), media_type="application/json")
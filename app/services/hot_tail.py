@@ -0,0 +1,234 @@
+# app/services/hot_tail.py
+"""
+Son olayların process içi halka tamponu (hot tail).
+
+Yazım yolu (event writer flush'ı, POST /events) commit edilen satırları buraya da
+ekler; GET /events ve /events/search, zaman aralığı tamamen tamponun kapsadığı
+bölgedeyse (since verilmiş ve kapsama sınırından yeni) DB'ye gitmeden buradan yanıtlanır.
+
+- Sınır: HOT_TAIL_MAX_EVENTS satır ve HOT_TAIL_MAX_AGE_SEC saniye (hangisi önce dolarsa).
+- Sıra (ts, id); ip_hash ve reason için ikincil indeksler (aynı sırada deque'ler).
+- Kapsama: _complete_after'dan yeni her olay tampondadır. Başlangıçta açılış anı;
+  tahliye edilen satırın ts'i ve tampona yansıtılamayan yazımlar (bulk COPY id
+  döndürmez) sınırı ileri taşır. Sınırın gerisine uzanan sorgular DB'ye düşer.
+
+Her process yalnızca kendi yazdıklarını görür: birden çok worker/instance aynı
+veritabanına yazıyorsa tampon eksik kalır, bu yüzden varsayılan kapalıdır (0).
+"""
+from __future__ import annotations
+
+import os
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.metrics import HOT_TAIL_EVENTS, HOT_TAIL_QUERIES
+from app.repositories.lookups import MATCH_MODES, EventRow, decode_ip_hash, encode_ip_hash
+
+
+def _key(r: EventRow) -> Tuple[datetime, int]:
+    return (r.ts, r.id)
+
+
+def _matches(value: Optional[str], pattern: str, mode: str, icase: bool) -> bool:
+    """list_events'in path/ua desen anlamı (exact/prefix/contains, icase)."""
+    if value is None:
+        return False
+    if icase:
+        value, pattern = value.lower(), pattern.lower()
+    if mode == "prefix":
+        return value.startswith(pattern)
+    if mode == "contains":
+        return pattern in value
+    return value == pattern
+
+
+def _insort(dq: Deque[EventRow], r: EventRow) -> None:
+    """Sıralı deque'e ekle; satırlar neredeyse hep sona gelir, sağdan aranır."""
+    k = _key(r)
+    if not dq or _key(dq[-1]) <= k:
+        dq.append(r)
+        return
+    i = len(dq) - 1
+    while i >= 0 and _key(dq[i]) > k:
+        i -= 1
+    dq.insert(i + 1, r)
+
+
+class HotTail:
+    def __init__(self, max_events: int = 0, max_age_sec: float = 900.0):
+        self.max_events = max(0, int(max_events))
+        self.max_age = timedelta(seconds=max(1.0, float(max_age_sec)))
+        self._rows: Deque[EventRow] = deque()
+        self._by_ip: Dict[str, Deque[EventRow]] = {}
+        self._by_reason: Dict[Optional[str], Deque[EventRow]] = {}
+        self._complete_after = datetime.now(timezone.utc)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_events > 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def complete_after(self) -> datetime:
+        return self._complete_after
+
+    # --- yazım ------------------------------------------------------------------
+
+    def add(self, rows: Iterable[EventRow]) -> None:
+        """Commit edilmiş (id'li) satırları ekle."""
+        if not self.enabled:
+            return
+        for r in rows:
+            if r.ts <= self._complete_after:
+                continue
+            _insort(self._rows, r)
+            _insort(self._by_ip.setdefault(r.ip_hash, deque()), r)
+            _insort(self._by_reason.setdefault(r.reason, deque()), r)
+        self._expire()
+
+    def gap(self, until: datetime) -> None:
+        """until'e kadar tampona yansıtılamayan yazım oldu: kapsama until'den sonra başlar."""
+        if not self.enabled or until <= self._complete_after:
+            return
+        self._complete_after = until
+        while self._rows and self._rows[0].ts <= until:
+            self._evict()
+        HOT_TAIL_EVENTS.set(len(self._rows))
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._by_ip.clear()
+        self._by_reason.clear()
+        self._complete_after = datetime.now(timezone.utc)
+        HOT_TAIL_EVENTS.set(0)
+
+    def _evict(self) -> None:
+        r = self._rows.popleft()
+        if r.ts > self._complete_after:
+            self._complete_after = r.ts
+        for idx, k in ((self._by_ip, r.ip_hash), (self._by_reason, r.reason)):
+            d = idx.get(k)
+            if d is None:
+                continue
+            if d and d[0] is r:
+                d.popleft()
+            else:
+                try:
+                    d.remove(r)
+                except ValueError:
+                    pass
+            if not d:
+                del idx[k]
+
+    def _expire(self, now: Optional[datetime] = None) -> None:
+        horizon = (now or datetime.now(timezone.utc)) - self.max_age
+        while self._rows and (len(self._rows) > self.max_events or self._rows[0].ts < horizon):
+            self._evict()
+        if horizon > self._complete_after:
+            self._complete_after = horizon
+        HOT_TAIL_EVENTS.set(len(self._rows))
+
+    # --- okuma ------------------------------------------------------------------
+
+    def query(
+        self,
+        *,
+        start_ts: Optional[datetime],
+        end_ts: Optional[datetime] = None,
+        reason: Optional[str] = None,
+        path: Optional[str] = None,
+        ip_hash: Optional[str] = None,
+        ua: Optional[str] = None,
+        path_match: str = "exact",
+        ua_match: str = "exact",
+        icase: bool = False,
+        meta: Optional[dict] = None,
+        meta_filters: Sequence[tuple] = (),
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        total: str = "exact",
+    ) -> Optional[Tuple[Optional[int], List[EventRow]]]:
+        """
+        list_events ile aynı anlam ve sonuç ((total, rows), (ts, id) DESC); aralık
+        tamponun kapsamı dışındaysa None (çağıran DB'ye gider). total=estimate kesin sayar.
+        meta filtreleri (JSONB içerme anlamı) burada yeniden yazılmaz: DB'ye bırakılır.
+        """
+        from app.repositories.events import TOTAL_MODES, decode_cursor
+
+        if not self.enabled or start_ts is None or meta or meta_filters:
+            return None
+        self._expire()
+        if start_ts <= self._complete_after:
+            HOT_TAIL_QUERIES.labels(result="miss").inc()
+            return None
+        if total not in TOTAL_MODES:
+            raise ValueError(f"total must be one of {TOTAL_MODES}")
+        if path_match not in MATCH_MODES or ua_match not in MATCH_MODES:
+            raise ValueError(f"match must be one of {MATCH_MODES}")
+        after = decode_cursor(cursor) if cursor else None
+        ip = decode_ip_hash(encode_ip_hash(ip_hash)) if ip_hash else None
+
+        if ip:
+            seq = self._by_ip.get(ip, ())
+        elif reason:
+            seq = self._by_reason.get(reason, ())
+        else:
+            seq = self._rows
+        out: List[EventRow] = []
+        n = 0
+        skip = 0 if after else offset
+        for r in reversed(seq):
+            if r.ts < start_ts:
+                break
+            if end_ts is not None and r.ts >= end_ts:
+                continue
+            if (ip and r.ip_hash != ip) or (reason and r.reason != reason):
+                continue
+            if (path and not _matches(r.path, path, path_match, icase)) or (
+                ua and not _matches(r.ua, ua, ua_match, icase)
+            ):
+                continue
+            n += 1
+            if after is not None and _key(r) >= after:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            if len(out) < limit:
+                out.append(r)
+            elif total == "none":
+                break
+        HOT_TAIL_QUERIES.labels(result="hit").inc()
+        return (None if total == "none" else n), out
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+_TAIL: Optional[HotTail] = None
+
+
+def get_hot_tail() -> HotTail:
+    """Process-local tekil tampon (env ile yapılandırılır; HOT_TAIL_MAX_EVENTS=0 kapalı)."""
+    global _TAIL
+    if _TAIL is None:
+        _TAIL = HotTail(
+            max_events=_env_int("HOT_TAIL_MAX_EVENTS", 0),
+            max_age_sec=_env_float("HOT_TAIL_MAX_AGE_SEC", 900.0),
+        )
+    return _TAIL
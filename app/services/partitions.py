@@ -0,0 +1,133 @@
+# app/services/partitions.py
+"""
+events tablosunun günlük RANGE bölümlerinin bakımı.
+
+Bölüm adı: events_pYYYYMMDD, aralık [gün 00:00 UTC, ertesi gün 00:00 UTC).
+Kapsanmayan zaman damgaları events_default bölümüne düşer; yeni bölüm açılırken
+default'taki o güne ait satırlar yeni bölüme taşınır (ATTACH kontrolü geçsin diye).
+"""
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.backends import backend_name
+
+PARENT = "events"
+DEFAULT_PARTITION = "events_default"
+_NAME_RE = re.compile(r"^events_p(\d{8})$")
+
+
+def partition_name(day: date) -> str:
+    return f"events_p{day:%Y%m%d}"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+async def is_partitioned(session: AsyncSession) -> bool:
+    if backend_name(session) != "postgresql":
+        return False
+    q = text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t))"
+    )
+    return bool((await session.execute(q, {"t": PARENT})).scalar())
+
+
+async def list_partitions(session: AsyncSession) -> List[Tuple[str, date]]:
+    """Günlük bölümleri (ad, gün) olarak gün sırasıyla döndürür; default hariç."""
+    q = text(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:t)
+        """
+    )
+    out = []
+    for (name,) in (await session.execute(q, {"t": PARENT})).all():
+        m = _NAME_RE.match(name)
+        if m:
+            out.append((name, datetime.strptime(m.group(1), "%Y%m%d").date()))
+    return sorted(out, key=lambda x: x[1])
+
+
+async def create_partition(session: AsyncSession, day: date) -> bool:
+    """Gün bölümünü oluştur; zaten varsa False. Default'taki o güne ait satırları taşır."""
+    name = partition_name(day)
+    exists = (await session.execute(text("SELECT to_regclass(:n) IS NOT NULL"), {"n": name})).scalar()
+    if exists:
+        return False
+    lo, hi = _day_start(day), _day_start(day + timedelta(days=1))
+    await session.execute(text(f'CREATE TABLE "{name}" (LIKE {PARENT} INCLUDING DEFAULTS)'))
+    await session.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE ts >= :lo AND ts < :hi RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+            """
+        ),
+        {"lo": lo, "hi": hi},
+    )
+    # Bölüm sınırları literal olmak zorunda (bind parametre kabul edilmez)
+    await session.execute(
+        text(
+            f'ALTER TABLE {PARENT} ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+        )
+    )
+    return True
+
+
+async def ensure_partitions(session: AsyncSession, days_ahead: int = 7) -> int:
+    """Bugünden itibaren days_ahead gün ilerisine kadar eksik bölümleri aç."""
+    if not await is_partitioned(session):
+        return 0
+    today = datetime.now(timezone.utc).date()
+    created = 0
+    for i in range(max(0, days_ahead) + 1):
+        if await create_partition(session, today + timedelta(days=i)):
+            created += 1
+    return created
+
+
+async def drop_partitions_before(
+    session: AsyncSession,
+    cutoff: datetime,
+    delete_default: bool = True,
+    *,
+    keep: Optional[Callable[[datetime, datetime], Awaitable[bool]]] = None,
+) -> int:
+    """
+    Tamamı cutoff'tan eski olan günlük bölümleri DETACH + DROP eder; delete_default ise
+    default bölümde kalan eski satırları da siler (retention bunları parça parça siler).
+    keep(lo, hi) True dönerse [lo, hi) bölümü tutulur (ör. hâlâ ömrü dolmamış satır var).
+    Dönen değer silinen satır sayısıdır (düşürülen bölümler için planner
+    istatistiğinden tahmin, default için kesin).
+    """
+    removed = 0
+    for name, day in await list_partitions(session):
+        lo, hi = _day_start(day), _day_start(day + timedelta(days=1))
+        if hi > cutoff:
+            break
+        if keep is not None and await keep(lo, hi):
+            continue
+        est = (await session.execute(
+            text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass(:n)"),
+            {"n": name},
+        )).scalar() or 0
+        await session.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}"'))
+        await session.execute(text(f'DROP TABLE "{name}"'))
+        removed += int(est)
+    if not delete_default:
+        return removed
+    res = await session.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE ts < :cutoff"), {"cutoff": cutoff}
+    )
+    removed += getattr(res, "rowcount", 0) or 0
+    return removed
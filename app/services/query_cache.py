@@ -0,0 +1,205 @@
+# app/services/query_cache.py
+"""
+In-process sorgu sonuç cache'i (/stats/*, /_admin/stats/*, /events/search).
+
+- Anahtar: uç adı + normalize edilmiş parametreler (None'lar atılır, sıralı).
+- Uç başına TTL; süre dolunca ilk istek sorguyu yeniden çalıştırır.
+- Single-flight: aynı anahtar için eşzamanlı istekler tek sorguyu bekler.
+- LRU: QUERY_CACHE_MAX_ENTRIES ve yaklaşık QUERY_CACHE_MAX_BYTES ile sınırlı.
+- Yazım invalidasyonu: kapalı aralıklı ([start, end)) girdiler, o aralığa satır
+  commit edildiğinde düşürülür. Açık uçlu ("şimdiye kadar") girdiler her flush'ta
+  değişeceği için yalnızca TTL ile yenilenir.
+
+Çok worker'lı kurulumda her process kendi cache'ini tutar.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.metrics import QUERY_CACHE_BYTES, QUERY_CACHE_HITS, QUERY_CACHE_MISSES
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+def _env_bool(key: str, default: bool) -> bool:
+    return os.getenv(key, "1" if default else "0").lower() in ("1", "true", "yes", "on")
+
+
+def _norm(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return v
+
+
+class _Entry:
+    __slots__ = ("value", "expires", "size", "start", "end")
+
+    def __init__(self, value, expires, size, start, end):
+        self.value = value
+        self.expires = expires
+        self.size = size
+        self.start = start
+        self.end = end
+
+
+class QueryCache:
+    def __init__(
+        self,
+        *,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        enabled: bool = True,
+        invalidate_on_write: bool = True,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.enabled = enabled
+        self.invalidate_on_write = invalidate_on_write
+        self._data: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._bytes = 0
+        # Yazım invalidasyonu sayacı: sorgu sürerken aralığa yazım olduysa sonucu saklama
+        self._gen = 0
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> Tuple:
+        return (endpoint,) + tuple(sorted((k, _norm(v)) for k, v in params.items() if v is not None))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+        *,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Any:
+        """
+        Cache'te taze sonuç varsa onu, yoksa compute() sonucunu döndürür.
+        start/end sorgunun kapsadığı zaman aralığıdır; end=None açık uçlu demektir.
+        """
+        if not self.enabled or ttl <= 0:
+            return await compute()
+        key = self.make_key(endpoint, params)
+        e = self._data.get(key)
+        if e is not None:
+            if e.expires > time.monotonic():
+                self._data.move_to_end(key)
+                QUERY_CACHE_HITS.labels(endpoint=endpoint).inc()
+                return e.value
+            self._drop(key)
+
+        fut = self._inflight.get(key)
+        if fut is not None:
+            QUERY_CACHE_HITS.labels(endpoint=endpoint).inc()
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                # lider istek iptal edildiyse sorguyu kendimiz çalıştırırız
+                if fut.cancelled():
+                    return await compute()
+                raise
+
+        QUERY_CACHE_MISSES.labels(endpoint=endpoint).inc()
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        gen = self._gen
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as ex:
+            fut.set_exception(ex)
+            fut.exception()  # bekleyen yoksa "never retrieved" uyarısı çıkmasın
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+        if end is None or gen == self._gen:
+            self._store(key, value, ttl, start, end)
+        return value
+
+    def invalidate_range(self, lo: datetime, hi: datetime) -> int:
+        """[lo, hi] aralığına yazım commit edildi: kesişen kapalı aralıklı girdileri düşür."""
+        if not self.invalidate_on_write:
+            return 0
+        self._gen += 1
+        stale = [
+            k for k, e in self._data.items()
+            if e.end is not None and lo < e.end and (e.start is None or e.start <= hi)
+        ]
+        for k in stale:
+            self._drop(k)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._gen += 1
+        self._data.clear()
+        self._bytes = 0
+        QUERY_CACHE_BYTES.set(0)
+
+    # --- iç yardımcılar -----------------------------------------------------
+
+    def _store(self, key, value, ttl, start, end) -> None:
+        try:
+            size = len(json.dumps(value, default=str))
+        except Exception:
+            return
+        # tek bir girdi cache'in büyük kısmını kaplamasın
+        if size > self.max_bytes // 8:
+            return
+        if key in self._data:
+            self._drop(key)
+        self._data[key] = _Entry(value, time.monotonic() + ttl, size, start, end)
+        self._bytes += size
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._data)))
+        QUERY_CACHE_BYTES.set(self._bytes)
+
+    def _drop(self, key) -> None:
+        e = self._data.pop(key, None)
+        if e is not None:
+            self._bytes -= e.size
+            QUERY_CACHE_BYTES.set(self._bytes)
+
+
+STATS_TTL = _env_float("QUERY_CACHE_TTL_STATS", 5.0)
+SEARCH_TTL = _env_float("QUERY_CACHE_TTL_SEARCH", 2.0)
+
+_CACHE: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """Process-local tekil cache (env ile yapılandırılır)."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = QueryCache(
+            max_entries=_env_int("QUERY_CACHE_MAX_ENTRIES", 512),
+            max_bytes=_env_int("QUERY_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+            enabled=_env_bool("QUERY_CACHE_ENABLED", True),
+            invalidate_on_write=_env_bool("QUERY_CACHE_INVALIDATE_ON_WRITE", True),
+        )
+    return _CACHE
@@ -1,15 +1,251 @@
 # app/services/retention.py
+"""
+Kademeli (tiered) retention.
+
+Ömür politikası (RETENTION_POLICY, virgülle ayrılmış kurallar):
+  <reason>=<gün>       bu reason'ın ömrü (RETENTION_DAYS yerine)
+  severity>=<n>=<gün>  severity'si >= n olan satırlar en az bu kadar tutulur
+Örn: "quarantine_block=7,zscore_anomaly=90,severity>=3=365". Bir satırın ömrü
+max(reason ömrü ya da RETENTION_DAYS, eşleşen severity kurallarının en büyüğü).
+
+Silme:
+  - events bölümlüyse, en kısa ömürden tamamen eski ve içinde ömrü dolmamış satır
+    kalmamış gün bölümleri DETACH + DROP (en uzun ömürden (ufuk) eskiler koşulsuz).
+  - Kalan süresi dolmuş satırlar RETENTION_BATCH_ROWS'luk (id, ts) parçalarıyla silinir
+    ((ts, id) imleci ilerler: silinen satırların ölü kayıtları yeniden taranmaz);
+    her parça ayrı transaction'dır ve parçalar arasında RETENTION_MAX_ROWS_PER_SEC
+    bütçesini aşmayacak kadar beklenir (kilitler kısa, WAL/IO yükü sınırlı).
+  - Rollup'lar ufka kadar tutulur: kısa ömürlü reason'ların saatlik sayımları ham
+    satırlar silindikten sonra da stats'ta görünür.
+"""
+from __future__ import annotations
+
+import asyncio
 import os
-from sqlalchemy import text
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, delete, false, or_, select, true, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.models import Event, EventBatch
+from app.metrics import RETENTION_BATCHES, RETENTION_CURSOR_TS, RETENTION_DELETED
+from app.repositories.lookups import REASONS
+from app.services.archive import archive_dir, archive_expired, prune_archive
+from app.services.partitions import drop_partitions_before, is_partitioned
+from app.services.rollups import purge_rollups_before
+
 RETENTION_DAYS = int(os.environ.get("RETENTION_DAYS", "30"))
+ARCHIVE_KEEP_DAYS = int(os.environ.get("ARCHIVE_KEEP_DAYS", "365"))
+RETENTION_POLICY = os.environ.get("RETENTION_POLICY", "")
+RETENTION_BATCH_ROWS = int(os.environ.get("RETENTION_BATCH_ROWS", "5000"))
+RETENTION_MAX_ROWS_PER_SEC = float(os.environ.get("RETENTION_MAX_ROWS_PER_SEC", "20000"))
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    default_days: int
+    reasons: Tuple[Tuple[str, int], ...] = ()
+    # (min_severity, gün), min_severity artan
+    severities: Tuple[Tuple[int, int], ...] = field(default=())
+
+    @classmethod
+    def parse(cls, spec: str, default_days: int) -> "RetentionPolicy":
+        reasons, sevs = {}, {}
+        for part in (p.strip() for p in (spec or "").split(",")):
+            if not part:
+                continue
+            try:
+                if part.startswith("severity>="):
+                    n, days = part[len("severity>="):].split("=", 1)
+                    sevs[int(n)] = int(days)
+                else:
+                    reason, days = part.rsplit("=", 1)
+                    reasons[reason.strip()] = int(days)
+            except ValueError:
+                raise ValueError(f"invalid retention rule: {part!r}") from None
+        if any(d < 1 for d in [default_days, *reasons.values(), *sevs.values()]):
+            raise ValueError("retention days must be >= 1")
+        return cls(int(default_days), tuple(sorted(reasons.items())), tuple(sorted(sevs.items())))
+
+    def horizon_days(self) -> int:
+        """En uzun ömür: bundan eski hiçbir satır tutulmaz."""
+        return max([self.default_days, *(d for _, d in self.reasons), *(d for _, d in self.severities)])
+
+    def min_days(self) -> int:
+        """En kısa ömür: bundan yeni hiçbir satır silinmez."""
+        return min([self.default_days, *(d for _, d in self.reasons)])
+
+    def describe(self) -> dict:
+        """API yanıtları için politikanın özeti."""
+        return {
+            "default_days": self.default_days,
+            "reasons": dict(self.reasons),
+            "severities": {f">={n}": d for n, d in self.severities},
+            "min_days": self.min_days(),
+            "horizon_days": self.horizon_days(),
+        }
+
+    def lifetime(self, reason: Optional[str], severity: Optional[int]) -> int:
+        days = dict(self.reasons).get(reason, self.default_days)
+        for n, d in self.severities:
+            if severity is not None and severity >= n:
+                days = max(days, d)
+        return days
+
+    def _bands(self) -> List[Tuple[Optional[int], Optional[int], int]]:
+        """Severity aralıkları [lo, hi) ve asgari ömürleri (lo=None: NULL ya da ilk eşiğin altı)."""
+        bands = []
+        floor, lo = 0, None
+        for n, d in self.severities:
+            bands.append((lo, n, floor))
+            floor, lo = max(floor, d), n
+        bands.append((lo, None, floor))
+        return bands
+
+    async def expired_condition(self, session: AsyncSession, now: datetime):
+        """Süresi dolmuş satırlar: (reason grubu, severity aralığı) başına ts < now - ömür."""
+        t = Event.__table__
+        ids = {}
+        for reason, days in self.reasons:
+            rid = await REASONS.lookup(session, reason)
+            if rid is not None:
+                ids[rid] = days
+        groups = [(t.c.reason_id == rid, days) for rid, days in ids.items()]
+        others = or_(t.c.reason_id.is_(None), t.c.reason_id.not_in(list(ids))) if ids else None
+        groups.append((others, self.default_days))
+
+        terms = []
+        for gcond, base in groups:
+            for lo, hi, floor in self._bands():
+                conds = [t.c.ts < now - timedelta(days=max(base, floor))]
+                if gcond is not None:
+                    conds.append(gcond)
+                if lo is None:
+                    if hi is not None:
+                        conds.append(or_(t.c.severity.is_(None), t.c.severity < hi))
+                else:
+                    conds.append(t.c.severity >= lo)
+                    if hi is not None:
+                        conds.append(t.c.severity < hi)
+                terms.append(and_(*conds))
+        # ts aralığı index'i için dış sınır
+        return and_(t.c.ts < now - timedelta(days=self.min_days()), or_(*terms) if terms else false())
+
+
+def current_policy(days: Optional[int] = None) -> RetentionPolicy:
+    """days verilirse düz politika (tek ömür; elle purge); yoksa env politikası."""
+    if days:
+        return RetentionPolicy(int(days))
+    return RetentionPolicy.parse(RETENTION_POLICY, RETENTION_DAYS)
+
+
+async def delete_expired_batched(
+    session: AsyncSession,
+    policy: RetentionPolicy,
+    now: datetime,
+    *,
+    batch_rows: int = RETENTION_BATCH_ROWS,
+    max_rows_per_sec: float = RETENTION_MAX_ROWS_PER_SEC,
+    commit: bool = True,
+) -> int:
+    """
+    Süresi dolmuş satırları en eskiden başlayarak (id, ts) parçalarıyla siler.
+    Her parça (ts, id) imlecinden sonra başlar; silinen aralık tekrar taranmaz.
+    commit=True ise her parça ayrı commit edilir ve parçalar arası hız bütçesi uygulanır.
+    """
+    t = Event.__table__
+    cond = await policy.expired_condition(session, now)
+    batch_rows = max(1, int(batch_rows))
+    total = 0
+    last = None
+    while True:
+        t0 = time.monotonic()
+        q = select(t.c.id, t.c.ts).where(cond)
+        if last is not None:
+            q = q.where(tuple_(t.c.ts, t.c.id) > tuple_(*last))
+        rows = (await session.execute(q.order_by(t.c.ts, t.c.id).limit(batch_rows))).all()
+        if not rows:
+            break
+        last = (rows[-1].ts, rows[-1].id)
+        lo, hi = rows[0].ts, rows[-1].ts
+        # ts sınırları bölüm budaması ve (id, ts) PK'si için
+        res = await session.execute(
+            delete(t).where(t.c.ts >= lo, t.c.ts <= hi, t.c.id.in_([r.id for r in rows]))
+        )
+        n = getattr(res, "rowcount", 0) or 0
+        total += n
+        RETENTION_DELETED.labels(method="batch").inc(n)
+        RETENTION_BATCHES.inc()
+        RETENTION_CURSOR_TS.set(hi.timestamp())
+        if commit:
+            await session.commit()
+        if len(rows) < batch_rows:
+            break
+        if commit and max_rows_per_sec > 0:
+            wait = len(rows) / max_rows_per_sec - (time.monotonic() - t0)
+            if wait > 0:
+                await asyncio.sleep(wait)
+    return total
+
+
+async def _has_live_rows(session: AsyncSession, cond, lo: datetime, hi: datetime) -> bool:
+    """[lo, hi) aralığında ömrü dolmamış satır var mı (cond NULL'da da doğru: IS NOT TRUE)."""
+    t = Event.__table__
+    q = select(t.c.id).where(t.c.ts >= lo, t.c.ts < hi, cond.is_not(true())).limit(1)
+    return (await session.execute(q)).first() is not None
+
+
+async def drop_expired_partitions(session: AsyncSession, policy: RetentionPolicy, now: datetime) -> int:
+    """
+    En kısa ömürden tamamen eski gün bölümlerinden, içinde ömrü dolmamış satır
+    kalmayanları düşürür (ufuktan eskiler kontrolsüz); tahmini silinen satır sayısı.
+    """
+    horizon = now - timedelta(days=policy.horizon_days())
+    cond = await policy.expired_condition(session, now)
+
+    async def _keep(lo: datetime, hi: datetime) -> bool:
+        return hi > horizon and await _has_live_rows(session, cond, lo, hi)
+
+    removed = await drop_partitions_before(
+        session, now - timedelta(days=policy.min_days()), delete_default=False, keep=_keep
+    )
+    RETENTION_DELETED.labels(method="partition_drop").inc(removed)
+    return removed
+
 
-async def run_retention(session: AsyncSession) -> int:
+async def run_retention(session: AsyncSession, days: Optional[int] = None, *, commit_batches: bool = True) -> int:
     """
-    Eski eventleri temizler, silinen satır sayısını döndürür.
+    Eski eventleri politikaya göre temizler, silinen satır sayısını döndürür.
+    days verilirse tüm satırlar için tek ömür kullanılır (POST /stats/purge?days=).
+    events bölümlenmişse en kısa ömürden tamamen eski gün bölümleri, içlerinde ömrü
+    dolmamış satır kalmadıysa DETACH + DROP edilir (ufuktan eskiler kontrolsüz).
+    ARCHIVE_DIR ayarlıysa silinmeye başlanacak günler önce arşive yazılır; arşivleme
+    hata verirse hiçbir şey silinmez. Arşivde yalnızca tam günler olduğu için "now"
+    gün başına yuvarlanır. commit_batches=False: tek transaction, bekleme yok.
     """
-    q = text("DELETE FROM events WHERE ts < (now() - make_interval(days := :days))")
-    res = await session.execute(q, {"days": RETENTION_DAYS})
-    # res.rowcount bazı sürümlerde None olabilir; güvenli döndür
-    return getattr(res, "rowcount", 0) or 0
\ No newline at end of file
+    policy = current_policy(days)
+    now = datetime.now(timezone.utc)
+    directory = archive_dir()
+    if directory:
+        now = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        await archive_expired(session, now - timedelta(days=policy.min_days()), directory)
+        # Arşiv okuması server-side cursor açar; asyncpg portal'ları transaction sonuna
+        # kadar yaşar ve aynı transaction'da DROP TABLE'ı engeller. Okuma salt-okunur,
+        # transaction'ı burada kapatmak güvenli.
+        await session.commit()
+        prune_archive(directory, ARCHIVE_KEEP_DAYS)
+    horizon = now - timedelta(days=policy.horizon_days())
+    await purge_rollups_before(session, horizon)
+    # spool tekrarsızlık defteri: varsayılan ömürden eski batch'ler replay edilmez
+    default_cutoff = now - timedelta(days=policy.default_days)
+    await session.execute(delete(EventBatch.__table__).where(EventBatch.__table__.c.created_at < default_cutoff))
+    removed = 0
+    if await is_partitioned(session):
+        removed = await drop_expired_partitions(session, policy, now)
+        if commit_batches:
+            await session.commit()
+    removed += await delete_expired_batched(session, policy, now, commit=commit_batches)
+    return removed
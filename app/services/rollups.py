@@ -0,0 +1,157 @@
+# app/services/rollups.py
+"""
+events için saatlik rollup bakımı ve okuma yönlendirmesi.
+
+- events_hourly_{reason,path,severity}: kapanmış saatlerin sayımları.
+- rollup_state.watermark: bu saatten önceki saatler rollup'larda tamdır; açık saat
+  (ve henüz işlenmemiş saatler) ham tablodan okunur.
+
+Bakım işi (refresh_rollups) watermark'tan ROLLUP_LOOKBACK_HOURS geriden başlayarak
+kapanmış saatleri yeniden hesaplar (DELETE + INSERT ... GROUP BY). Yeniden hesap
+idempotenttir; geç yazılan (writer kuyruğunda bekleyen) satırlar sonraki çalışmada
+düzelir. Geçmişe satır yazan yollar (bulk ingest, ts'li POST) invalidate_from ile
+watermark'ı geri çeker.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.backends import backend_name
+
+STATE_NAME = "events_hourly"
+ROLLUP_LOOKBACK_HOURS = int(os.getenv("ROLLUP_LOOKBACK_HOURS", "2"))
+# Tek çalışmada en fazla kaç saat işlensin (ilk backfill'i parçalara böler)
+ROLLUP_MAX_HOURS_PER_RUN = int(os.getenv("ROLLUP_MAX_HOURS_PER_RUN", "168"))
+
+# (tablo, rollup kolonu, events kolonu, lookup tablosu, sentinel): NULL'lar PK'ya
+# giremediği için sentinel; reason/path events'te lookup id'si olarak durur
+_DIMENSIONS = (
+    ("events_hourly_reason", "reason", "reason_id", "event_reasons", "''"),
+    ("events_hourly_path", "path", "path_id", "event_paths", "''"),
+    ("events_hourly_severity", "severity", "severity", None, "-1"),
+)
+
+_tables_ready = False
+
+
+def floor_hour(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(ts: datetime) -> datetime:
+    f = floor_hour(ts)
+    return f if f == ts else f + timedelta(hours=1)
+
+
+async def _ready(session: AsyncSession) -> bool:
+    """
+    Rollup tabloları var mı (migration uygulanmamışsa ham tabloya düşülür).
+    Rollup'lar PG özelliğidir; SQLite backend'i stats'ı her zaman ham tablodan sayar.
+    """
+    global _tables_ready
+    if backend_name(session) != "postgresql":
+        return False
+    if not _tables_ready:
+        _tables_ready = bool(
+            (await session.execute(text("SELECT to_regclass('rollup_state') IS NOT NULL"))).scalar()
+        )
+    return _tables_ready
+
+
+async def get_watermark(session: AsyncSession) -> Optional[datetime]:
+    """Rollup watermark'ı; tablolar yoksa ya da henüz hiç işlenmemişse None."""
+    if not await _ready(session):
+        return None
+    return (await session.execute(
+        text("SELECT watermark FROM rollup_state WHERE name = :n"), {"n": STATE_NAME}
+    )).scalar()
+
+
+async def _set_watermark(session: AsyncSession, wm: datetime) -> None:
+    await session.execute(
+        text(
+            "INSERT INTO rollup_state (name, watermark) VALUES (:n, :w) "
+            "ON CONFLICT (name) DO UPDATE SET watermark = EXCLUDED.watermark"
+        ),
+        {"n": STATE_NAME, "w": wm},
+    )
+
+
+async def _recompute(session: AsyncSession, lo: datetime, hi: datetime) -> None:
+    for table, col, ecol, lookup, sentinel in _DIMENSIONS:
+        await session.execute(
+            text(f"DELETE FROM {table} WHERE hour >= :lo AND hour < :hi"), {"lo": lo, "hi": hi}
+        )
+        # önce id'ye göre say, sonra küçük sonucu sözlükle çöz
+        key = f"COALESCE(l.value, {sentinel})" if lookup else f"COALESCE(g.k, {sentinel})"
+        join = f"LEFT JOIN {lookup} l ON l.id = g.k" if lookup else ""
+        await session.execute(
+            text(
+                f"""
+                INSERT INTO {table} (hour, {col}, cnt)
+                SELECT g.hour, {key}, sum(g.cnt)
+                FROM (
+                    SELECT date_trunc('hour', ts AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS hour,
+                           {ecol} AS k, count(*) AS cnt
+                    FROM events
+                    WHERE ts >= :lo AND ts < :hi
+                    GROUP BY 1, 2
+                ) g {join}
+                GROUP BY 1, 2
+                """
+            ),
+            {"lo": lo, "hi": hi},
+        )
+
+
+async def refresh_rollups(session: AsyncSession, now: Optional[datetime] = None) -> int:
+    """
+    Kapanmış saatleri rollup'lara işler ve watermark'ı ilerletir; işlenen saat sayısını
+    döndürür (commit çağırana ait). Watermark açık saate ulaşmışsa iş yapmaz.
+    """
+    if not await _ready(session):
+        return 0
+    open_hour = floor_hour(now or datetime.now(timezone.utc))
+    wm = await get_watermark(session)
+    if wm is not None and wm >= open_hour:
+        return 0
+    if wm is None:
+        oldest = (await session.execute(text("SELECT min(ts) FROM events"))).scalar()
+        if oldest is None:
+            await _set_watermark(session, open_hour)
+            return 0
+        lo = floor_hour(oldest)
+    else:
+        lo = wm - timedelta(hours=ROLLUP_LOOKBACK_HOURS)
+    hi = min(open_hour, lo + timedelta(hours=max(ROLLUP_MAX_HOURS_PER_RUN, ROLLUP_LOOKBACK_HOURS + 1)))
+    await _recompute(session, lo, hi)
+    await _set_watermark(session, hi)
+    return int((hi - lo) / timedelta(hours=1))
+
+
+async def invalidate_from(session: AsyncSession, ts: datetime) -> None:
+    """ts'nin saatinden itibaren rollup'ları geçersiz say (sonraki refresh yeniden hesaplar)."""
+    # watermark açık saati geçemez; açık saate yazılan satırlar zaten ham tablodan okunur
+    if floor_hour(ts) >= floor_hour(datetime.now(timezone.utc)):
+        return
+    if not await _ready(session):
+        return
+    await session.execute(
+        text("UPDATE rollup_state SET watermark = LEAST(watermark, :h) WHERE name = :n"),
+        {"h": floor_hour(ts), "n": STATE_NAME},
+    )
+
+
+async def purge_rollups_before(session: AsyncSession, cutoff: datetime) -> None:
+    """Retention ile birlikte: tamamı cutoff'tan eski saatleri sil."""
+    if not await _ready(session):
+        return
+    for table, *_ in _DIMENSIONS:
+        await session.execute(
+            text(f"DELETE FROM {table} WHERE hour + interval '1 hour' <= :c"), {"c": cutoff}
+        )
@@ -0,0 +1,525 @@
+# app/services/spool.py
+"""
+DB kesintilerinde event'ler için diskte kalıcı kuyruk (spool) ve toplu replay.
+
+Event writer bir batch'i yazamadığında (DB hatası, devre kesici açık) batch
+kaybolmak yerine buraya eklenir; SpoolReplayer DB sağlıklıyken diskteki batch'leri
+COPY ile geri yükler.
+
+Sahiplik: her process kendi SPOOL_DIR/<host>-<pid> dizinine yazar ve dizindeki
+.lock dosyasında flock tutar; yalnızca kendi segmentlerini replay eder/siler. Ölü bir
+process'in dizini (kilidi alınabilen) ve eski düz yerleşimdeki segmentler canlı bir
+process tarafından sahiplenilip (adopt) kendi dizinine taşınır.
+
+Dosya biçimi: <dizin>/spool-<sıra>.bin segmentleri, kayıt başına
+  [uzunluk u32 BE][crc32 u32 BE][JSON: {"key", "spooled_at", "events": [...]}]
+Yazımlar işletim sistemine hemen, diske (fsync) en geç SPOOL_FSYNC_SEC içinde iner.
+Okumada yarım kalmış (kesik) kuyruk kaydı ve CRC'si tutmayan kayıtlar atlanır
+(spool_corrupt_records_total). DB'nin reddettiği (bağlantı dışı hata veren) kayıtlar
+<segment>.bad dosyasına ayrılır ve sıradaki segmentlerin önünü tıkamaz.
+
+Tekrarsızlık: her writer batch'inin bir anahtarı vardır ve yazıldığı transaction'da
+event_batches defterine eklenir. Replay aynı anahtarı defterde bulursa batch'i
+atlar; böylece "commit oldu ama istemci hata gördü" durumları ve yarıda kalan
+replay'ler çift yazım üretmez.
+"""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import re
+import socket
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.metrics import SPOOL_BYTES, SPOOL_CORRUPT, SPOOL_EVENTS, SPOOL_OLDEST_AGE, SPOOL_REPLAYED
+
+_LOCK_NAME = ".lock"
+
+_HDR = struct.Struct(">II")
+_SEG_RE = re.compile(r"^spool-(\d{12})\.bin$")
+_MAX_RECORD = 64 * 1024 * 1024
+
+
+@dataclass
+class SpoolRecord:
+    key: str
+    spooled_at: float
+    events: List[Dict[str, Any]]
+
+
+def _encode_event(e: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(e)
+    ts = out.get("ts")
+    if isinstance(ts, datetime):
+        out["ts"] = ts.isoformat()
+    return out
+
+
+def _decode_event(e: Dict[str, Any]) -> Dict[str, Any]:
+    ts = e.get("ts")
+    if isinstance(ts, str):
+        dt = datetime.fromisoformat(ts)
+        e["ts"] = dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return e
+
+
+def _encode_record(key: str, spooled_at: float, events: Sequence[Dict[str, Any]]) -> bytes:
+    payload = json.dumps(
+        {"key": key, "spooled_at": spooled_at, "events": [_encode_event(e) for e in events]},
+        separators=(",", ":"), default=str,
+    ).encode()
+    return _HDR.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _lock(path: Path, block: bool) -> Optional[int]:
+    """path üzerinde flock(LOCK_EX); block=False iken başkası tutuyorsa None."""
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | (0 if block else fcntl.LOCK_NB))
+    except OSError:
+        os.close(fd)
+        if block:
+            raise
+        return None
+    return fd
+
+
+def owner_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Spool:
+    """Segmentli append-only dosya kuyruğu; metotlar senkron ve thread-safe (to_thread ile çağırın)."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        fsync_interval: float = 1.0,
+        *,
+        base: Optional[str] = None,
+        owner_fd: Optional[int] = None,
+    ):
+        self.dir = Path(directory)
+        # base: sahipsiz segmentlerin aranacağı üst dizin (for_process ile)
+        self.base = Path(base) if base else None
+        self._owner_fd = owner_fd
+        self.max_bytes = max(1, int(max_bytes))
+        self.fsync_interval = max(0.0, float(fsync_interval))
+        self._lock = threading.Lock()
+        self._fh = None
+        self._active: Optional[Path] = None
+        self._dirty = False
+        self._last_sync = 0.0
+        # segment -> [event sayısı, bayt, ilk kaydın spooled_at'i]
+        self._segs: Dict[Path, List[float]] = {}
+        self._seq = 0
+        if self.dir.is_dir():
+            for p in sorted(self.dir.iterdir()):
+                m = _SEG_RE.match(p.name)
+                if m:
+                    self._seq = max(self._seq, int(m.group(1)))
+                    self._register(p)
+        self._publish()
+
+    @classmethod
+    def for_process(cls, base: str, **kw) -> "Spool":
+        """Bu process'e ait <base>/<host>-<pid> dizinini kilitleyip açar, sahipsizleri sahiplenir."""
+        directory = Path(base) / owner_name()
+        directory.mkdir(parents=True, exist_ok=True)
+        # aynı isimli dizini yalnızca sahiplenme sırasında başka bir process kısa süre tutabilir
+        fd = _lock(directory / _LOCK_NAME, block=True)
+        sp = cls(str(directory), base=base, owner_fd=fd, **kw)
+        sp.adopt_orphans()
+        return sp
+
+    def _register(self, p: Path) -> None:
+        recs = self._read(p)
+        self._segs[p] = [
+            sum(len(r.events) for r in recs), p.stat().st_size, recs[0].spooled_at if recs else time.time()
+        ]
+
+    def _adopt_from(self, src: Path) -> int:
+        n = 0
+        for p in sorted(src.iterdir()):
+            if _SEG_RE.match(p.name):
+                self._seq += 1
+                dst = self.dir / f"spool-{self._seq:012d}.bin"
+                os.replace(p, dst)
+                self._register(dst)
+                n += 1
+            elif p.name.endswith(".bad") and src != self.base:
+                # reddedilmiş kayıtlar incelemek için saklanır (replay edilmez)
+                os.replace(p, self.dir / f"{src.name}-{p.name}")
+        return n
+
+    def adopt_orphans(self) -> int:
+        """
+        Kilidi alınabilen (sahibi ölmüş) kardeş dizinlerin ve base'deki eski düz
+        yerleşimin segmentlerini kendi dizinine taşır; taşınan segment sayısı.
+        """
+        if self.base is None or not self.base.is_dir():
+            return 0
+        n = 0
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            for sub in sorted(self.base.iterdir()):
+                if not sub.is_dir() or sub.resolve() == self.dir.resolve():
+                    continue
+                fd = _lock(sub / _LOCK_NAME, block=False)
+                if fd is None:
+                    continue  # sahibi yaşıyor
+                try:
+                    n += self._adopt_from(sub)
+                    for p in sub.iterdir():
+                        if p.name != _LOCK_NAME:
+                            break
+                    else:
+                        (sub / _LOCK_NAME).unlink()
+                        sub.rmdir()
+                except OSError:
+                    pass
+                finally:
+                    os.close(fd)
+            # eski sürümün düz yerleşimi: aynı anda tek process taşısın
+            fd = _lock(self.base / _LOCK_NAME, block=False)
+            if fd is not None:
+                try:
+                    n += self._adopt_from(self.base)
+                finally:
+                    os.close(fd)
+            self._publish()
+        return n
+
+    # --- yazım ------------------------------------------------------------------
+
+    def append(self, key: str, events: Sequence[Dict[str, Any]]) -> bool:
+        """Batch'i ekle; SPOOL_MAX_BYTES aşılacaksa False (çağıran düşürür)."""
+        now = time.time()
+        rec = _encode_record(key, now, events)
+        with self._lock:
+            if self._bytes() + len(rec) > self.max_bytes:
+                return False
+            if self._fh is None:
+                self.dir.mkdir(parents=True, exist_ok=True)
+                self._seq += 1
+                self._active = self.dir / f"spool-{self._seq:012d}.bin"
+                self._fh = open(self._active, "ab")
+                self._segs[self._active] = [0, 0, now]
+            self._fh.write(rec)
+            self._fh.flush()
+            seg = self._segs[self._active]
+            seg[0] += len(events)
+            seg[1] += len(rec)
+            self._dirty = True
+            if now - self._last_sync >= self.fsync_interval:
+                self._sync()
+            self._publish()
+        return True
+
+    def sync(self, force: bool = False) -> None:
+        """Bekleyen yazımları diske indir (fsync aralığı dolduysa ya da force)."""
+        with self._lock:
+            if self._dirty and (force or time.time() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def _sync(self) -> None:
+        if self._fh is not None:
+            os.fsync(self._fh.fileno())
+        self._dirty = False
+        self._last_sync = time.time()
+
+    def seal(self) -> List[Path]:
+        """Aktif segmenti kapat; replay edilecek (kapalı) segmentleri sırasıyla döndür."""
+        with self._lock:
+            if self._fh is not None:
+                self._sync()
+                self._fh.close()
+                self._fh = None
+                self._active = None
+            return sorted(self._segs)
+
+    def close(self) -> None:
+        self.seal()
+        # sahipliği bırak: kalan segmentleri bir sonraki process sahiplenebilir
+        fd, self._owner_fd = self._owner_fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def quarantine(self, path: Path, records: Sequence[SpoolRecord]) -> Path:
+        """DB'nin reddettiği kayıtları <segment>.bad dosyasına ekler (replay edilmez)."""
+        bad = path.with_name(path.name + ".bad")
+        with self._lock:
+            with open(bad, "ab") as f:
+                for r in records:
+                    f.write(_encode_record(r.key, r.spooled_at, r.events))
+                f.flush()
+                os.fsync(f.fileno())
+        return bad
+
+    # --- okuma ------------------------------------------------------------------
+
+    def read(self, path: Path) -> List[SpoolRecord]:
+        return self._read(path)
+
+    def _read(self, path: Path) -> List[SpoolRecord]:
+        out: List[SpoolRecord] = []
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return out
+        pos = 0
+        while pos + _HDR.size <= len(data):
+            n, crc = _HDR.unpack_from(data, pos)
+            start, end = pos + _HDR.size, pos + _HDR.size + n
+            if n > _MAX_RECORD or end > len(data):
+                # kesik kuyruk (yazım sırasında çöküş) ya da bozuk uzunluk: devamı okunamaz
+                SPOOL_CORRUPT.inc()
+                break
+            payload = data[start:end]
+            pos = end
+            if zlib.crc32(payload) != crc:
+                SPOOL_CORRUPT.inc()
+                continue
+            try:
+                obj = json.loads(payload)
+                out.append(SpoolRecord(
+                    key=str(obj["key"]), spooled_at=float(obj["spooled_at"]),
+                    events=[_decode_event(e) for e in obj["events"]],
+                ))
+            except Exception:
+                SPOOL_CORRUPT.inc()
+        if 0 < len(data) - pos < _HDR.size:
+            SPOOL_CORRUPT.inc()
+        return out
+
+    def remove(self, path: Path) -> None:
+        with self._lock:
+            if path == self._active:
+                return
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._segs.pop(path, None)
+            self._publish()
+
+    # --- durum --------------------------------------------------------------------
+
+    def _bytes(self) -> int:
+        return int(sum(s[1] for s in self._segs.values()))
+
+    def depth(self) -> int:
+        return int(sum(s[0] for s in self._segs.values()))
+
+    def oldest_age(self) -> float:
+        if not self._segs:
+            return 0.0
+        return max(0.0, time.time() - min(s[2] for s in self._segs.values()))
+
+    def _publish(self) -> None:
+        SPOOL_EVENTS.set(self.depth())
+        SPOOL_BYTES.set(self._bytes())
+
+
+class SpoolReplayer:
+    """Arka plan görevi: fsync aralığını işletir, DB sağlıklıyken spool'u COPY ile boşaltır."""
+
+    def __init__(
+        self,
+        spool: Spool,
+        session_factory=None,
+        *,
+        breaker=None,
+        interval: float = 5.0,
+        chunk_events: int = 5000,
+        timeout: float = 30.0,
+        debug: bool = False,
+    ):
+        self.spool = spool
+        self._session_factory = session_factory
+        self._breaker = breaker
+        self.interval = max(0.05, float(interval))
+        self.chunk_events = max(1, int(chunk_events))
+        self.timeout = float(timeout) if timeout and timeout > 0 else None
+        self._task: Optional[asyncio.Task] = None
+        self.debug = debug
+
+    def _factory(self):
+        if self._session_factory is None:
+            from app.db.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await asyncio.to_thread(self.spool.close)
+
+    async def _run(self) -> None:
+        tick = min(self.interval, self.spool.fsync_interval or self.interval)
+        last = 0.0
+        while True:
+            await asyncio.sleep(tick)
+            try:
+                await asyncio.to_thread(self.spool.sync)
+                if time.monotonic() - last >= self.interval:
+                    last = time.monotonic()
+                    # çalışırken ölen worker'ların segmentleri
+                    await asyncio.to_thread(self.spool.adopt_orphans)
+                    if self.spool.depth():
+                        await self.replay_once()
+            except Exception as e:
+                if self.debug:
+                    print(f"[spool] replay pass failed: {type(e).__name__}: {e}")
+
+    async def replay_once(self) -> int:
+        """
+        Kapalı segmentleri sırayla yükle. Kesici açıkken ya da DB erişilemezken kalan
+        segmentler sonraya kalır; DB'nin reddettiği kayıtlar .bad dosyasına ayrılır.
+        """
+        from app.db.breaker import BreakerOpen, is_db_failure
+
+        written = 0
+        for seg in await asyncio.to_thread(self.spool.seal):
+            records = await asyncio.to_thread(self.spool.read, seg)
+            bad: List[SpoolRecord] = []
+            try:
+                for chunk in self._chunks(records):
+                    try:
+                        written += await self._write(chunk)
+                    except BreakerOpen:
+                        raise
+                    except Exception as e:
+                        if is_db_failure(e):
+                            raise
+                        # veri hatası: parçayı kayıt kayıt dene, reddedilenleri ayır
+                        for r in chunk:
+                            try:
+                                written += await self._write([r])
+                            except BreakerOpen:
+                                raise
+                            except Exception as e2:
+                                if is_db_failure(e2):
+                                    raise
+                                if self.debug:
+                                    print(f"[spool] record {r.key} rejected: {type(e2).__name__}: {e2}")
+                                bad.append(r)
+            except BreakerOpen:
+                return written
+            except Exception as e:
+                if is_db_failure(e):
+                    return written
+                raise
+            if bad:
+                await asyncio.to_thread(self.spool.quarantine, seg, bad)
+                SPOOL_REPLAYED.labels(result="quarantined").inc(sum(len(r.events) for r in bad))
+            await asyncio.to_thread(self.spool.remove, seg)
+        return written
+
+    def _chunks(self, records: List[SpoolRecord]):
+        chunk: List[SpoolRecord] = []
+        n = 0
+        for r in records:
+            chunk.append(r)
+            n += len(r.events)
+            if n >= self.chunk_events:
+                yield chunk
+                chunk, n = [], 0
+        if chunk:
+            yield chunk
+
+    async def _write(self, chunk: List[SpoolRecord]) -> int:
+        from app.db.breaker import get_db_breaker
+        from app.repositories.events import claim_batch_keys, copy_events
+        from app.services.hot_tail import get_hot_tail
+        from app.services.query_cache import get_query_cache
+        from app.services.rollups import invalidate_from
+
+        breaker = self._breaker or get_db_breaker()
+        rows = []
+        async with breaker.guard(timeout=self.timeout), self._factory()() as s:
+            fresh = await claim_batch_keys(s, [r.key for r in chunk])
+            dup = sum(len(r.events) for r in chunk if r.key not in fresh)
+            for r in chunk:
+                if r.key in fresh:
+                    rows.extend(
+                        (e["ts"], e["ip_hash"], e.get("ua"), e.get("path"), e.get("reason"),
+                         e.get("score"), e.get("severity"),
+                         None if e.get("meta") is None else json.dumps(e["meta"]))
+                        for e in r.events
+                    )
+            if rows:
+                await copy_events(s, rows)
+                await invalidate_from(s, min(r[0] for r in rows))
+            await s.commit()
+        if dup:
+            SPOOL_REPLAYED.labels(result="duplicate").inc(dup)
+        if rows:
+            SPOOL_REPLAYED.labels(result="written").inc(len(rows))
+            lo, hi = min(r[0] for r in rows), max(r[0] for r in rows)
+            get_query_cache().invalidate_range(lo, hi)
+            # replay edilen satırlar tampona yansıtılmaz
+            get_hot_tail().gap(hi)
+        return len(rows)
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)))
+    except Exception:
+        return default
+
+
+_SPOOL: Optional[Spool] = None
+_REPLAYER: Optional[SpoolReplayer] = None
+
+
+def get_spool() -> Optional[Spool]:
+    """Process-local spool; SPOOL_DIR boşsa None (kapalı)."""
+    global _SPOOL
+    directory = os.getenv("SPOOL_DIR", "")
+    if _SPOOL is None and directory:
+        _SPOOL = Spool.for_process(
+            directory,
+            max_bytes=_env_int("SPOOL_MAX_BYTES", 256 * 1024 * 1024),
+            fsync_interval=_env_float("SPOOL_FSYNC_SEC", 1.0),
+        )
+        SPOOL_OLDEST_AGE.set_function(_SPOOL.oldest_age)
+    return _SPOOL
+
+
+def get_spool_replayer() -> Optional[SpoolReplayer]:
+    global _REPLAYER
+    spool = get_spool()
+    if _REPLAYER is None and spool is not None:
+        _REPLAYER = SpoolReplayer(
+            spool,
+            interval=_env_float("SPOOL_REPLAY_SEC", 5.0),
+            chunk_events=_env_int("SPOOL_REPLAY_CHUNK_EVENTS", 5000),
+            timeout=_env_float("SPOOL_REPLAY_TIMEOUT_SEC", 30.0),
+            debug=os.getenv("QUARANTINE_DEBUG", "0").lower() in ("1", "true", "yes", "on"),
+        )
+    return _REPLAYER
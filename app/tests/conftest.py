@@ -1,5 +1,9 @@
 # app/tests/conftest.py
+import asyncio
+import os
 import sys, pathlib
+
+import pytest
 from dotenv import load_dotenv
 
 # Proje kökünü sys.path'e ekle (app/tests -> app -> KÖK: parents[2])
@@ -7,4 +11,15 @@ ROOT = pathlib.Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT))
 
 # .env'yi yükle (DATABASE_URL vb.)
-load_dotenv()
\ No newline at end of file
+load_dotenv()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _sqlite_schema():
+    """SQLite DATABASE_URL'inde şemayı kur (uygulamada startup yapar; PG'de alembic)."""
+    from app.db.backends import is_sqlite_url
+
+    if is_sqlite_url(os.getenv("DATABASE_URL", "")):
+        from app.db.session import init_schema
+
+        asyncio.run(init_schema())
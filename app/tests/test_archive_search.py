@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.archive import archive_day, list_archive_files, prune_archive, search_archive
+
+pytestmark = pytest.mark.asyncio
+
+
+def _write_day(directory, day, rows):
+    path = directory / f"events-{day}.ndjson.gz"
+    with gzip.open(path, "wb") as fh:
+        for r in rows:
+            fh.write((json.dumps(r) + "\n").encode())
+    return path
+
+
+def _row(i, ts, **kw):
+    base = {"id": i, "ts": ts, "ip_hash": "a", "ua": None, "path": "/x", "reason": "rate_limit",
+            "score": None, "severity": None, "meta": None}
+    base.update(kw)
+    return base
+
+
+async def test_search_archive_filters_and_skips_days(tmp_path):
+    _write_day(tmp_path, "2026-01-01", [_row(1, "2026-01-01T10:00:00+00:00")])
+    _write_day(tmp_path, "2026-01-02", [
+        _row(2, "2026-01-02T01:00:00+00:00", reason="bad_ua"),
+        _row(3, "2026-01-02T02:00:00+00:00"),
+        _row(4, "2026-01-02T23:00:00+00:00", ip_hash="b"),
+    ])
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    assert [d.isoformat() for d, _ in list_archive_files(str(tmp_path))] == ["2026-01-01", "2026-01-02"]
+
+    start = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    items, scanned = await search_archive(str(tmp_path), start=start, reason="rate_limit")
+    assert scanned == 1  # 01-01 dosyası hiç açılmaz
+    assert [r["id"] for r in items] == [3, 4]
+
+    items, _ = await search_archive(str(tmp_path), ip_hash="a", limit=1, offset=1)
+    assert [r["id"] for r in items] == [2]
+
+
+async def test_prune_archive_removes_old_files(tmp_path):
+    _write_day(tmp_path, "2000-01-01", [_row(1, "2000-01-01T00:00:00+00:00")])
+    today = datetime.now(timezone.utc).date().isoformat()
+    _write_day(tmp_path, today, [_row(2, f"{today}T00:00:00+00:00")])
+    assert prune_archive(str(tmp_path), keep_days=30) == 1
+    assert [d.isoformat() for d, _ in list_archive_files(str(tmp_path))] == [today]
+
+
+async def test_search_archive_normalizes_ip_hash(tmp_path):
+    from app.repositories.lookups import normalize_ip_hash
+
+    hashed = normalize_ip_hash("203.0.113.9")
+    _write_day(tmp_path, "2026-01-03", [
+        _row(1, "2026-01-03T01:00:00+00:00", ip_hash="00000000000000ab"),
+        _row(2, "2026-01-03T02:00:00+00:00", ip_hash=hashed),
+    ])
+    # büyük harfli hex ve hex olmayan istemci değeri canlı tablodaki gibi eşleşir
+    items, _ = await search_archive(str(tmp_path), ip_hash="00000000000000AB")
+    assert [r["id"] for r in items] == [1]
+    items, _ = await search_archive(str(tmp_path), ip_hash="203.0.113.9")
+    assert [r["id"] for r in items] == [2]
+
+
+async def test_late_rows_go_to_a_new_part(tmp_path):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.db.backends import init_sqlite_schema, sqlite_engine_options
+    from app.repositories.events import insert_events
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'arc.db'}", poolclass=NullPool, **sqlite_engine_options()
+    )
+    await init_sqlite_schema(engine)
+    arc = tmp_path / "arc"
+    day = datetime(2026, 1, 5, tzinfo=timezone.utc)
+
+    def _rows(*hours):
+        return [dict(ts=day.replace(hour=h), ip_hash="0a0a0a0a0a0a0a0a", reason="r", meta={"h": h}) for h in hours]
+
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as s:
+            # eski adlandırmadaki (id'siz) ilk parça da kapsadığı id'lerle hesaba katılır
+            await insert_events(s, _rows(1, 2))
+            await s.commit()
+            assert await archive_day(s, day.date(), str(arc)) == 2
+            first = list_archive_files(str(arc))[0][1]
+            os.rename(first, str(arc / "events-2026-01-05.ndjson.gz"))
+            assert await archive_day(s, day.date(), str(arc)) == 0
+
+            # arşivlendikten sonra güne geç gelen satırlar (spool replay'i, eski ts'li bulk)
+            await insert_events(s, _rows(0, 3))
+            await s.commit()
+            assert await archive_day(s, day.date(), str(arc)) == 2
+            assert await archive_day(s, day.date(), str(arc)) == 0
+    finally:
+        await engine.dispose()
+
+    assert len(list_archive_files(str(arc))) == 2
+    items, scanned = await search_archive(str(arc))
+    assert scanned == 2
+    assert [r["meta"]["h"] for r in items] == [1, 2, 0, 3]
@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.repositories.events import insert_events, list_events
+from app.repositories.lookups import REASONS, decode_ip_hash, encode_ip_hash
+
+
+def test_ip_hash_roundtrip():
+    for h in ("0000000000000000", "7fffffffffffffff", "8000000000000000", "ffffffffffffffff", "a1b2c3d4e5f60718"):
+        n = encode_ip_hash(h)
+        assert -(1 << 63) <= n < (1 << 63)
+        assert decode_ip_hash(n) == h
+    # 16 hex olmayan değer kararlı biçimde 16 hexe iner; büyük harf normalize edilir
+    assert encode_ip_hash("1.2.3.4") == encode_ip_hash("1.2.3.4")
+    assert len(decode_ip_hash(encode_ip_hash("1.2.3.4"))) == 16
+    assert decode_ip_hash(encode_ip_hash("ABCDEF0123456789")) == "abcdef0123456789"
+
+
+@pytest.mark.asyncio
+async def test_lookup_roundtrip_and_filters():
+    reason = f"compact_{uuid.uuid4().hex[:10]}"
+    ts = datetime.now(timezone.utc)
+    rows = [
+        dict(ts=ts, ip_hash="00ff00ff00ff00ff", ua="pytest", path="/compact/a", reason=reason,
+             score=1.0, severity=2, meta={"i": 0}),
+        dict(ts=ts, ip_hash="1.2.3.4", ua=None, path="/compact/b", reason=reason,
+             score=None, severity=None, meta=None),
+    ]
+    async with SessionLocal() as s:
+        await insert_events(s, rows)
+        # commit öncesi id cache'e girmez
+        assert REASONS.cached_id(s, reason) is None
+        await s.commit()
+        assert REASONS.cached_id(s, reason) is not None
+
+        # sözlük satırı tekrar eklenmez
+        await insert_events(s, rows[:1])
+        await s.commit()
+        n = (await s.execute(
+            text("SELECT count(*) FROM event_reasons WHERE value = :v"), {"v": reason}
+        )).scalar_one()
+        assert n == 1
+
+        total, items = await list_events(s, reason=reason, limit=10)
+        assert total == 3
+        assert {r.path for r in items} == {"/compact/a", "/compact/b"}
+        assert {r.ip_hash for r in items} == {"00ff00ff00ff00ff", decode_ip_hash(encode_ip_hash("1.2.3.4"))}
+
+        total, items = await list_events(s, reason=reason, ip_hash="1.2.3.4", limit=10)
+        assert total == 1 and items[0].ua is None and items[0].path == "/compact/b"
+
+        # bilinmeyen değerle filtre boş döner, sözlüğe satır eklemez
+        missing = f"missing_{uuid.uuid4().hex[:10]}"
+        total, items = await list_events(s, reason=missing, limit=10)
+        assert total == 0 and items == []
+        assert await REASONS.lookup(s, missing) is None
+
+        v = (await s.execute(
+            text("SELECT count(*) FROM events_v WHERE reason = :v AND path = '/compact/a'"), {"v": reason}
+        )).scalar_one()
+        assert v == 2
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
+
+from app.db.breaker import CLOSED, HALF_OPEN, OPEN, BreakerOpen, CircuitBreaker, is_db_failure
+from app.services.event_writer import EventWriter
+
+pytestmark = pytest.mark.asyncio
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _db_down():
+    return OperationalError("SELECT 1", {}, ConnectionRefusedError("refused"))
+
+
+async def _call(b, exc=None, timeout=None, sleep=0.0):
+    async with b.guard(timeout=timeout):
+        if sleep:
+            await asyncio.sleep(sleep)
+        if exc is not None:
+            raise exc
+
+
+async def test_open_half_open_probe_and_close():
+    clock = _Clock()
+    b = CircuitBreaker("t", failure_threshold=2, reset_after_sec=10, clock=clock)
+    changes = []
+    b.add_listener(lambda name, old, new: changes.append((old, new)))
+
+    # veri hataları DB'nin ayakta olduğunu gösterir: sayılmaz
+    with pytest.raises(IntegrityError):
+        await _call(b, IntegrityError("INSERT", {}, Exception("dup")))
+    for _ in range(2):
+        with pytest.raises(OperationalError):
+            await _call(b, _db_down())
+    assert b.state == OPEN
+
+    # açıkken DB'ye gidilmez
+    with pytest.raises(BreakerOpen):
+        await _call(b)
+
+    clock.t = 10.0
+    assert b.state == HALF_OPEN
+    assert b.allow() is True          # tek probe
+    assert b.allow() is False
+    b.record_failure()
+    assert b.state == OPEN and b.allow() is False
+
+    clock.t = 20.0
+    await _call(b)
+    assert b.state == CLOSED
+    assert changes == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+
+
+async def test_timeout_counts_as_failure():
+    b = CircuitBreaker("t", failure_threshold=1, reset_after_sec=60)
+    with pytest.raises(TimeoutError):
+        await _call(b, timeout=0.01, sleep=1.0)
+    assert b.state == OPEN
+
+
+class _PgError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+async def test_wrapped_driver_errors_classified_by_sqlstate():
+    # asyncpg veri hataları genel DBAPIError olarak sarılı gelir
+    for code in ("22003", "23505", "42703", "54000"):
+        assert not is_db_failure(DBAPIError("INSERT", {}, _PgError(code)))
+    for code in ("08006", "57014", "53300"):
+        assert is_db_failure(DBAPIError("INSERT", {}, _PgError(code)))
+    assert is_db_failure(_db_down())
+
+
+class _DownSession:
+    opened = 0
+
+    async def __aenter__(self):
+        _DownSession.opened += 1
+        raise _db_down()
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def test_writer_fails_fast_when_open():
+    b = CircuitBreaker("t", failure_threshold=2, reset_after_sec=60)
+    w = EventWriter(lambda: _DownSession(), breaker=b, batch_size=1, flush_interval=0.01)
+    for i in range(6):
+        await w._flush([{"ip_hash": "h", "path": f"/{i}", "reason": "r"}])
+    # iki deneme kesiciyi açar; sonrakiler session bile açmaz
+    assert _DownSession.opened == 2 and b.state == OPEN
+    await w.stop()
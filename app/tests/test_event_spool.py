@@ -0,0 +1,188 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.db.breaker import CircuitBreaker
+from app.db.session import SessionLocal
+from app.metrics import EVENTS_DROPPED
+from app.repositories.events import claim_batch_keys, list_events
+from app.services.event_writer import EventWriter
+from app.services.spool import Spool, SpoolReplayer
+
+
+def _events(reason, n, base=None):
+    base = base or datetime.now(timezone.utc)
+    return [
+        dict(ts=base + timedelta(milliseconds=i), ip_hash="10.0.0.1", ua="pytest", path=f"/spool/{i}",
+             reason=reason, score=0.5, severity=1, meta={"i": i})
+        for i in range(n)
+    ]
+
+
+def test_roundtrip_reopen_and_torn_tail(tmp_path):
+    sp = Spool(str(tmp_path), fsync_interval=0)
+    evs = _events("r", 3)
+    assert sp.append("k1", evs) and sp.append("k2", evs[:1])
+    assert sp.depth() == 4
+    [seg] = sp.seal()
+
+    # yazım sırasında çöküş: yarım kayıt + checksum'ı bozuk kayıt
+    data = seg.read_bytes()
+    with open(seg, "ab") as f:
+        f.write(data[:12])
+    recs = sp.read(seg)
+    assert [r.key for r in recs] == ["k1", "k2"]
+    assert recs[0].events[0]["ts"] == evs[0]["ts"] and recs[0].events[2]["meta"] == {"i": 2}
+
+    flipped = bytearray(data)
+    flipped[20] ^= 0xFF
+    seg.write_bytes(bytes(flipped))
+    assert [r.key for r in sp.read(seg)] == ["k2"]
+
+    # yeniden açılışta okunabilen kayıtlar sayılır, yeni segment sonraki sırayla açılır
+    sp2 = Spool(str(tmp_path), fsync_interval=0)
+    assert sp2.depth() == 1
+    sp2.append("k3", evs[:1])
+    assert [p.name for p in sp2.seal()] == ["spool-000000000001.bin", "spool-000000000002.bin"]
+
+
+def test_max_bytes(tmp_path):
+    sp = Spool(str(tmp_path), max_bytes=600)
+    assert sp.append("a", _events("r", 1))
+    assert not sp.append("b", _events("r", 10))
+
+
+@pytest.mark.asyncio
+async def test_replay_is_idempotent(tmp_path):
+    reason = f"spool_{uuid.uuid4().hex[:10]}"
+    since = datetime.now(timezone.utc) - timedelta(seconds=1)
+    sp = Spool(str(tmp_path), fsync_interval=0)
+    k1, k2 = uuid.uuid4().hex, uuid.uuid4().hex
+    sp.append(k1, _events(reason, 2))
+    sp.append(k2, _events(reason, 3))
+
+    # k1 aslında commit olmuştu (istemci hatayı commit sonrası gördü)
+    async with SessionLocal() as s:
+        assert await claim_batch_keys(s, [k1]) == {k1}
+        await s.commit()
+
+    r = SpoolReplayer(sp, SessionLocal, breaker=CircuitBreaker("spool-test"), chunk_events=2)
+    assert await r.replay_once() == 3
+    assert sp.depth() == 0 and not list(tmp_path.iterdir())
+
+    sp.append(k2, _events(reason, 3))
+    assert await r.replay_once() == 0
+    async with SessionLocal() as s:
+        _, rows = await list_events(s, start_ts=since, reason=reason)
+    assert len(rows) == 3 and {e.meta["i"] for e in rows} == {0, 1, 2}
+
+
+class _DownSession:
+    async def __aenter__(self):
+        raise OperationalError("SELECT 1", {}, ConnectionRefusedError("refused"))
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_writer_spools_failed_batches(tmp_path):
+    reason = f"spool_{uuid.uuid4().hex[:10]}"
+    since = datetime.now(timezone.utc) - timedelta(seconds=1)
+    sp = Spool(str(tmp_path), fsync_interval=0)
+    w = EventWriter(lambda: _DownSession(), batch_size=2, flush_interval=0.01,
+                    breaker=CircuitBreaker("spool-w", failure_threshold=1), spool=sp)
+    for e in _events(reason, 4):
+        assert w.submit(**e)
+    await asyncio.sleep(0.1)
+    await w.stop()
+    # ilk batch hata, sonrakiler kesici açıkken spool'a gitti
+    assert sp.depth() == 4
+
+    await SpoolReplayer(sp, SessionLocal, breaker=CircuitBreaker("spool-r")).replay_once()
+    async with SessionLocal() as s:
+        _, rows = await list_events(s, start_ts=since, reason=reason)
+    assert sorted(e.path for e in rows) == [f"/spool/{i}" for i in range(4)]
+
+
+def test_each_process_owns_its_directory(tmp_path, monkeypatch):
+    import app.services.spool as spool_mod
+
+    monkeypatch.setattr(spool_mod, "owner_name", lambda: "host-1")
+    a = Spool.for_process(str(tmp_path), fsync_interval=0)
+    monkeypatch.setattr(spool_mod, "owner_name", lambda: "host-2")
+    b = Spool.for_process(str(tmp_path), fsync_interval=0)
+    a.append("ka", _events("r", 1))
+    b.append("kb", _events("r", 2))
+    # b yalnızca kendi segmentlerini görür; a yaşarken sahiplenemez
+    assert [r.key for seg in b.seal() for r in b.read(seg)] == ["kb"]
+    assert b.adopt_orphans() == 0
+
+    # a kapanınca (process öldü) segmentleri b'ye geçer
+    a.close()
+    assert b.adopt_orphans() == 1
+    assert sorted(r.key for seg in b.seal() for r in b.read(seg)) == ["ka", "kb"]
+    assert b.depth() == 3 and not (tmp_path / "host-1").exists()
+    b.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_records_are_quarantined(tmp_path):
+    reason = f"spool_{uuid.uuid4().hex[:10]}"
+    since = datetime.now(timezone.utc) - timedelta(seconds=1)
+    sp = Spool(str(tmp_path), fsync_interval=0)
+    broken = _events(reason, 1)
+    del broken[0]["ip_hash"]
+    sp.append(uuid.uuid4().hex, _events(reason, 2))
+    sp.append(uuid.uuid4().hex, broken)
+    [seg] = sp.seal()
+    sp.append(uuid.uuid4().hex, _events(reason, 1, base=datetime.now(timezone.utc) + timedelta(seconds=1)))
+
+    r = SpoolReplayer(sp, SessionLocal, breaker=CircuitBreaker("spool-bad"))
+    # bozuk kayıt sonraki segmenti tıkamaz
+    assert await r.replay_once() == 3
+    assert sp.depth() == 0
+    bad = seg.with_name(seg.name + ".bad")
+    assert [len(x.events) for x in sp.read(bad)] == [1]
+    async with SessionLocal() as s:
+        _, rows = await list_events(s, start_ts=since, reason=reason)
+    assert len(rows) == 3
+
+
+class _RejectingSession:
+    async def __aenter__(self):
+        raise IntegrityError("INSERT", {}, ValueError("bad row"))
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_writer_does_not_spool_data_errors(tmp_path):
+    sp = Spool(str(tmp_path), fsync_interval=0)
+    w = EventWriter(lambda: _RejectingSession(), batch_size=2, flush_interval=0.01,
+                    breaker=CircuitBreaker("spool-data"), spool=sp)
+    before = EVENTS_DROPPED.labels(reason="data_error")._value.get()
+    for e in _events("r", 2):
+        assert w.submit(**e)
+    await asyncio.sleep(0.1)
+    await w.stop()
+    assert sp.depth() == 0
+    assert EVENTS_DROPPED.labels(reason="data_error")._value.get() == before + 2
+
+
+def test_spool_is_opt_in(tmp_path, monkeypatch):
+    from app.services import spool as spool_mod
+
+    monkeypatch.setattr(spool_mod, "_SPOOL", None)
+    monkeypatch.delenv("SPOOL_DIR", raising=False)
+    assert spool_mod.get_spool() is None
+    monkeypatch.setenv("SPOOL_DIR", str(tmp_path))
+    sp = spool_mod.get_spool()
+    try:
+        assert sp is not None and sp.dir.parent == tmp_path
+    finally:
+        sp.close()
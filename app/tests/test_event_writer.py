@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+from prometheus_client import generate_latest
+from sqlalchemy.exc import IntegrityError
+
+from app.metrics import METRICS_REGISTRY
+from app.services.event_writer import EventWriter
+
+pytestmark = pytest.mark.asyncio
+
+class _FakeSession:
+    """insert_events'in ürettiği çok-satırlı INSERT'leri kaydeder."""
+    def __init__(self, sink):
+        self.sink = sink
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, *args):
+        self.sink.append(len(stmt._multi_values[0]))
+
+    async def commit(self):
+        pass
+
+@pytest.fixture(autouse=True)
+def _no_lookups(monkeypatch):
+    # lookup id'leri sahte session'da üretilemez; satırlar olduğu gibi INSERT'e gitsin
+    async def _identity(session, rows):
+        return list(rows)
+    monkeypatch.setattr("app.repositories.events.encode_events", _identity)
+
+def _factory(sink):
+    return lambda: _FakeSession(sink)
+
+def _dropped(reason: str) -> float:
+    txt = generate_latest(METRICS_REGISTRY).decode()
+    for fam in text_string_to_metric_families(txt):
+        if fam.name == "events_dropped":
+            return sum(s.value for s in fam.samples
+                       if s.name == "events_dropped_total" and s.labels.get("reason") == reason)
+    return 0.0
+
+@pytest.mark.asyncio
+async def test_flushes_on_batch_size_as_single_insert():
+    batches = []
+    w = EventWriter(_factory(batches), batch_size=5, flush_interval=10.0)
+    for i in range(5):
+        assert w.submit(ip_hash="h", path=f"/p{i}", reason="r")
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+        if batches:
+            break
+    assert batches == [5]
+    await w.stop()
+
+@pytest.mark.asyncio
+async def test_flushes_on_interval_and_on_stop():
+    batches = []
+    w = EventWriter(_factory(batches), batch_size=100, flush_interval=0.05)
+    w.submit(ip_hash="h", path="/a", reason="r")
+    await asyncio.sleep(0.15)
+    assert batches == [1]
+    w.submit(ip_hash="h", path="/b", reason="r")
+    w.submit(ip_hash="h", path="/c", reason="r")
+    await w.stop()
+    assert sum(batches) == 3
+    # kapanıştan sonra kabul yok
+    assert w.submit(ip_hash="h", path="/d", reason="r") is False
+
+@pytest.mark.asyncio
+async def test_queue_full_drops_are_counted():
+    batches = []
+    before = _dropped("queue_full")
+    w = EventWriter(_factory(batches), max_queue=2, batch_size=100, flush_interval=10.0)
+    results = [w.submit(ip_hash="h", path="/x", reason="r") for _ in range(5)]
+    # ilk event görev tarafından alınmadan önce kuyruk 2'de dolar
+    assert results.count(False) >= 2
+    assert _dropped("queue_full") - before == results.count(False)
+    await w.stop()
+
+class _PickySession(_FakeSession):
+    """'/bad' path'li satır içeren INSERT'i veri hatasıyla reddeder."""
+    async def execute(self, stmt, *args):
+        rows = stmt._multi_values[0]
+        if any(r.get("path") == "/bad" for r in rows):
+            raise IntegrityError("INSERT", {}, ValueError("bad row"))
+        self.sink.append(len(rows))
+
+@pytest.mark.asyncio
+async def test_one_bad_row_does_not_drop_the_batch():
+    batches = []
+    before = _dropped("data_error")
+    w = EventWriter(lambda: _PickySession(batches), batch_size=4, flush_interval=10.0)
+    for p in ("/a", "/bad", "/b", "/c"):
+        assert w.submit(ip_hash="h", path=p, reason="r")
+    await w.stop()
+    # batch reddedildi, sağlam satırlar tek tek yazıldı
+    assert batches == [1, 1, 1]
+    assert _dropped("data_error") - before == 1
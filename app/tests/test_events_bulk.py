@@ -0,0 +1,31 @@
+import os, gzip, json, importlib, pytest, httpx
+
+pytestmark = pytest.mark.asyncio
+
+def _env():
+    os.environ["QUARANTINE_ENABLED"] = "false"
+    os.environ["ZSCORE_ENABLED"] = "false"
+
+@pytest.mark.asyncio
+async def test_bulk_reports_rejected_line_numbers_gzip():
+    _env()
+    import app.main as main
+    importlib.reload(main)
+    app = main.app
+    # Sadece geçersiz satırlar: COPY'ye hiç gidilmez (DB gerekmez)
+    lines = [
+        "not json",
+        "",
+        json.dumps({"client": "c1"}),
+        json.dumps({"client": "c1", "kind": "k", "reason": "r", "path": "/x", "ts": "abc"}),
+        "x" * 70000,
+    ]
+    body = gzip.compress("\n".join(lines).encode())
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        r = await c.post("/events/bulk", content=body, headers={"Content-Encoding": "gzip"})
+        assert r.status_code == 200
+        data = r.json()
+        assert data["accepted"] == 0
+        assert data["batches"] == []
+        assert [x["line"] for x in data["rejected_lines"]] == [1, 3, 4, 5]
+        assert data["rejected"] == 4
@@ -0,0 +1,69 @@
+import gzip, json, os, uuid, importlib
+from datetime import datetime, timedelta, timezone
+
+import httpx, pytest
+
+from app.db.session import SessionLocal
+from app.repositories.events import insert_events
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.mark.asyncio
+async def test_export_streams_filtered_rows_in_order(monkeypatch):
+    os.environ["QUARANTINE_ENABLED"] = "false"
+    os.environ["ZSCORE_ENABLED"] = "false"
+    import app.main as main
+    importlib.reload(main)
+    import app.api.routes_events as routes
+    monkeypatch.setattr(routes, "EXPORT_CHUNK_ROWS", 3)  # birden çok parça
+
+    reason = f"export_{uuid.uuid4().hex[:10]}"
+    t0 = datetime.now(timezone.utc) - timedelta(minutes=30)
+    rows = [{"ts": t0 + timedelta(seconds=i), "ip_hash": "e", "reason": reason, "meta": {"i": i, "q": 'a"b'}}
+            for i in range(8)]
+    async with SessionLocal() as s:
+        await insert_events(s, rows)
+        await s.commit()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as c:
+        r = await c.get("/events/export", params={"reason": reason, "compression": "gzip"})
+        assert r.status_code == 200
+        assert 'filename="events.ndjson.gz"' in r.headers["content-disposition"]
+        lines = gzip.decompress(r.content).decode().splitlines()
+        assert [json.loads(x)["meta"]["i"] for x in lines] == list(range(8))
+
+        r = await c.get("/events/export", params={"reason": reason, "format": "csv"})
+        text = r.text.splitlines()
+        assert text[0].startswith("id,ts,ip_hash")
+        assert len(text) == 9
+
+
+async def test_export_applies_search_filters():
+    import app.main as main
+
+    reason = f"exportf_{uuid.uuid4().hex[:10]}"
+    t0 = datetime.now(timezone.utc) - timedelta(minutes=20)
+    rows = [
+        {"ts": t0 + timedelta(seconds=i), "ip_hash": "e", "reason": reason, "path": f"/wp-{i % 2}/x",
+         "ua": "SQLMap/1.7" if i % 3 == 0 else "curl/8", "meta": {"i": i, "z": i * 2}}
+        for i in range(9)
+    ]
+    async with SessionLocal() as s:
+        await insert_events(s, rows)
+        await s.commit()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as c:
+        for extra in (
+            {"ua": "sqlmap", "ua_match": "prefix", "icase": "true"},
+            {"path": "wp-1", "path_match": "contains"},
+            {"meta": '{"i": 4}'},
+            {"meta.z>": "9", "path": "/wp-0/x"},
+        ):
+            params = {"reason": reason, **extra}
+            r = await c.get("/events/export", params=params)
+            got = [json.loads(x)["meta"]["i"] for x in r.text.splitlines()]
+            r = await c.get("/events/search", params={**params, "limit": 100})
+            want = sorted(i["meta"]["i"] for i in r.json()["items"])
+            assert got == want and 0 < len(got) < len(rows), extra
+        r = await c.get("/events/export", params={"reason": reason, "meta": "[1]"})
+        assert r.status_code == 400
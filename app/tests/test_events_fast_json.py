@@ -0,0 +1,86 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import app.services.fast_json as fj
+from app.api.routes_events import EventOut, EventsPage
+from app.db.session import SessionLocal
+from app.repositories.events import insert_events, list_events, next_cursor
+from app.repositories.lookups import EventRow
+
+_T = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def _rows():
+    metas = [None, {"z": 3.5, "tags": ["a", "ş"]}, {"tiny": 1e-05, "big": 1e16}, {"n": 2**70},
+             {"s": 'tab\t"quote"\x01 ğüşiöç ✓'}]
+    return [
+        EventRow(id=i + 1, ts=_T + timedelta(microseconds=i * 250000), ip_hash="00000000000000ab",
+                 ua=None if i % 2 else "curl/8", path="/x", reason="r", score=[0.1, None, 2.5e-7, 3.0, 1e300][i],
+                 severity=i, meta=metas[i])
+        for i in range(len(metas))
+    ]
+
+
+def _old_list(rows, limit):
+    page = EventsPage(total=len(rows), items=[EventOut.model_validate(r.__dict__) for r in rows],
+                      next_cursor=next_cursor(rows, limit))
+    return JSONResponse(jsonable_encoder(page.model_dump(mode="json"))).body
+
+
+def _old_search(rows, limit):
+    items = [EventOut.model_validate(r.__dict__).model_dump() for r in rows]
+    return JSONResponse(jsonable_encoder({"items": items, "limit": limit, "count": len(items)})).body
+
+
+@pytest.mark.parametrize("with_orjson", [True, False])
+def test_bytes_match_previous_serialization(monkeypatch, with_orjson):
+    if not with_orjson:
+        monkeypatch.setattr(fj, "orjson", None)
+    rows = _rows()
+    # tek tek (orjson yolu) ve birlikte (stdlib'e düşen sayfa)
+    for part in [rows[:1], rows[1:2], rows[2:3], rows[3:4], rows[4:], rows]:
+        new = fj.dumps({"total": len(part), "items": fj.event_dicts(part), "next_cursor": next_cursor(part, 2)},
+                       utc_z=True)
+        assert new == _old_list(part, 2)
+        items = fj.event_dicts(part)
+        assert fj.dumps({"items": items, "limit": 2, "count": len(items)}) == _old_search(part, 2)
+
+
+def test_parse_fields():
+    assert fj.parse_fields(None) is None
+    assert fj.parse_fields(" reason,ts ,reason") == ("ts", "reason")
+    with pytest.raises(ValueError):
+        fj.parse_fields("ts,password")
+
+
+@pytest.mark.asyncio
+async def test_projection_reads_only_requested_columns():
+    reason = f"proj_{uuid.uuid4().hex[:10]}"
+    now = datetime.now(timezone.utc)
+    async with SessionLocal() as s:
+        await insert_events(s, [
+            dict(ts=now + timedelta(milliseconds=i), ip_hash="1.2.3.4", ua="pytest", path=f"/p/{i}",
+                 reason=reason, score=1.0, severity=2, meta={"i": i})
+            for i in range(3)
+        ])
+        await s.commit()
+        _, full = await list_events(s, start_ts=now, reason=reason)
+        _, slim = await list_events(s, start_ts=now, reason=reason, fields=("path",))
+    assert [(r.id, r.ts, r.path) for r in slim] == [(r.id, r.ts, r.path) for r in full]
+    assert all(r.reason is None and r.meta is None and r.ip_hash is None for r in slim)
+    assert fj.event_dicts(slim[:1], ("ts", "path")) == [{"ts": full[0].ts, "path": "/p/2"}]
+
+
+def test_openapi_documents_page_models_with_fields_note():
+    from app.main import app
+
+    app.openapi_schema = None
+    paths = app.openapi()["paths"]
+    for path, model in (("/events", "EventsPage"), ("/events/search", "SearchPage")):
+        ok = paths[path]["get"]["responses"]["200"]
+        assert ok["content"]["application/json"]["schema"]["$ref"].endswith(f"/{model}")
+        assert "fields=" in ok["description"]
@@ -0,0 +1,43 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.repositories.events import decode_cursor, encode_cursor, insert_events, list_events, next_cursor
+
+
+def test_cursor_roundtrip_and_invalid():
+    ts = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_all_rows_once():
+    ip = f"keyset_{uuid.uuid4().hex[:12]}"
+    same = datetime.now(timezone.utc).replace(microsecond=0)
+    # aynı ts'li satırlar: sayfa sınırı id ile ayrılmalı
+    rows = [{"ts": same, "ip_hash": ip, "reason": "keyset"} for _ in range(7)]
+    async with SessionLocal() as s:
+        await insert_events(s, rows)
+        await s.commit()
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            total, page = await list_events(s, ip_hash=ip, limit=3, cursor=cursor, total="none")
+            assert total is None
+            seen.extend(r.id for r in page)
+            pages += 1
+            cursor = next_cursor(page, 3)
+            if cursor is None:
+                break
+        assert pages == 3
+        assert len(seen) == len(set(seen)) == 7
+        assert seen == sorted(seen, reverse=True)
+
+        exact, _ = await list_events(s, ip_hash=ip, limit=1, total="exact")
+        assert exact == 7
+        est, _ = await list_events(s, ip_hash=ip, limit=1, total="estimate")
+        assert isinstance(est, int) and est >= 0
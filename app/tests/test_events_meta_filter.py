@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.repositories.events import insert_events, list_events, parse_meta_filter
+
+_METAS = [
+    {"phase": "ban_set", "z": 7.5, "tags": {"src": "nginx"}},
+    {"phase": "ban_set", "z": "abc"},  # sayı olmayan z hata vermez, eşleşmez
+    {"phase": "warn", "z": 3, "count": 12},
+    {"status": "ok"},
+    None,
+]
+
+
+async def _seed():
+    reason = f"meta_{uuid.uuid4().hex[:10]}"
+    ts = datetime.now(timezone.utc)
+    rows = [
+        dict(ts=ts, ip_hash="00000000000000cd", ua="", path=f"/m{i}", reason=reason,
+             score=0.0, severity=0, meta=m)
+        for i, m in enumerate(_METAS)
+    ]
+    async with SessionLocal() as s:
+        await insert_events(s, rows)
+        await s.commit()
+    return reason
+
+
+def test_parse_meta_filter():
+    assert parse_meta_filter("meta.z>5") == ("z", ">", 5.0)
+    assert parse_meta_filter("meta.count=12") == ("count", "=", 12)
+    assert parse_meta_filter('meta.count="12"') == ("count", "=", "12")
+    assert parse_meta_filter("meta.phase!=ban_set") == ("phase", "!=", "ban_set")
+    for bad in ("meta.z>abc", "meta.x", "meta.a b=1", "meta.x'--=1", "z=1"):
+        with pytest.raises(ValueError):
+            parse_meta_filter(bad)
+
+
+@pytest.mark.asyncio
+async def test_meta_filters():
+    reason = await _seed()
+
+    async def paths(**kw):
+        async with SessionLocal() as s:
+            total, rows = await list_events(s, reason=reason, total="estimate", **kw)
+        return sorted(r.path for r in rows)
+
+    f = parse_meta_filter
+    assert await paths(meta={"phase": "ban_set"}) == ["/m0", "/m1"]
+    assert await paths(meta_filters=[f("meta.z>5")]) == ["/m0"]
+    assert await paths(meta_filters=[f("meta.z<=3")]) == ["/m2"]
+    assert await paths(meta_filters=[f("meta.phase=ban_set"), f("meta.z>=0")]) == ["/m0"]
+    assert await paths(meta_filters=[f("meta.count=12")]) == ["/m2"]
+    assert await paths(meta_filters=[f("meta.phase!=ban_set")]) == ["/m2", "/m3", "/m4"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as c:
+        # meta.z>5 ham sorgu dizgesi olarak (anahtar "meta.z>5", değer boş)
+        r = await c.get(f"/events/search?reason={reason}&meta.phase=ban_set&meta.z%3E5")
+        assert r.status_code == 200, r.text
+        assert [i["path"] for i in r.json()["items"]] == ["/m0"]
+        r = await c.get("/events/search", params={"reason": reason, "meta": '{"status": "ok"}'})
+        assert [i["path"] for i in r.json()["items"]] == ["/m3"]
+        assert (await c.get("/events/search", params={"meta": "[1]"})).status_code == 400
+        assert (await c.get("/events/search?meta.z%3Eabc")).status_code == 400
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="iç içe containment PostgreSQL'e özgü")
+@pytest.mark.asyncio
+async def test_nested_meta_containment():
+    reason = await _seed()
+    async with SessionLocal() as s:
+        total, rows = await list_events(s, reason=reason, total="estimate", meta={"tags": {"src": "nginx"}})
+    assert [r.path for r in rows] == ["/m0"]
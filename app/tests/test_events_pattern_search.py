@@ -0,0 +1,74 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+import app.repositories.lookups as lookups
+from app.db.session import SessionLocal
+from app.main import app
+from app.repositories.events import insert_events, list_events
+from app.repositories.lookups import _prefix_upper
+
+_PATHS = ["/wp-admin/a", "/WP-login.php", "/api/wp-json", "/a%b", "/a_b", "/axb"]
+_UAS = ["sqlmap/1.7", "SQLMap/1.6", "curl/8 sqlmap", None, "Mozilla", "mozilla"]
+
+
+async def _seed():
+    reason = f"pat_{uuid.uuid4().hex[:10]}"
+    ts = datetime.now(timezone.utc) - timedelta(minutes=1)
+    rows = [
+        dict(ts=ts + timedelta(milliseconds=i), ip_hash="00000000000000ab", ua=ua, path=p,
+             reason=reason, score=0.0, severity=0, meta=None)
+        for i, (p, ua) in enumerate(zip(_PATHS, _UAS))
+    ]
+    async with SessionLocal() as s:
+        await insert_events(s, rows)
+        await s.commit()
+    return reason
+
+
+def test_prefix_upper_bound():
+    assert _prefix_upper("wp-") == "wp."
+    assert _prefix_upper("a\U0010ffff") == "b"
+    assert _prefix_upper("\U0010ffff") is None
+    assert _prefix_upper("\ud7ff") == "\ue000"
+
+
+@pytest.mark.asyncio
+async def test_path_and_ua_patterns(monkeypatch):
+    reason = await _seed()
+
+    async def paths(**kw):
+        async with SessionLocal() as s:
+            _, rows = await list_events(s, reason=reason, **kw)
+        return sorted(r.path for r in rows)
+
+    assert await paths(path="wp-", path_match="contains") == ["/api/wp-json", "/wp-admin/a"]
+    assert await paths(path="/wp-", path_match="prefix", icase=True) == ["/WP-login.php", "/wp-admin/a"]
+    assert await paths(path="/wp-login.PHP", icase=True) == ["/WP-login.php"]
+    # LIKE joker karakterleri düz metin olarak aranır
+    assert await paths(path="/a%", path_match="prefix") == ["/a%b"]
+    assert await paths(path="_", path_match="contains") == ["/a_b"]
+    assert await paths(ua="sqlmap", ua_match="prefix") == ["/wp-admin/a"]
+    assert await paths(ua="sqlmap", ua_match="prefix", icase=True) == ["/WP-login.php", "/wp-admin/a"]
+    assert await paths(ua="sqlmap", ua_match="contains") == ["/api/wp-json", "/wp-admin/a"]
+    assert await paths(ua="zzz-nothing", ua_match="contains") == []
+    # icase yalnızca path/ua'ya uygulanır: reason tam eşleşme kalır (hot tail ile aynı)
+    async with SessionLocal() as s:
+        assert (await list_events(s, reason=reason.upper(), icase=True))[1] == []
+        assert len((await list_events(s, reason=reason, icase=True))[1]) == len(_PATHS)
+
+    # eşleşme sınırı aşılınca alt sorgu yolu aynı sonucu verir
+    monkeypatch.setattr(lookups, "SEARCH_MATCH_MAX_IDS", 0)
+    assert await paths(ua="mozilla", ua_match="contains", icase=True) == ["/a_b", "/axb"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as c:
+        r = await c.get("/events/search", params={
+            "reason": reason, "path": "WP-", "path_match": "contains", "icase": "true", "ua": "sqlmap",
+            "ua_match": "contains", "total": "estimate",
+        })
+        assert r.status_code == 200, r.text
+        assert sorted(i["path"] for i in r.json()["items"]) == ["/WP-login.php", "/api/wp-json", "/wp-admin/a"]
+        r = await c.get("/events/search", params={"path": "x", "path_match": "suffix"})
+        assert r.status_code == 422
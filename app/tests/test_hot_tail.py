@@ -0,0 +1,59 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.repositories.events import insert_events_returning, list_events, next_cursor
+from app.repositories.lookups import EventRow
+from app.services.hot_tail import HotTail
+
+
+def _row(i, ts, ip="00000000000000aa", reason="r", path="/a"):
+    return EventRow(id=i, ts=ts, ip_hash=ip, ua="", path=path, reason=reason, score=0.0, severity=0, meta={})
+
+
+def test_coverage_order_and_eviction():
+    t = HotTail(max_events=5, max_age_sec=600)
+    t0 = t.complete_after
+    rows = [_row(i, t0 + timedelta(seconds=i), reason="x" if i % 2 else "y") for i in range(1, 8)]
+    t.add(rows[3:] + rows[:3])  # sırasız gelse de (ts, id) sırası korunur
+    assert len(t) == 5 and t.complete_after == rows[1].ts
+
+    # kapsama sınırının gerisi DB'ye düşer
+    assert t.query(start_ts=rows[0].ts) is None
+    assert t.query(start_ts=None) is None
+
+    total, items = t.query(start_ts=rows[2].ts, reason="x", limit=2)
+    assert total == 3 and [r.id for r in items] == [7, 5]
+    _, page2 = t.query(start_ts=rows[2].ts, reason="x", limit=2, cursor=next_cursor(items, 2))
+    assert [r.id for r in page2] == [3]
+    assert t.query(start_ts=rows[2].ts, end_ts=rows[6].ts, total="none", limit=1) == (None, [rows[5]])
+
+    # id'siz yazım (COPY) kapsamı daraltır
+    t.gap(rows[4].ts)
+    assert len(t) == 2 and t.query(start_ts=rows[4].ts) is None
+
+    with pytest.raises(ValueError):
+        t.query(start_ts=rows[5].ts, cursor="bozuk")
+
+
+@pytest.mark.asyncio
+async def test_tail_matches_database():
+    reason = f"tail_{uuid.uuid4().hex[:10]}"
+    t = HotTail(max_events=1000, max_age_sec=600)
+    now = t.complete_after + timedelta(milliseconds=1)
+    async with SessionLocal() as s:
+        written = await insert_events_returning(s, [
+            dict(ts=now + timedelta(milliseconds=i), ip_hash="1.2.3.4" if i % 3 else "00ff00ff00ff00ff",
+                 ua="pytest", path=f"/tail/{i % 2}", reason=reason, score=1.0, severity=1, meta={"i": i})
+            for i in range(12)
+        ])
+        await s.commit()
+        assert all(r.id and r.reason == reason for r in written)
+        t.add(written)
+
+        for f in (dict(reason=reason), dict(reason=reason, ip_hash="1.2.3.4", path="/tail/1"),
+                  dict(reason=reason, offset=3, limit=4)):
+            want = await list_events(s, start_ts=now, **f)
+            assert t.query(start_ts=now, **f) == want
@@ -0,0 +1,81 @@
+import os
+import random
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.main as main
+from app.db.leader import AdvisoryLeader, lock_id
+from app.db.session import engine
+
+pytestmark = [
+    pytest.mark.skipif(engine.dialect.name != "postgresql", reason="PostgreSQL'e özgü"),
+]
+
+
+def _engine():
+    return create_async_engine(os.environ["DATABASE_URL"], poolclass=NullPool)
+
+
+async def _backend_pid(leader):
+    return (await leader._conn.execute(text("SELECT pg_backend_pid()"))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_single_leader_and_takeover():
+    key = random.randint(1, 2**31 - 1)
+    e1, e2, admin = _engine(), _engine(), _engine()
+    a, b = AdvisoryLeader(e1, key), AdvisoryLeader(e2, key)
+    try:
+        assert await a.acquire() and await a.acquire()
+        assert not await b.acquire() and not b.is_leader
+
+        # kapanışta bırakılan kilidi sıradaki process alır
+        await a.release()
+        assert await b.acquire() and not await a.acquire()
+
+        # liderin bağlantısı koparsa kilit sunucuda düşer
+        pid = await _backend_pid(b)
+        async with admin.connect() as c:
+            await c.execute(text("SELECT pg_terminate_backend(:p)"), {"p": pid})
+        assert await a.acquire()
+        assert not await b.acquire() and not b.is_leader
+    finally:
+        await a.release()
+        await b.release()
+        for e in (e1, e2, admin):
+            await e.dispose()
+
+
+def test_lock_id_is_stable_int32():
+    assert lock_id("secmon:maintenance") == lock_id("secmon:maintenance")
+    assert all(-(2**31) <= lock_id(str(i)) < 2**31 for i in range(1000))
+
+
+class _Follower:
+    async def acquire(self):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_jobs_only_run_on_leader(monkeypatch):
+    calls = []
+
+    @main._db_job
+    async def _probe_job():
+        calls.append(1)
+        return 7
+
+    monkeypatch.setattr(main, "get_maintenance_leader", lambda: _Follower())
+    await _probe_job()
+    assert calls == []
+    assert main.MAINTENANCE_JOB_RUNS.labels(job="probe", result="not_leader")._value.get() >= 1
+
+    before = main.MAINTENANCE_JOB_AFFECTED.labels(job="probe")._value.get()
+    monkeypatch.undo()
+    await _probe_job()
+    assert calls == [1]
+    assert main.MAINTENANCE_JOB_AFFECTED.labels(job="probe")._value.get() == before + 7
+    await main.get_maintenance_leader().release()
@@ -0,0 +1,76 @@
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.metrics import REQUEST_LATENCY
+from app.observability.paths import UNMATCHED, PathNormalizer, get_path_normalizer, parse_rules
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/items/search")
+    def _search():
+        return []
+
+    @app.get("/items/{item_id}")
+    def _item(item_id: int):
+        return {}
+
+    return app
+
+
+def test_route_table_wins_then_rules():
+    n = PathNormalizer(_app().routes)
+    assert n.normalize("/items/search") == "/items/search"
+    assert n.normalize("/items/42") == "/items/{item_id}"
+    assert n.route_label("/items/42") == "/items/{item_id}"
+
+    u = str(uuid.uuid4())
+    assert n.normalize(f"/wp-admin/{u}/7/xyz123") == "/wp-admin/{uuid}/{id}/{token}"
+    assert n.normalize("/x/" + "ab" * 16) == "/x/{hash}"
+    assert n.normalize("/wp-login.php") == "/wp-login.php"
+    assert n.route_label("/wp-admin/xyz123") == UNMATCHED
+    assert n.normalize("") == "/"
+
+
+def test_custom_rules_and_validation():
+    n = PathNormalizer(rules="sess=s_[a-z]+")
+    assert n.normalize("/a/s_abc/42") == "/a/{sess}/42"
+    for bad in ("noequals", "x=[", "=abc"):
+        with pytest.raises(ValueError):
+            parse_rules(bad)
+
+
+def test_lru_cache_bounded_and_reset_on_bind():
+    n = PathNormalizer(_app().routes, cache_size=2)
+    for p in ("/items/1", "/items/1", "/items/2", "/items/3"):
+        n.normalize(p)
+    info = n.cache_info()
+    assert (info.hits, info.currsize) == (1, 2)
+    n.bind([])
+    assert n.cache_info().currsize == 0
+    assert n.route_label("/items/1") == UNMATCHED
+
+
+@pytest.mark.asyncio
+async def test_probe_paths_share_one_latency_label():
+    from app.main import app
+
+    get_path_normalizer().bind(app.routes)
+    child = REQUEST_LATENCY.labels(route=UNMATCHED, method="GET", status="404")
+    before = _count(child)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as c:
+        for i in range(3):
+            await c.get(f"/wp-admin/probe{i}x{uuid.uuid4().hex[:6]}")
+        await c.get("/health")
+    assert _count(child) == before + 3
+    labels = {s.labels.get("route") for m in REQUEST_LATENCY.collect() for s in m.samples}
+    assert "/health" in labels
+    assert not any(l and l.startswith("/wp-admin") for l in labels)
+
+
+def _count(child):
+    return sum(b.get() for b in child._buckets)
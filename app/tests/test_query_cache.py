@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.query_cache import QueryCache
+
+pytestmark = pytest.mark.asyncio
+
+
+def _counter():
+    calls = {"n": 0}
+
+    async def compute():
+        calls["n"] += 1
+        await asyncio.sleep(0.01)
+        return {"n": calls["n"]}
+    return calls, compute
+
+
+async def test_ttl_hit_and_param_normalization():
+    c = QueryCache()
+    calls, compute = _counter()
+    a = await c.get_or_compute("x", {"limit": 10, "since": None}, 60, compute)
+    b = await c.get_or_compute("x", {"limit": 10}, 60, compute)
+    assert a is b and calls["n"] == 1
+    await c.get_or_compute("x", {"limit": 11}, 60, compute)
+    assert calls["n"] == 2
+
+
+async def test_single_flight_coalesces_concurrent_queries():
+    c = QueryCache()
+    calls, compute = _counter()
+    res = await asyncio.gather(*[c.get_or_compute("x", {}, 60, compute) for _ in range(20)])
+    assert calls["n"] == 1
+    assert all(r == {"n": 1} for r in res)
+
+
+async def test_errors_are_not_cached_and_reach_waiters():
+    c = QueryCache()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+    res = await asyncio.gather(*[c.get_or_compute("x", {}, 60, boom) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in res)
+    assert len(c) == 0
+
+
+async def test_lru_bound_by_entries():
+    c = QueryCache(max_entries=2)
+    _, compute = _counter()
+    for i in range(3):
+        await c.get_or_compute("x", {"i": i}, 60, compute)
+    assert len(c) == 2
+    assert c.make_key("x", {"i": 0}) not in c._data
+
+
+async def test_write_invalidates_only_overlapping_closed_ranges():
+    c = QueryCache()
+    calls, compute = _counter()
+    now = datetime.now(timezone.utc)
+    old = (now - timedelta(days=2), now - timedelta(days=1))
+    cur = (now - timedelta(hours=1), now + timedelta(hours=1))
+    await c.get_or_compute("x", {"r": "old"}, 60, compute, start=old[0], end=old[1])
+    await c.get_or_compute("x", {"r": "cur"}, 60, compute, start=cur[0], end=cur[1])
+    await c.get_or_compute("x", {"r": "open"}, 60, compute, start=cur[0])
+    assert c.invalidate_range(now, now) == 1
+    assert c.make_key("x", {"r": "old"}) in c._data
+    assert c.make_key("x", {"r": "open"}) in c._data  # açık uçlu: yalnızca TTL
+    assert c.make_key("x", {"r": "cur"}) not in c._data
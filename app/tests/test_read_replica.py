@@ -0,0 +1,80 @@
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.db.replica import ReadRouter, replica_lag
+from app.db.session import SessionLocal, engine, get_read_session
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.skipif(engine.dialect.name != "postgresql", reason="PostgreSQL'e özgü"),
+]
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def _maker(url):
+    # aynı sunucu replika yerine geçer (pg_is_in_recovery() = false -> gecikme 0)
+    eng = create_async_engine(url, poolclass=NullPool, connect_args={"timeout": 1})
+    return eng, async_sessionmaker(eng, expire_on_commit=False, class_=AsyncSession)
+
+
+async def test_routes_to_replica_and_falls_back():
+    eng, replica = _maker(os.environ["DATABASE_URL"])
+    clock = _Clock()
+    try:
+        async with replica() as s:
+            assert await replica_lag(s) == 0.0
+
+        r = ReadRouter(SessionLocal, replica, max_lag_sec=5, check_interval_sec=2, clock=clock)
+        assert await r.factory() is replica and r.healthy
+
+        # sorgu bağlantı hatası: sonraki kontrole kadar birincil
+        r.mark_down()
+        assert await r.factory() is SessionLocal
+        clock.t += 2
+        assert await r.factory() is replica
+
+        # gecikme sınırı aşıldı
+        lagging = ReadRouter(SessionLocal, replica, max_lag_sec=-1, clock=clock)
+        assert await lagging.factory() is SessionLocal
+    finally:
+        await eng.dispose()
+
+
+async def test_unreachable_replica_uses_primary():
+    url = os.environ["DATABASE_URL"].rsplit("@", 1)[0] + "@127.0.0.1:1/secmon"
+    eng, replica = _maker(url)
+    try:
+        r = ReadRouter(SessionLocal, replica, check_timeout_sec=2)
+        assert await r.factory() is SessionLocal and not r.healthy
+    finally:
+        await eng.dispose()
+
+
+async def test_read_session_marks_replica_down_on_db_failure(monkeypatch):
+    eng, replica = _maker(os.environ["DATABASE_URL"])
+    r = ReadRouter(SessionLocal, replica)
+    monkeypatch.setattr("app.db.session.read_router", r)
+    try:
+        gen = get_read_session()
+        s = await gen.__anext__()
+        assert (await s.execute(text("SELECT 1"))).scalar() == 1 and r.healthy
+        with pytest.raises(OperationalError):
+            await gen.athrow(OperationalError("SELECT 1", {}, ConnectionResetError("reset")))
+        assert not r.healthy
+    finally:
+        await eng.dispose()
+
+    # replika ayarlı değilse (varsayılan) okumalar birincilde
+    assert await ReadRouter(SessionLocal).factory() is SessionLocal
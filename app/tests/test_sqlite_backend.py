@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+pytest.importorskip("aiosqlite")
+
+from app.db.backends import init_sqlite_schema, install_sqlite_pragmas, sqlite_engine_options
+from app.repositories.events import (
+    copy_events,
+    daily_counts,
+    daily_summary,
+    insert_event,
+    insert_events,
+    list_events,
+    next_cursor,
+    severity_counts,
+    stream_events,
+    top_paths,
+    top_reason_counts,
+)
+from app.services.retention import run_retention
+
+pytestmark = pytest.mark.asyncio
+
+
+def _engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'secmon.db'}", poolclass=NullPool, **sqlite_engine_options()
+    )
+    install_sqlite_pragmas(engine)
+    return engine
+
+
+async def test_sqlite_roundtrip_filters_and_stats(tmp_path):
+    engine = _engine(tmp_path)
+    await init_sqlite_schema(engine)
+    await init_sqlite_schema(engine)  # idempotent
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as s:
+            await _scenario(s)
+    finally:
+        await engine.dispose()
+
+
+async def _scenario(s):
+    assert (await s.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(days=40)
+    rows = [
+        dict(ts=now - timedelta(minutes=i), ip_hash="00ff00ff00ff00ff", ua="ua", path=f"/p{i % 2}",
+             reason="r_hot" if i % 3 else "r_cold", score=1.0, severity=i % 2, meta={"i": i})
+        for i in range(9)
+    ]
+    assert await insert_events(s, rows) == 9
+    await insert_event(s, ip_hash="10.0.0.1", ua=None, path="/old", reason="r_old",
+                       score=None, severity=None, meta=None, ts=old)
+    # COPY yolu SQLite'ta INSERT'e düşer (meta JSON string gelir)
+    assert await copy_events(s, [(now, "ffffffffffffffff", "", "/bulk", "r_hot", 0.0, 0, '{"b": 1}')]) == 1
+    await s.commit()
+
+    total, items = await list_events(s, reason="r_hot", limit=4)
+    assert total == 7 and len(items) == 4
+    assert all(r.ts.tzinfo is not None for r in items)
+    assert items == sorted(items, key=lambda r: (r.ts, r.id), reverse=True)
+    _, page2 = await list_events(s, reason="r_hot", limit=4, cursor=next_cursor(items, 4))
+    assert len(page2) == 3 and not {r.id for r in items} & {r.id for r in page2}
+
+    total, items = await list_events(s, ip_hash="10.0.0.1", total="estimate")
+    assert total == 1 and items[0].path == "/old" and items[0].ts == old
+    total, _ = await list_events(s, start_ts=now - timedelta(minutes=3), end_ts=now + timedelta(seconds=1))
+    assert total == 5  # 0..3 dakika önceki 4 satır + bulk
+    assert (await list_events(s, reason="missing"))[0] == 0
+    # desen araması: LIKE SQLite'ta harf duyarsız, duyarlı eşleşme instr ile
+    assert (await list_events(s, path="/P", path_match="prefix"))[0] == 0
+    assert (await list_events(s, path="/P", path_match="prefix", icase=True))[0] == 9
+    assert (await list_events(s, ua="U", ua_match="contains", icase=True))[0] == 9
+    assert (await list_events(s, meta={"i": 4}))[0] == 1
+    assert (await list_events(s, meta_filters=[("i", ">=", 6.0), ("i", "!=", 8)]))[0] == 2
+
+    top = {r.reason: r.cnt for r in await top_reason_counts(s, limit=10)}
+    assert top == {"r_hot": 7, "r_cold": 3, "r_old": 1}
+    assert {r.path: r.cnt for r in await top_paths(s, limit=10)} == {"/p0": 5, "/p1": 4, "/bulk": 1, "/old": 1}
+    assert {r.severity: r.cnt for r in await severity_counts(s)} == {0: 6, 1: 4, None: 1}
+    assert await daily_summary(s) == {"r_hot": 7, "r_cold": 3}
+    days = await daily_counts(s, days=0)
+    assert sum(r.cnt for r in days) == 11
+    assert all(r.day.tzinfo is not None and r.day.hour == 0 for r in days)
+
+    n = 0
+    async for part in stream_events(s, chunk_rows=4):
+        n += len(part)
+    assert n == 11
+
+    assert await run_retention(s, days=30) == 1
+    await s.commit()
+    assert (await list_events(s))[0] == 10
+    v = (await s.execute(text("SELECT count(*) FROM events_v WHERE ip_hash = 'ffffffffffffffff'"))).scalar()
+    assert v == 1
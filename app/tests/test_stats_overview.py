@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+import app.api.routes_stats as rs
+from app.db.session import SessionLocal
+from app.main import app
+from app.repositories.events import insert_events
+from app.services.query_cache import get_query_cache
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _seed():
+    reason = f"ovw_{uuid.uuid4().hex[:10]}"
+    ts = datetime.now(timezone.utc)
+    async with SessionLocal() as s:
+        await insert_events(s, [
+            dict(ts=ts, ip_hash="00000000000000ef", ua="", path="/ovw", reason=reason,
+                 score=0.0, severity=1, meta=None)
+            for _ in range(3)
+        ])
+        await s.commit()
+    return reason
+
+
+async def test_overview_matches_individual_endpoints():
+    await _seed()
+    get_query_cache().clear()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as c:
+        r = await c.get("/stats/overview", params={"days": 3, "limit": 5, "alerts_limit": 10})
+        assert r.status_code == 200
+        body = r.json()
+        assert body["degraded"] == {}
+        for section, url, params in [
+            ("daily", "/stats/daily", {"days": 3}),
+            ("reasons", "/stats/reasons", {"limit": 5}),
+            ("paths", "/stats/paths", {"limit": 5}),
+            ("daily_summary", "/stats/daily_summary", {}),
+            ("banlist", "/_debug/banlist", {}),
+            ("alerts", "/_debug/alerts", {"limit": 10}),
+        ]:
+            assert body[section] == (await c.get(url, params=params)).json(), section
+
+
+async def test_slow_section_degrades_without_blocking(monkeypatch):
+    async def _slow(session, limit):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(rs, "_path_items", _slow)
+    monkeypatch.setattr(rs, "OVERVIEW_SECTION_TIMEOUT_SEC", 0.3)
+    get_query_cache().clear()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as c:
+        t0 = asyncio.get_running_loop().time()
+        body = (await c.get("/stats/overview", params={"limit": 7})).json()
+        assert asyncio.get_running_loop().time() - t0 < 3
+    assert body["paths"] is None
+    assert body["degraded"] == {"paths": "timeout"}
+    assert isinstance(body["reasons"], list) and isinstance(body["daily_summary"], dict)
+    assert rs.STATS_OVERVIEW_DEGRADED.labels(section="paths", reason="timeout")._value.get() >= 1
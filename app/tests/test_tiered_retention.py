@@ -0,0 +1,124 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import httpx
+
+from app.db.backends import init_sqlite_schema, sqlite_engine_options
+from app.db.models import Event
+from app.db.session import SessionLocal
+from app.repositories.events import insert_events
+from app.services import retention
+from app.services.partitions import create_partition, drop_partitions_before, is_partitioned, list_partitions
+from app.services.retention import RetentionPolicy, delete_expired_batched, drop_expired_partitions
+
+_SPEC = "quarantine_block=7,zscore_anomaly=90,severity>=3=365"
+
+
+def test_policy_parse_and_lifetime():
+    p = RetentionPolicy.parse(_SPEC, 30)
+    assert (p.min_days(), p.horizon_days()) == (7, 365)
+    assert p.lifetime("quarantine_block", 1) == 7
+    assert p.lifetime("quarantine_block", 3) == 365
+    assert p.lifetime("zscore_anomaly", None) == 90
+    assert p.lifetime("other", 2) == 30
+    for bad in ("x=abc", "severity>=x=3", "x=0"):
+        with pytest.raises(ValueError):
+            RetentionPolicy.parse(bad, 30)
+
+
+@pytest.mark.asyncio
+async def test_batched_delete_applies_tiers(tmp_path):
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'ret.db'}", poolclass=NullPool, **sqlite_engine_options()
+    )
+    await init_sqlite_schema(engine)
+    policy = RetentionPolicy.parse(_SPEC, 30)
+    now = datetime.now(timezone.utc)
+    rows = [
+        dict(ts=now - timedelta(days=age, minutes=i), ip_hash="0a0a0a0a0a0a0a0a", ua="u", path="/p",
+             reason=reason, score=None, severity=sev, meta={"i": i})
+        for i, (reason, sev, age) in enumerate(
+            (reason, sev, age)
+            for reason in ("quarantine_block", "zscore_anomaly", "other")
+            for sev in (None, 1, 3, 5)
+            for age in (1, 8, 31, 91, 366)
+        )
+    ]
+    try:
+        async with async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as s:
+            await insert_events(s, rows)
+            await s.commit()
+            deleted = await delete_expired_batched(s, policy, now, batch_rows=4, max_rows_per_sec=0)
+            left = {m["i"] for m in (await s.execute(select(Event.meta))).scalars().all()}
+    finally:
+        await engine.dispose()
+
+    keep = {i for i, r in enumerate(rows) if r["ts"] >= now - timedelta(days=policy.lifetime(r["reason"], r["severity"]))}
+    assert left == keep
+    assert deleted == len(rows) - len(keep) > 0
+
+
+@pytest.mark.asyncio
+async def test_partition_dropped_once_every_tier_expired():
+    short, other = f"short_{uuid.uuid4().hex[:8]}", f"other_{uuid.uuid4().hex[:8]}"
+    # ufuk (3650 gün) uzak: bölümler ancak içlerindeki tüm satırların ömrü dolunca düşer
+    policy = RetentionPolicy.parse(f"{short}=7", 3650)
+    now = datetime(1990, 2, 1, tzinfo=timezone.utc)
+    d1, d2 = datetime(1990, 1, 10, 12, tzinfo=timezone.utc), datetime(1990, 1, 11, 12, tzinfo=timezone.utc)
+    async with SessionLocal() as s:
+        if not await is_partitioned(s):
+            pytest.skip("events bölümlü değil")
+        try:
+            for d in (d1, d2):
+                await create_partition(s, d.date())
+            await insert_events(s, [
+                {"ts": d1, "ip_hash": "r", "reason": short},
+                {"ts": d1, "ip_hash": "r", "reason": short, "severity": 5},
+                {"ts": d2, "ip_hash": "r", "reason": short},
+                {"ts": d2, "ip_hash": "r", "reason": other},
+            ])
+            await s.commit()
+            await drop_expired_partitions(s, policy, now)
+            await s.commit()
+            days = {day for _, day in await list_partitions(s)}
+            assert d1.date() not in days and d2.date() in days
+        finally:
+            await s.rollback()
+            await drop_partitions_before(s, datetime(1990, 1, 12, tzinfo=timezone.utc), delete_default=False)
+            await s.commit()
+
+
+@pytest.mark.asyncio
+async def test_purge_runs_in_background_job(monkeypatch):
+    import app.main as main
+    from app.metrics import MAINTENANCE_JOB_RUNS
+
+    calls = []
+
+    async def _fake_run(session, days=None, **kw):
+        calls.append(days)
+        return 0
+
+    # gerçek silme yerine: istek beklemez, iş lider/kesici sarmalayıcısından geçer
+    monkeypatch.setattr(main, "run_retention", _fake_run)
+    monkeypatch.setattr(retention, "RETENTION_POLICY", "zscore_anomaly=400")
+    runs = MAINTENANCE_JOB_RUNS.labels(job="retention", result="ok")
+    before = runs._value.get()
+    # önceki testlerin karantinaya aldığı 127.0.0.1 yerine kendi istemci adresi
+    transport = httpx.ASGITransport(app=main.app, client=("198.51.100.46", 4046))
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+        r = await c.post("/stats/purge")
+        assert r.status_code == 202
+        body = r.json()
+        assert body["purged_older_than_days"] == 400
+        assert body["policy"]["reasons"] == {"zscore_anomaly": 400}
+        body = (await c.post("/stats/purge", params={"days": 200})).json()
+        assert (body["purged_older_than_days"], body["policy"]["default_days"]) == (200, 200)
+    assert calls == [None, 200]
+    assert runs._value.get() == before + 2
@@ -0,0 +1,73 @@
+import asyncio
+import math
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.anomaly.batch import BatchZScorer
+from app.anomaly.zscore import ZScoreWindow
+
+_CFG = dict(bucket_sec=2, window_min=1, min_samples=3, threshold=2.0)
+
+
+def test_matches_inline_window_at_bucket_close():
+    rnd = random.Random(7)
+    batch = BatchZScorer(**_CFG, capacity=2)
+    inline = {}
+    clients = [f"{i:016x}" for i in range(40)]
+    seen_anomalies = 0
+    for idx in range(500_000, 500_200):
+        counts, last_z = {}, {}
+        for c in clients:
+            # client başına değişken taban + ara sıra ani artış, bazen sessiz kovalar
+            k = 0 if rnd.random() < 0.3 else rnd.randint(1, 4) + (25 if rnd.random() < 0.03 else 0)
+            for j in range(k):
+                zs = inline.setdefault(c, ZScoreWindow(**_CFG))
+                last_z[c] = zs.add_hit(idx * 2 + 0.01 + j * 1e-4)
+            if k:
+                counts[c] = k
+        got = batch.close_bucket(idx, counts)
+        want = {c: z for c, (z, anom) in last_z.items() if anom}
+        assert got.keys() == want.keys()
+        for c, z in want.items():
+            assert math.isclose(got[c], z, rel_tol=1e-9)
+        seen_anomalies += len(want)
+    assert seen_anomalies > 0
+    assert len(batch._clients) >= len(clients)
+
+
+def test_idle_clients_are_reclaimed():
+    batch = BatchZScorer(**_CFG, capacity=4)
+    batch.close_bucket(100, {f"c{i}": 1 for i in range(10)})
+    assert len(batch._rows) == 10 and len(batch._clients) == 16
+    # pencere (30 kova) boyunca sessiz: satırlar geri kazanılır
+    batch.close_bucket(100 + batch.window_buckets, {})
+    assert batch._rows == {} and len(batch._free) == 16
+    assert not batch._sum.any() and not batch._hist.any()
+    # dönen client yeni sayılır
+    batch.close_bucket(200, {"c1": 50})
+    assert batch.lookup("c1") is None
+
+
+@pytest.mark.asyncio
+async def test_background_ticks_publish_results():
+    batch = BatchZScorer(bucket_sec=0.05, window_min=1, min_samples=3, threshold=2.0)
+    try:
+        # değişken taban (std > 0), sonra ani artış
+        for k in (1, 3, 1, 2, 1, 3):
+            for _ in range(k):
+                batch.hit("a")
+            await asyncio.sleep(0.05)
+        for _ in range(60):
+            batch.hit("a")
+        for _ in range(20):
+            await asyncio.sleep(0.02)
+            if batch.lookup("a") is not None:
+                break
+        assert batch.lookup("a") > 2.0
+        assert batch.published_bucket is not None
+    finally:
+        await batch.stop()
+    assert batch._task is None
@@ -0,0 +1,47 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from app.anomaly.zscore import ZScoreWindow
+
+
+def _reference(counts, first, now, bucket_sec, window_buckets, min_samples):
+    """Aynı kovalar üzerinde pencereyi her seferinde baştan hesaplayan referans."""
+    cur = int(now // bucket_sec)
+    past = [counts.get(i, 0) for i in range(max(first, cur - window_buckets), cur)]
+    if len(past) < max(min_samples, 1):
+        return 0.0
+    std = statistics.stdev(past) if len(past) > 1 else 0.0
+    return (counts.get(cur, 0) - statistics.fmean(past)) / std if std > 0 else 0.0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_full_recompute_with_idle_gaps(seed):
+    rnd = random.Random(seed)
+    zs = ZScoreWindow(bucket_sec=2, window_min=1, min_samples=3, threshold=3.0)
+    t, counts, first = 1_000_000.0, {}, None
+    for _ in range(2000):
+        # çoğunlukla yoğun trafik, arada pencereden uzun boşluklar
+        t += rnd.choice([0.01, 0.2, 1.5, 7.0, 45.0, 130.0]) if rnd.random() < 0.1 else rnd.random() * 0.3
+        first = int(t // 2) if first is None else first
+        counts[int(t // 2)] = counts.get(int(t // 2), 0) + 1
+        z, anom = zs.add_hit(t)
+        ref = _reference(counts, first, t, 2, zs.window_buckets, 3)
+        assert math.isclose(z, ref, rel_tol=1e-9, abs_tol=1e-9)
+        assert anom == (ref > 3.0)
+        assert len(zs._hist) <= zs.window_buckets
+
+
+def test_idle_buckets_count_as_zero():
+    zs = ZScoreWindow(bucket_sec=1, window_min=1, min_samples=3, threshold=2.0)
+    for i in range(5):
+        zs.add_hit(100.0 + i)  # 1 hit/kova
+    # 10 sn boşluk: geçmiş = [1,1,1,1,1,0,...,0]
+    z, _ = zs.add_hit(115.0)
+    assert zs.samples() == 15
+    assert z > 0
+    # pencereden uzun boşluk: geçmiş tamamen sıfır, std=0
+    assert zs.add_hit(500.0) == (0.0, False)
+    assert (zs._sum, zs._sumsq, len(zs._hist)) == (0, 0, 0)
@@ -76,4 +76,10 @@ def run_migrations_online() -> None:
             compare_server_default=True,
         )
         with context.begin_transaction():
-            context.run_migrations()
\ No newline at end of file
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
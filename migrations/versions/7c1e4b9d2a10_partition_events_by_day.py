@@ -0,0 +1,118 @@
+"""partition events by day
+
+events tablosunu ts üzerinde RANGE ile günlük bölümlenmiş (declarative partitioning)
+tabloya çevirir. Mevcut satırlar yeni tabloya kopyalanır; verisi olan günler için
+bölümler oluşturulur (en fazla 400 gün geriye, daha eskiler events_default'a düşer).
+Partition key PK'da olmak zorunda olduğu için PK (id, ts) olur.
+
+Revision ID: 7c1e4b9d2a10
+Revises: 55228a0b7e0f
+Create Date: 2026-10-19 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b9d2a10'
+down_revision: Union[str, Sequence[str], None] = '55228a0b7e0f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Geriye doğru en fazla kaç günlük bölüm açılsın; daha eski satırlar default bölüme gider
+_BACKFILL_MAX_DAYS = 400
+_DAYS_AHEAD = 7
+
+_COLUMNS = "id, ts, ip_hash, ua, path, reason, score, severity, meta"
+
+
+def upgrade():
+    # 1) Eski tabloyu kenara al (index/constraint isimleri şema genelinde tekil)
+    op.execute("ALTER TABLE events RENAME TO events_legacy")
+    op.execute("ALTER TABLE events_legacy RENAME CONSTRAINT events_pkey TO events_legacy_pkey")
+    op.execute("ALTER INDEX ix_events_ts RENAME TO ix_events_legacy_ts")
+    op.execute("ALTER INDEX ix_events_ip_ts RENAME TO ix_events_legacy_ip_ts")
+    op.execute("ALTER INDEX ix_events_reason_ts RENAME TO ix_events_legacy_reason_ts")
+    # id sekansı eski tabloyla birlikte silinmesin
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY NONE")
+
+    # 2) Bölümlenmiş tablo
+    op.execute(
+        """
+        CREATE TABLE events (
+            id bigint NOT NULL DEFAULT nextval('events_id_seq'),
+            ts timestamptz NOT NULL DEFAULT now(),
+            ip_hash varchar(64) NOT NULL,
+            ua text,
+            path varchar(512),
+            reason varchar(64),
+            score double precision,
+            severity integer,
+            meta jsonb,
+            CONSTRAINT events_pkey PRIMARY KEY (id, ts)
+        ) PARTITION BY RANGE (ts)
+        """
+    )
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+    op.execute("CREATE INDEX ix_events_ts ON events (ts)")
+    op.execute("CREATE INDEX ix_events_ip_ts ON events (ip_hash, ts)")
+    op.execute("CREATE INDEX ix_events_reason_ts ON events (reason, ts)")
+    op.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+
+    # 3) Verisi olan günler + önümüzdeki günler için günlük bölümler
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            d date;
+            today date := (now() AT TIME ZONE 'UTC')::date;
+        BEGIN
+            FOR d IN
+                SELECT DISTINCT (ts AT TIME ZONE 'UTC')::date FROM events_legacy
+                WHERE ts >= (today - {_BACKFILL_MAX_DAYS})::timestamp AT TIME ZONE 'UTC'
+                UNION
+                SELECT generate_series(today, today + {_DAYS_AHEAD}, interval '1 day')::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF events FOR VALUES FROM (%L) TO (%L)',
+                    'events_p' || to_char(d, 'YYYYMMDD'),
+                    d::timestamp AT TIME ZONE 'UTC',
+                    (d + 1)::timestamp AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+
+    # 4) Veriyi taşı ve eski tabloyu kaldır
+    op.execute(f"INSERT INTO events ({_COLUMNS}) SELECT {_COLUMNS} FROM events_legacy")
+    op.execute("DROP TABLE events_legacy")
+
+
+def downgrade():
+    op.execute(
+        """
+        CREATE TABLE events_plain (
+            id bigint NOT NULL DEFAULT nextval('events_id_seq'),
+            ts timestamptz NOT NULL DEFAULT now(),
+            ip_hash varchar(64) NOT NULL,
+            ua text,
+            path varchar(512),
+            reason varchar(64),
+            score double precision,
+            severity integer,
+            meta jsonb
+        )
+        """
+    )
+    op.execute(f"INSERT INTO events_plain ({_COLUMNS}) SELECT {_COLUMNS} FROM events")
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE events CASCADE")
+    op.execute("ALTER TABLE events_plain RENAME TO events")
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+    op.execute("ALTER TABLE events ADD CONSTRAINT events_pkey PRIMARY KEY (id)")
+    op.execute("CREATE INDEX ix_events_ts ON events (ts)")
+    op.execute("CREATE INDEX ix_events_ip_ts ON events (ip_hash, ts)")
+    op.execute("CREATE INDEX ix_events_reason_ts ON events (reason, ts)")
@@ -0,0 +1,55 @@
+"""events hourly rollups
+
+Stats uçları için saatlik özet tabloları: (hour, reason), (hour, path), (hour, severity).
+Tablolar boş açılır; rollup işi watermark NULL iken en eski olaydan başlayarak doldurur.
+
+Revision ID: 9d4f2c6e8b31
+Revises: 7c1e4b9d2a10
+Create Date: 2026-10-19 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f2c6e8b31'
+down_revision: Union[str, Sequence[str], None] = '7c1e4b9d2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "events_hourly_reason",
+        sa.Column("hour", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("reason", sa.String(length=64), primary_key=True),
+        sa.Column("cnt", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "events_hourly_path",
+        sa.Column("hour", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("path", sa.String(length=512), primary_key=True),
+        sa.Column("cnt", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "events_hourly_severity",
+        sa.Column("hour", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("severity", sa.Integer(), primary_key=True),
+        sa.Column("cnt", sa.BigInteger(), nullable=False),
+    )
+    op.create_table(
+        "rollup_state",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute("INSERT INTO rollup_state (name, watermark) VALUES ('events_hourly', NULL)")
+
+
+def downgrade():
+    op.drop_table("rollup_state")
+    op.drop_table("events_hourly_severity")
+    op.drop_table("events_hourly_path")
+    op.drop_table("events_hourly_reason")
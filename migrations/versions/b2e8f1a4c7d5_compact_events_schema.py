@@ -0,0 +1,124 @@
+"""compact events schema
+
+ua/path/reason metinleri lookup tablolarına taşınır (event_uas, event_paths,
+event_reasons); events satırı yalnızca tamsayı id'leri tutar. ip_hash
+16 hex hane -> işaretli bigint olur; 16 hex olmayan eski değerler
+sha256(değer)'in ilk 16 hanesine çevrilir (app.repositories.lookups ile aynı kural).
+
+Dönüşüm bölümlenmiş tablo üzerinde yerinde yapılır (ALTER ebeveynden bölümlere
+yayılır). Eski kolonlar düşürüldükten sonraki ALTER TYPE tabloyu yeniden yazar ve
+düşen kolonların yerini geri kazanır. Elle SQL/Grafana için events_v görünümü
+eski kolon düzenini sunar.
+
+Lookup değerleri sınırsız text olduğundan saatlik rollup anahtarları
+(events_hourly_reason.reason, events_hourly_path.path) da text'e genişletilir;
+uzun değerler btree satır sınırını aşabileceği için PK yerine lookup tablolarındaki
+gibi (hour, md5(değer)) tekil index'i kullanılır. reason istemciden geldiği için
+reason_id de integer'dır (smallint 32767 farklı değerde tükenirdi).
+
+Revision ID: b2e8f1a4c7d5
+Revises: 9d4f2c6e8b31
+Create Date: 2026-10-19 15:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8f1a4c7d5'
+down_revision: Union[str, Sequence[str], None] = '9d4f2c6e8b31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (rollup tablosu, anahtar kolonu)
+_ROLLUP_KEYS = (("events_hourly_reason", "reason"), ("events_hourly_path", "path"))
+
+# (lookup tablosu, id tipi, events'teki eski kolon, yeni id kolonu, id kolon tipi)
+_LOOKUPS = (
+    ("event_reasons", "serial", "reason", "reason_id", "integer"),
+    ("event_paths", "serial", "path", "path_id", "integer"),
+    ("event_uas", "serial", "ua", "ua_id", "integer"),
+)
+
+_VIEW = """
+CREATE VIEW events_v AS
+SELECT e.id, e.ts,
+       lpad(to_hex(e.ip_hash), 16, '0') AS ip_hash,
+       u.value AS ua, p.value AS path, r.value AS reason,
+       e.score, e.severity, e.meta
+FROM events e
+LEFT JOIN event_uas u ON u.id = e.ua_id
+LEFT JOIN event_paths p ON p.id = e.path_id
+LEFT JOIN event_reasons r ON r.id = e.reason_id
+"""
+
+
+def upgrade():
+    for table, idtype, col, idcol, coltype in _LOOKUPS:
+        op.execute(f"CREATE TABLE {table} (id {idtype} PRIMARY KEY, value text NOT NULL)")
+        op.execute(f"CREATE UNIQUE INDEX ux_{table}_value ON {table} ((md5(value)))")
+        op.execute(
+            f"INSERT INTO {table} (value) SELECT DISTINCT {col} FROM events WHERE {col} IS NOT NULL"
+        )
+        op.execute(f"ALTER TABLE events ADD COLUMN {idcol} {coltype}")
+
+    # Tek geçişte üç id'yi doldur
+    op.execute(
+        """
+        UPDATE events e SET
+            reason_id = (SELECT id FROM event_reasons l WHERE md5(l.value) = md5(e.reason) AND l.value = e.reason),
+            path_id = (SELECT id FROM event_paths l WHERE md5(l.value) = md5(e.path) AND l.value = e.path),
+            ua_id = (SELECT id FROM event_uas l WHERE md5(l.value) = md5(e.ua) AND l.value = e.ua)
+        WHERE e.reason IS NOT NULL OR e.path IS NOT NULL OR e.ua IS NOT NULL
+        """
+    )
+    op.execute("DROP INDEX ix_events_reason_ts")
+    op.execute("ALTER TABLE events DROP COLUMN reason, DROP COLUMN path, DROP COLUMN ua")
+
+    # ip_hash -> bigint (tabloyu yeniden yazar; düşen kolonların yeri geri kazanılır)
+    op.execute(
+        """
+        ALTER TABLE events ALTER COLUMN ip_hash TYPE bigint USING (
+            CASE WHEN ip_hash ~ '^[0-9a-fA-F]{16}$'
+                 THEN ('x' || lower(ip_hash))::bit(64)::bigint
+                 ELSE ('x' || substr(encode(sha256(convert_to(ip_hash, 'UTF8')), 'hex'), 1, 16))::bit(64)::bigint
+            END
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_events_reason_ts ON events (reason_id, ts)")
+    op.execute(_VIEW)
+
+    for table, col in _ROLLUP_KEYS:
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_pkey")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {col} TYPE text")
+        op.execute(f"CREATE UNIQUE INDEX ux_{table}_key ON {table} (hour, (md5({col})))")
+
+
+def downgrade():
+    # Rollup anahtarları text kalır: lookup'tan gelen uzun değerler varchar'a sığmayabilir
+    for table, col in _ROLLUP_KEYS:
+        op.execute(f"DROP INDEX ux_{table}_key")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (hour, {col})")
+    op.execute("DROP VIEW events_v")
+    # Eski kolonlar text olarak geri gelir (lookup değerleri sınırsız)
+    op.execute("ALTER TABLE events ADD COLUMN ua text, ADD COLUMN path text, ADD COLUMN reason text")
+    op.execute(
+        """
+        UPDATE events e SET
+            reason = (SELECT value FROM event_reasons l WHERE l.id = e.reason_id),
+            path = (SELECT value FROM event_paths l WHERE l.id = e.path_id),
+            ua = (SELECT value FROM event_uas l WHERE l.id = e.ua_id)
+        WHERE e.reason_id IS NOT NULL OR e.path_id IS NOT NULL OR e.ua_id IS NOT NULL
+        """
+    )
+    op.execute("DROP INDEX ix_events_reason_ts")
+    op.execute("ALTER TABLE events DROP COLUMN reason_id, DROP COLUMN path_id, DROP COLUMN ua_id")
+    op.execute(
+        "ALTER TABLE events ALTER COLUMN ip_hash TYPE varchar(64) USING lpad(to_hex(ip_hash), 16, '0')"
+    )
+    op.execute("CREATE INDEX ix_events_reason_ts ON events (reason, ts)")
+    for table, *_ in _LOOKUPS:
+        op.execute(f"DROP TABLE {table}")
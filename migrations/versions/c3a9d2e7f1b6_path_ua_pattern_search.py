@@ -0,0 +1,68 @@
+"""path/ua pattern search indexes
+
+/events/search path ve ua için prefix, substring ve harf duyarsız eşleşme destekler.
+Desen önce küçük sözlük tablosunda (event_paths, event_uas) çözülür, events'e
+path_id/ua_id listesi olarak iner:
+
+- sözlük value'su üzerinde text_pattern_ops btree: prefix (~>=~ / ~<~ aralığı, LIKE 'x%')
+- pg_trgm kurulabiliyorsa GIN gin_trgm_ops: LIKE/ILIKE '%x%'. Eklenti yoksa (yetki ya da
+  paket eksik) migration durmaz; bu aramalar sözlük tablosunu tarar (events'i değil).
+- events (path_id, ts) ve (ua_id, ts): eşleşen id'lerden zaman sırasıyla okuma.
+
+Revision ID: c3a9d2e7f1b6
+Revises: b2e8f1a4c7d5
+Create Date: 2026-10-19 16:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9d2e7f1b6'
+down_revision: Union[str, Sequence[str], None] = 'b2e8f1a4c7d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TABLES = ("event_paths", "event_uas")
+
+
+def upgrade():
+    op.execute("CREATE INDEX ix_events_path_ts ON events (path_id, ts)")
+    op.execute("CREATE INDEX ix_events_ua_ts ON events (ua_id, ts)")
+    for table in _TABLES:
+        op.execute(f"CREATE INDEX ix_{table}_value_pattern ON {table} (value text_pattern_ops)")
+
+    # Eklenti yoksa/kurulamıyorsa sessizce geç (alt transaction; ana migration sürer)
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'pg_trgm unavailable (%), substring search will scan lookup tables', SQLERRM;
+        END
+        $$
+        """
+    )
+    for table in _TABLES:
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                    EXECUTE 'CREATE INDEX ix_{table}_value_trgm ON {table} USING gin (value gin_trgm_ops)';
+                END IF;
+            END
+            $$
+            """
+        )
+
+
+def downgrade():
+    for table in _TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_value_trgm")
+        op.execute(f"DROP INDEX ix_{table}_value_pattern")
+    op.execute("DROP INDEX ix_events_ua_ts")
+    op.execute("DROP INDEX ix_events_path_ts")
@@ -0,0 +1,42 @@
+"""events meta (jsonb) indexes
+
+/events/search meta filtreleri için:
+
+- GIN (meta jsonb_path_ops): meta @> '{"phase": "ban_set"}' içerme sorguları.
+- meta_num(meta, key): sayısal alan ya da NULL (sayı olmayan değerde hata vermez).
+  IMMUTABLE olduğu için ifade index'inde kullanılabilir; sıcak anahtarlar için
+  (ör. z, count) app/scripts/meta_indexes.py bölüm bölüm CONCURRENTLY ekler.
+
+Revision ID: d4b7e1c9a2f3
+Revises: c3a9d2e7f1b6
+Create Date: 2026-10-19 17:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b7e1c9a2f3'
+down_revision: Union[str, Sequence[str], None] = 'c3a9d2e7f1b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE FUNCTION meta_num(j jsonb, k text) RETURNS double precision
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT CASE WHEN jsonb_typeof(j -> k) = 'number' THEN (j ->> k)::double precision END
+        $$
+        """
+    )
+    op.execute("CREATE INDEX ix_events_meta_gin ON events USING gin (meta jsonb_path_ops)")
+
+
+def downgrade():
+    op.execute("DROP INDEX ix_events_meta_gin")
+    # meta_indexes.py ile eklenen ifade index'leri fonksiyona bağlıdır
+    op.execute("DROP FUNCTION meta_num(jsonb, text) CASCADE")
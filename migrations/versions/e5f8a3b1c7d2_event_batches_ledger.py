@@ -0,0 +1,37 @@
+"""event_batches idempotency ledger
+
+Event writer batch anahtarları (uuid4 hex). Batch event'leriyle aynı transaction'da
+eklenir; diskteki spool'dan replay edilen batch defterde varsa atlanır. Satırlar
+retention ile events ile aynı cutoff'ta temizlenir.
+
+Revision ID: e5f8a3b1c7d2
+Revises: d4b7e1c9a2f3
+Create Date: 2026-10-19 18:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f8a3b1c7d2'
+down_revision: Union[str, Sequence[str], None] = 'd4b7e1c9a2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE TABLE event_batches (
+            key        varchar(32) PRIMARY KEY,
+            created_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_event_batches_created_at ON event_batches (created_at)")
+
+
+def downgrade():
+    op.execute("DROP TABLE event_batches")